@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Dict
 
 
 class Settings(BaseSettings):
@@ -12,6 +13,29 @@ class Settings(BaseSettings):
 
     # Claude API
     claude_api_key: str = ""
+    claude_max_concurrent: int = 8
+    claude_http_max_connections: int = 16
+    claude_http_max_keepalive: int = 8
+    claude_http2: bool = True
+    # Mark static system/instruction blocks for provider-side prompt caching
+    claude_prompt_caching: bool = True
+    # Messages endpoint (point at a local fake server to exercise failure handling)
+    claude_api_url: str = "https://api.anthropic.com/v1/messages"
+    # Retries with jittered exponential backoff, honoring retry-after up to a cap
+    claude_retry_max_attempts: int = 3
+    claude_retry_base_seconds: float = 0.5
+    claude_retry_max_seconds: float = 8.0
+    claude_retry_after_max_seconds: float = 30.0
+    # Fail fast after N consecutive upstream failures, probe again after the reset
+    claude_breaker_failures: int = 5
+    claude_breaker_reset_seconds: float = 30.0
+    # Overall deadline per endpoint, including queueing, retries and backoff
+    # ("batch" covers Message Batches requests, including uploads of up to 200 MB)
+    claude_deadlines: Dict[str, float] = {
+        "profile": 60.0,
+        "deep": 120.0,
+        "batch": 900.0,
+    }
 
     # Rate Limiting
     daily_free_limit: int = 2
@@ -20,7 +44,97 @@ class Settings(BaseSettings):
     bridge_enabled: bool = True
     bridge_request_dir: str = "../bridge/requests"
     bridge_response_dir: str = "../bridge/responses"
+    # Deep requests reference images here by content hash
+    bridge_image_dir: str = "../bridge/images"
     bridge_timeout_seconds: int = 300
+    # Response detection: "auto" (inotify on Linux, else polling), "inotify" or "poll"
+    bridge_watch_mode: str = "auto"
+    bridge_poll_interval_seconds: float = 0.25
+    # Retention: completed/expired requests older than this, or past the size
+    # limit, are removed (0 disables a limit; archived first if a dir is set)
+    bridge_retention_seconds: int = 86400
+    bridge_retention_max_mb: int = 512
+    bridge_janitor_interval_seconds: int = 300
+    bridge_archive_dir: str = ""
+    # Consumer leases: a claim not heartbeated within this is handed to another
+    # consumer; after max attempts the request fails instead
+    bridge_lease_seconds: int = 120
+    bridge_max_attempts: int = 3
+
+    # Instagram HTTP pool
+    instagram_http_max_connections: int = 100
+    instagram_http_max_keepalive: int = 20
+    instagram_http_max_per_host: int = 10
+    instagram_http_keepalive_expiry: float = 30.0
+    instagram_http2: bool = True
+
+    # Deep fetch image downloads
+    image_download_max_global: int = 16
+    image_download_max_per_profile: int = 4
+    image_download_budget_seconds: float = 12.0
+    image_download_jitter_seconds: float = 0.2
+    image_download_max_kb: int = 8192
+
+    # Scrape strategy execution: "hedged" or "sequential"
+    scrape_strategy_mode: str = "hedged"
+    scrape_hedge_delay_seconds: float = 3.0
+    # Adaptive strategy ordering from rolling success/latency stats
+    scrape_strategy_adaptive: bool = True
+    strategy_stats_window: int = 50
+    strategy_explore_rate: float = 0.1
+    strategy_skip_after_failures: int = 5
+    strategy_skip_seconds: float = 300
+    strategy_latency_scale_seconds: float = 10.0
+
+    # Playwright browser pool
+    browser_pool_size: int = 1
+    browser_pool_max_pages: int = 4
+    browser_pool_max_navigations: int = 50
+    browser_pool_max_memory_mb: int = 1024
+    # Browser memory is sampled (on a thread) at most this often
+    browser_pool_memory_check_seconds: float = 10.0
+    browser_pool_prewarm: bool = True
+
+    # Profile cache (TTL 0 disables, empty dir disables the disk tier)
+    profile_cache_ttl_seconds: int = 600
+    profile_cache_max_entries: int = 500
+    profile_cache_max_image_mb: int = 256
+    profile_cache_dir: str = ""
+    profile_cache_disk_max_entries: int = 5000
+    profile_cache_disk_max_mb: int = 64
+
+    # Negative cache TTLs per error code (seconds, 0 disables)
+    negative_cache_ttls: Dict[str, int] = {
+        "user_not_found": 1800,
+        "login_required": 120,
+        "private_account": 600,
+    }
+    negative_cache_max_entries: int = 10000
+
+    # Content-addressed image store (empty dir uses the system temp dir)
+    image_store_dir: str = ""
+    image_store_ram_mb: int = 64
+    image_store_disk_mb: int = 1024
+
+    # Image normalization before model submission
+    image_prep_max_edge: int = 1568
+    image_prep_quality: int = 85
+    image_prep_max_kb: int = 1024
+    image_prep_deep_total_kb: int = 4096
+
+    # CPU-bound work (image prep, base64/JSON encoding, HTML extraction): "thread" or "process"
+    cpu_executor_kind: str = "thread"
+    cpu_executor_workers: int = 4
+    cpu_executor_slow_seconds: float = 0.5
+
+    # Analysis result cache (TTL 0 disables, empty dir disables the disk tier)
+    result_cache_ttl_seconds: int = 86400
+    result_cache_max_entries: int = 2000
+    result_cache_dir: str = ""
+    result_cache_disk_max_mb: int = 256
+
+    # Share one scrape + model call between identical concurrent Instagram analyses
+    analysis_single_flight: bool = True
 
     # Supabase
     supabase_url: str = ""
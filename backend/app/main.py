@@ -1,14 +1,54 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import get_settings
-from app.routers import analysis
+from app.routers import analysis, admin
+from app.services.http_pool import get_claude_http_pool, get_instagram_http_pool
+from app.services.browser_pool import get_browser_pool
+from app.services.image_store import get_image_store
+from app.services.cpu_executor import get_cpu_executor
+from app.services.prompts import get_prompt_registry
+from app.services.bridge_watcher import get_response_watcher
+from app.services.bridge_janitor import get_bridge_janitor
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup
+    get_prompt_registry()
+    instagram_http = get_instagram_http_pool()
+    await instagram_http.start()
+    claude_http = get_claude_http_pool()
+    if not settings.bridge_enabled:
+        await claude_http.start()
+    if settings.bridge_enabled:
+        get_bridge_janitor().start()
+    browsers = get_browser_pool()
+    if settings.browser_pool_prewarm:
+        await browsers.start()
+
+    yield
+
+    # Shutdown
+    await browsers.close()
+    await instagram_http.close()
+    await claude_http.close()
+    get_cpu_executor().close()
+    if settings.bridge_enabled:
+        await get_bridge_janitor().close()
+        get_response_watcher().close()
+    if settings.profile_cache_dir:
+        # Cached profiles on disk reference these images
+        get_image_store().flush()
+
+
 app = FastAPI(
     title="Profile Whisperer API",
     description="AI-Powered Rizz Assistant - Stalk. Understand. Slide.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS for Flutter app
@@ -22,6 +62,7 @@ app.add_middleware(
 
 # Include routers
 app.include_router(analysis.router, prefix="/api/v1", tags=["analysis"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
 
 
 @app.get("/")
@@ -26,6 +26,7 @@ class InstagramAnalysisRequest(BaseModel):
     url: str
     language: str = "tr"
     roast_mode: bool = True
+    bypass_cache: bool = False
 
 
 class InstagramAnalysisResponse(BaseModel):
@@ -50,6 +51,7 @@ class DeepAnalysisRequest(BaseModel):
     url: str
     language: str = "tr"
     roast_mode: bool = True
+    bypass_cache: bool = False
 
 
 class DeepAnalysisResult(BaseModel):
@@ -0,0 +1,153 @@
+import asyncio
+from typing import Any, Dict
+from fastapi import APIRouter, Depends
+from app.services.instagram_service import get_instagram_scraper, InstagramScraper
+from app.services.image_store import ImageStore, get_image_store
+from app.services.ai_service import get_ai_service, AIService, ClaudeAPIService, ClaudeCodeBridge
+from app.services.result_cache import ResultCache, get_result_cache
+from app.services.cpu_executor import CpuExecutor, get_cpu_executor
+from app.services.single_flight import SingleFlight, get_analysis_flights
+from app.services.bridge_janitor import BridgeJanitor, get_bridge_janitor
+from app.services.bridge_queue import BridgeQueue, get_bridge_queue
+
+router = APIRouter()
+
+
+@router.get("/http-pool")
+async def http_pool_stats(
+    instagram: InstagramScraper = Depends(get_instagram_scraper),
+) -> Dict[str, Any]:
+    """
+    Connection pool size and saturation for outbound scraping traffic.
+    """
+    return {"instagram": instagram.http.stats()}
+
+
+@router.get("/model-calls")
+async def model_call_stats(
+    ai_service: AIService = Depends(get_ai_service),
+) -> Dict[str, Any]:
+    """
+    Model API concurrency, queue wait and latency (API mode only).
+    """
+    if isinstance(ai_service, ClaudeAPIService):
+        return ai_service.stats()
+    return {"mode": "bridge"}
+
+
+@router.get("/bridge")
+async def bridge_stats(
+    ai_service: AIService = Depends(get_ai_service),
+    janitor: BridgeJanitor = Depends(get_bridge_janitor),
+) -> Dict[str, Any]:
+    """
+    Bridge response watcher, plus pending/completed/expired request counts
+    and sizes and retention counters (bridge mode only).
+    """
+    if isinstance(ai_service, ClaudeCodeBridge):
+        return {**ai_service.stats(), "retention": janitor.stats()}
+    return {"mode": "api"}
+
+
+@router.get("/bridge/queue")
+async def bridge_queue_state(
+    ai_service: AIService = Depends(get_ai_service),
+    queue: BridgeQueue = Depends(get_bridge_queue),
+) -> Dict[str, Any]:
+    """
+    Every bridge request with its state (queued, claimed, abandoned,
+    completed or stale) and, for claimed ones, the consumer and lease.
+    """
+    if isinstance(ai_service, ClaudeCodeBridge):
+        return await asyncio.to_thread(queue.snapshot)
+    return {"mode": "api"}
+
+
+@router.get("/cpu-executor")
+async def cpu_executor_stats(
+    cpu: CpuExecutor = Depends(get_cpu_executor),
+) -> Dict[str, Any]:
+    """
+    Queue time and run time of offloaded CPU-bound work, per kind.
+    """
+    return cpu.stats()
+
+
+@router.get("/image-downloads")
+async def image_download_stats(
+    instagram: InstagramScraper = Depends(get_instagram_scraper),
+) -> Dict[str, Any]:
+    """
+    Image download counters, early-abort reasons and bytes saved.
+    """
+    return instagram.downloader.stats()
+
+
+@router.get("/browser-pool")
+async def browser_pool_stats(
+    instagram: InstagramScraper = Depends(get_instagram_scraper),
+) -> Dict[str, Any]:
+    """
+    Warm Playwright browser pool usage and recycling counters.
+    """
+    return instagram.browsers.stats()
+
+
+@router.get("/strategies")
+async def strategy_stats(
+    instagram: InstagramScraper = Depends(get_instagram_scraper),
+) -> Dict[str, Any]:
+    """
+    Rolling success rate, latency and skip state per scrape strategy.
+    """
+    return instagram.strategy_stats.stats()
+
+
+@router.get("/profile-cache")
+async def profile_cache_stats(
+    instagram: InstagramScraper = Depends(get_instagram_scraper),
+) -> Dict[str, Any]:
+    """
+    Profile cache hit/miss/eviction counters.
+    """
+    return instagram.cache.stats()
+
+
+@router.get("/negative-cache")
+async def negative_cache_stats(
+    instagram: InstagramScraper = Depends(get_instagram_scraper),
+) -> Dict[str, Any]:
+    """
+    Negative cache (not found / login wall / private) counters.
+    """
+    return instagram.negative_cache.stats()
+
+
+@router.get("/result-cache")
+async def result_cache_stats(
+    result_cache: ResultCache = Depends(get_result_cache),
+) -> Dict[str, Any]:
+    """
+    Analysis result cache hit/miss/bypass counters.
+    """
+    return result_cache.stats()
+
+
+@router.get("/single-flight")
+async def single_flight_stats(
+    flights: SingleFlight = Depends(get_analysis_flights),
+) -> Dict[str, Any]:
+    """
+    In-flight Instagram analyses and how many requests joined them.
+    """
+    return flights.stats()
+
+
+@router.get("/image-store")
+async def image_store_stats(
+    image_store: ImageStore = Depends(get_image_store),
+) -> Dict[str, Any]:
+    """
+    Content-addressed image store tier sizes and dedup counters.
+    """
+    return image_store.stats()
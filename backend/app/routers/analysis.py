@@ -1,7 +1,11 @@
+import json
 import uuid
-from typing import List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Body, Header, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 from app.models import (
     AnalysisResult,
     RemainingUsesResponse,
@@ -14,7 +18,11 @@ from app.models import (
 from app.config import get_settings, Settings
 from app.services.ai_service import get_ai_service, AIService
 from app.services.rate_limiter import RateLimiter, get_rate_limiter
-from app.services.instagram_service import get_instagram_scraper, InstagramScraper
+from app.services.instagram_service import get_instagram_scraper, InstagramProfile, InstagramScraper
+from app.services.image_store import ImageLike, ImageStore, get_image_store
+from app.services.result_cache import ResultCache, get_result_cache
+from app.services.single_flight import SingleFlight, get_analysis_flights
+from app.services.model_resilience import ModelCallError
 
 router = APIRouter()
 
@@ -38,6 +46,14 @@ def get_client_id(
     return "anonymous"
 
 
+def flight_key(kind: str, url: str, language: str, roast_mode: bool, bypass_cache: bool) -> Optional[tuple]:
+    """Key under which identical concurrent Instagram analyses share one scrape and model call."""
+    username = InstagramScraper.extract_username(url)
+    if not username:
+        return None
+    return (kind, username.lower(), language, roast_mode, bypass_cache)
+
+
 def build_result(result: dict) -> AnalysisResult:
     """Build AnalysisResult from AI response."""
     return AnalysisResult(
@@ -56,16 +72,26 @@ def build_result(result: dict) -> AnalysisResult:
     )
 
 
+def _ai_error_code(error: Exception) -> str:
+    """`ai_unavailable` when the model API is down or overloaded, so the client can suggest trying later."""
+    if isinstance(error, ModelCallError) and error.retryable:
+        return "ai_unavailable"
+    return "ai_error"
+
+
 @router.post("/analyze", response_model=AnalysisResult)
 async def analyze_profile(
     request: Request,
     image: UploadFile = File(...),
     language: str = "tr",
     roast_mode: bool = True,
+    bypass_cache: bool = False,
     x_user_id: Optional[str] = Header(None, alias="X-User-ID"),
     settings: Settings = Depends(get_settings),
     ai_service: AIService = Depends(get_ai_service),
     rate_limiter: RateLimiter = Depends(get_rate_limiter),
+    image_store: ImageStore = Depends(get_image_store),
+    result_cache: ResultCache = Depends(get_result_cache),
 ):
     """
     Analyze a profile photo and return vibe analysis with conversation starters.
@@ -88,11 +114,18 @@ async def analyze_profile(
 
     # Analyze with AI
     try:
-        result = await ai_service.analyze_profile(image_bytes, language, roast_mode=roast_mode)
+        result = await result_cache.analyze_profile(
+            ai_service,
+            await image_store.aput(image_bytes),
+            language,
+            roast_mode=roast_mode,
+            bypass=bypass_cache,
+        )
     except Exception as e:
         import traceback
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+        status_code = 503 if _ai_error_code(e) == "ai_unavailable" else 500
+        raise HTTPException(status_code=status_code, detail=f"Analysis failed: {str(e)}")
 
     # Increment usage
     rate_limiter.increment(client_id)
@@ -109,6 +142,8 @@ async def analyze_instagram_profile(
     ai_service: AIService = Depends(get_ai_service),
     rate_limiter: RateLimiter = Depends(get_rate_limiter),
     instagram: InstagramScraper = Depends(get_instagram_scraper),
+    result_cache: ResultCache = Depends(get_result_cache),
+    flights: SingleFlight = Depends(get_analysis_flights),
 ):
     """
     Analyze an Instagram profile by URL.
@@ -124,9 +159,27 @@ async def analyze_instagram_profile(
             error_code="rate_limit"
         )
 
-    # Fetch Instagram profile
-    profile = await instagram.fetch_profile(body.url)
+    # Concurrent requests for the same profile share one scrape and model call;
+    # each client is still limited and counted on its own
+    failure, username, result = await flights.do(
+        flight_key("basic", body.url, body.language, body.roast_mode, body.bypass_cache),
+        lambda: _analyze_instagram(body, ai_service, instagram, result_cache),
+    )
+    if failure:
+        return failure
+
+    # Increment usage
+    rate_limiter.increment(client_id)
 
+    return InstagramAnalysisResponse(
+        success=True,
+        result=build_result(result),
+        username=username
+    )
+
+
+def _pick_instagram_image(profile: InstagramProfile) -> Tuple[Optional[InstagramAnalysisResponse], Optional[ImageLike]]:
+    """The image to analyze for a scraped profile, or the failure response to send instead."""
     if profile.error:
         error_messages = {
             "invalid_username": "Geçersiz Instagram kullanıcı adı veya linki",
@@ -145,7 +198,7 @@ async def analyze_instagram_profile(
             error=error_msg,
             error_code=profile.error,
             username=profile.username if profile.username else None
-        )
+        ), None
 
     if profile.is_private and not profile.profile_pic_bytes:
         return InstagramAnalysisResponse(
@@ -153,7 +206,7 @@ async def analyze_instagram_profile(
             error=f"@{profile.username} gizli hesap. Screenshot yükle!",
             error_code="private_account",
             username=profile.username
-        )
+        ), None
 
     # Decide which image(s) to analyze
     # Priority: post images > profile pic
@@ -171,14 +224,36 @@ async def analyze_instagram_profile(
             error="Analiz edilecek görsel bulunamadı",
             error_code="no_images",
             username=profile.username
-        )
+        ), None
+
+    return None, image_to_analyze
+
+
+async def _analyze_instagram(
+    body: InstagramAnalysisRequest,
+    ai_service: AIService,
+    instagram: InstagramScraper,
+    result_cache: ResultCache,
+) -> Tuple[Optional[InstagramAnalysisResponse], Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Scrape and analyze one profile: (failure response, username, raw result).
+    Shared between coalesced requests, so it must not touch per-client state.
+    """
+    # Fetch Instagram profile
+    profile = await instagram.fetch_profile(body.url)
+
+    failure, image_to_analyze = _pick_instagram_image(profile)
+    if failure:
+        return failure, None, None
 
     # Analyze with AI
     try:
-        result = await ai_service.analyze_profile(
+        result = await result_cache.analyze_profile(
+            ai_service,
             image_to_analyze,
             body.language,
-            roast_mode=body.roast_mode
+            roast_mode=body.roast_mode,
+            bypass=body.bypass_cache,
         )
     except Exception as e:
         import traceback
@@ -186,18 +261,11 @@ async def analyze_instagram_profile(
         return InstagramAnalysisResponse(
             success=False,
             error=f"AI analizi başarısız: {str(e)}",
-            error_code="ai_error",
+            error_code=_ai_error_code(e),
             username=profile.username
-        )
+        ), None, None
 
-    # Increment usage
-    rate_limiter.increment(client_id)
-
-    return InstagramAnalysisResponse(
-        success=True,
-        result=build_result(result),
-        username=profile.username
-    )
+    return None, profile.username, result
 
 
 @router.get("/remaining-uses", response_model=RemainingUsesResponse)
@@ -244,6 +312,8 @@ async def analyze_instagram_deep(
     ai_service: AIService = Depends(get_ai_service),
     rate_limiter: RateLimiter = Depends(get_rate_limiter),
     instagram: InstagramScraper = Depends(get_instagram_scraper),
+    result_cache: ResultCache = Depends(get_result_cache),
+    flights: SingleFlight = Depends(get_analysis_flights),
 ):
     """
     Deep analysis of an Instagram profile.
@@ -260,9 +330,28 @@ async def analyze_instagram_deep(
             error_code="rate_limit"
         )
 
-    # Fetch profile with deep data
-    profile = await instagram.fetch_profile_deep(body.url, max_posts=9)
+    # Concurrent requests for the same profile share one deep fetch and model call;
+    # each client is still limited and counted on its own
+    failure, username, post_count, result = await flights.do(
+        flight_key("deep", body.url, body.language, body.roast_mode, body.bypass_cache),
+        lambda: _analyze_instagram_deep(body, ai_service, instagram, result_cache),
+    )
+    if failure:
+        return failure
+
+    # Increment usage (counts as premium feature use)
+    rate_limiter.increment(client_id)
+
+    return DeepAnalysisResponse(
+        success=True,
+        result=build_deep_result(result),
+        username=username,
+        post_count_analyzed=post_count
+    )
 
+
+def _deep_profile_failure(profile: InstagramProfile) -> Optional[DeepAnalysisResponse]:
+    """The failure response for a deep-fetched profile that can't be analyzed, if any."""
     if profile.error:
         error_messages = {
             "invalid_username": "Geçersiz Instagram kullanıcı adı veya linki",
@@ -301,13 +390,34 @@ async def analyze_instagram_deep(
             post_count_analyzed=len(profile.post_images)
         )
 
+    return None
+
+
+async def _analyze_instagram_deep(
+    body: DeepAnalysisRequest,
+    ai_service: AIService,
+    instagram: InstagramScraper,
+    result_cache: ResultCache,
+) -> Tuple[Optional[DeepAnalysisResponse], Optional[str], int, Optional[Dict[str, Any]]]:
+    """
+    Deep fetch and analyze one profile: (failure response, username, posts analyzed, raw result).
+    Shared between coalesced requests, so it must not touch per-client state.
+    """
+    # Fetch profile with deep data
+    profile = await instagram.fetch_profile_deep(body.url, max_posts=9)
+
+    failure = _deep_profile_failure(profile)
+    if failure:
+        return failure, None, 0, None
+
     # Warn if less than 3 posts (but continue)
     if len(profile.post_images) < 3:
         print(f"[Warning] Only {len(profile.post_images)} images found for deep analysis")
 
     # Perform deep analysis
     try:
-        result = await ai_service.analyze_profile_deep(
+        result = await result_cache.analyze_profile_deep(
+            ai_service,
             images=profile.post_images,
             captions=profile.post_captions,
             like_counts=profile.post_like_counts,
@@ -315,6 +425,7 @@ async def analyze_instagram_deep(
             follower_count=profile.follower_count or 0,
             bio=profile.bio or "",
             language=body.language,
+            bypass=body.bypass_cache,
         )
     except NotImplementedError:
         return DeepAnalysisResponse(
@@ -322,26 +433,18 @@ async def analyze_instagram_deep(
             error="Derin analiz bu servis için desteklenmiyor",
             error_code="not_implemented",
             username=profile.username
-        )
+        ), None, 0, None
     except Exception as e:
         import traceback
         traceback.print_exc()
         return DeepAnalysisResponse(
             success=False,
             error=f"AI analizi başarısız: {str(e)}",
-            error_code="ai_error",
+            error_code=_ai_error_code(e),
             username=profile.username
-        )
+        ), None, 0, None
 
-    # Increment usage (counts as premium feature use)
-    rate_limiter.increment(client_id)
-
-    return DeepAnalysisResponse(
-        success=True,
-        result=build_deep_result(result),
-        username=profile.username,
-        post_count_analyzed=len(profile.post_images)
-    )
+    return None, profile.username, len(profile.post_images), result
 
 
 @router.post("/analyze-screenshots-deep", response_model=DeepAnalysisResponse)
@@ -349,10 +452,13 @@ async def analyze_screenshots_deep(
     request: Request,
     files: List[UploadFile] = File(...),
     language: str = "tr",
+    bypass_cache: bool = False,
     x_user_id: Optional[str] = Header(None, alias="X-User-ID"),
     settings: Settings = Depends(get_settings),
     ai_service: AIService = Depends(get_ai_service),
     rate_limiter: RateLimiter = Depends(get_rate_limiter),
+    image_store: ImageStore = Depends(get_image_store),
+    result_cache: ResultCache = Depends(get_result_cache),
 ):
     """
     Deep analysis using uploaded screenshots.
@@ -386,7 +492,7 @@ async def analyze_screenshots_deep(
     for file in files:
         content = await file.read()
         if len(content) > 1000:  # Basic validation
-            images.append(content)
+            images.append(await image_store.aput(content))
 
     if len(images) < 3:
         return DeepAnalysisResponse(
@@ -398,7 +504,8 @@ async def analyze_screenshots_deep(
 
     # Perform deep analysis
     try:
-        result = await ai_service.analyze_profile_deep(
+        result = await result_cache.analyze_profile_deep(
+            ai_service,
             images=images,
             captions=[],  # No captions from screenshots
             like_counts=[],
@@ -406,6 +513,7 @@ async def analyze_screenshots_deep(
             follower_count=0,
             bio="",
             language=language,
+            bypass=bypass_cache,
         )
     except NotImplementedError:
         return DeepAnalysisResponse(
@@ -419,7 +527,7 @@ async def analyze_screenshots_deep(
         return DeepAnalysisResponse(
             success=False,
             error=f"AI analizi başarısız: {str(e)}",
-            error_code="ai_error"
+            error_code=_ai_error_code(e)
         )
 
     # Increment usage
@@ -430,3 +538,272 @@ async def analyze_screenshots_deep(
         result=build_deep_result(result),
         post_count_analyzed=len(images)
     )
+
+
+# Streaming variants: NDJSON progress events, or SSE when the client sends
+# `Accept: text/event-stream`. Events, in order: scrape_done (Instagram
+# only), images_prepared, one field event per result field as soon as the
+# model has written it, then result (the body the non-streaming endpoint
+# would return) or error.
+
+def stream_response(request: Request, events: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """Send progress events as SSE or NDJSON, depending on the Accept header."""
+    sse = "text/event-stream" in request.headers.get("accept", "")
+
+    async def body():
+        async for event in events:
+            data = json.dumps(jsonable_encoder(event), ensure_ascii=False)
+            yield f"event: {event['event']}\ndata: {data}\n\n" if sse else f"{data}\n"
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _error_event(error: str, error_code: str, **extra: Any) -> Dict[str, Any]:
+    extra = {key: value for key, value in extra.items() if value is not None}
+    return {"event": "error", "error": error, "error_code": error_code, **extra}
+
+
+async def _single_event(event: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    yield event
+
+
+def _failure_event(failure: BaseModel) -> Dict[str, Any]:
+    """Error event carrying a non-streaming failure response's fields."""
+    return {"event": "error", **failure.model_dump(exclude={"success", "result"}, exclude_none=True)}
+
+
+async def _analysis_events(
+    events: AsyncIterator[Dict[str, Any]],
+    finish: Callable[[Dict[str, Any]], BaseModel],
+    rate_limiter: RateLimiter,
+    client_id: str,
+    username: Optional[str] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Forward model events; the final result is built into a response and counted."""
+    try:
+        async for event in events:
+            if event["event"] == "done":
+                rate_limiter.increment(client_id)
+                yield {"event": "result", "response": finish(event["result"])}
+            else:
+                yield event
+    except NotImplementedError:
+        yield _error_event("Derin analiz bu servis için desteklenmiyor", "not_implemented", username=username)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        yield _error_event(f"AI analizi başarısız: {str(e)}", _ai_error_code(e), username=username)
+
+
+@router.post("/analyze/stream")
+async def analyze_profile_stream(
+    request: Request,
+    image: UploadFile = File(...),
+    language: str = "tr",
+    roast_mode: bool = True,
+    bypass_cache: bool = False,
+    x_user_id: Optional[str] = Header(None, alias="X-User-ID"),
+    ai_service: AIService = Depends(get_ai_service),
+    rate_limiter: RateLimiter = Depends(get_rate_limiter),
+    image_store: ImageStore = Depends(get_image_store),
+    result_cache: ResultCache = Depends(get_result_cache),
+):
+    """
+    Streaming `/analyze`. The result event carries an AnalysisResult.
+    """
+    client_id = get_client_id(x_user_id, request)
+
+    if not rate_limiter.check_limit(client_id):
+        raise HTTPException(
+            status_code=429,
+            detail="Daily limit reached. Come back tomorrow!"
+        )
+
+    image_bytes = await image.read()
+
+    if len(image_bytes) > 10 * 1024 * 1024:  # 10MB limit
+        raise HTTPException(status_code=400, detail="Image too large (max 10MB)")
+
+    events = result_cache.stream_profile(
+        ai_service,
+        await image_store.aput(image_bytes),
+        language,
+        roast_mode=roast_mode,
+        bypass=bypass_cache,
+    )
+    return stream_response(request, _analysis_events(events, build_result, rate_limiter, client_id))
+
+
+@router.post("/analyze-instagram/stream")
+async def analyze_instagram_profile_stream(
+    request: Request,
+    body: InstagramAnalysisRequest,
+    x_user_id: Optional[str] = Header(None, alias="X-User-ID"),
+    ai_service: AIService = Depends(get_ai_service),
+    rate_limiter: RateLimiter = Depends(get_rate_limiter),
+    instagram: InstagramScraper = Depends(get_instagram_scraper),
+    result_cache: ResultCache = Depends(get_result_cache),
+):
+    """
+    Streaming `/analyze-instagram`. The result event carries an InstagramAnalysisResponse.
+    """
+    client_id = get_client_id(x_user_id, request)
+
+    async def events():
+        if not rate_limiter.check_limit(client_id):
+            yield _error_event("Günlük limit doldu. Yarın tekrar dene!", "rate_limit")
+            return
+
+        profile = await instagram.fetch_profile(body.url)
+        failure, image_to_analyze = _pick_instagram_image(profile)
+        if failure:
+            yield _failure_event(failure)
+            return
+        yield {"event": "scrape_done", "username": profile.username, "image_count": 1}
+
+        analysis = result_cache.stream_profile(
+            ai_service,
+            image_to_analyze,
+            body.language,
+            roast_mode=body.roast_mode,
+            bypass=body.bypass_cache,
+        )
+        async for event in _analysis_events(
+            analysis,
+            lambda result: InstagramAnalysisResponse(
+                success=True,
+                result=build_result(result),
+                username=profile.username,
+            ),
+            rate_limiter,
+            client_id,
+            username=profile.username,
+        ):
+            yield event
+
+    return stream_response(request, events())
+
+
+@router.post("/analyze-instagram-deep/stream")
+async def analyze_instagram_deep_stream(
+    request: Request,
+    body: DeepAnalysisRequest,
+    x_user_id: Optional[str] = Header(None, alias="X-User-ID"),
+    ai_service: AIService = Depends(get_ai_service),
+    rate_limiter: RateLimiter = Depends(get_rate_limiter),
+    instagram: InstagramScraper = Depends(get_instagram_scraper),
+    result_cache: ResultCache = Depends(get_result_cache),
+):
+    """
+    Streaming `/analyze-instagram-deep`. The result event carries a DeepAnalysisResponse.
+    """
+    client_id = get_client_id(x_user_id, request)
+
+    async def events():
+        if not rate_limiter.check_limit(client_id):
+            yield _error_event("Günlük limit doldu. Yarın tekrar dene!", "rate_limit")
+            return
+
+        profile = await instagram.fetch_profile_deep(body.url, max_posts=9)
+        failure = _deep_profile_failure(profile)
+        if failure:
+            yield _failure_event(failure)
+            return
+        post_count = len(profile.post_images)
+        yield {"event": "scrape_done", "username": profile.username, "image_count": post_count}
+
+        analysis = result_cache.stream_profile_deep(
+            ai_service,
+            images=profile.post_images,
+            captions=profile.post_captions,
+            like_counts=profile.post_like_counts,
+            comment_counts=profile.post_comment_counts,
+            follower_count=profile.follower_count or 0,
+            bio=profile.bio or "",
+            language=body.language,
+            bypass=body.bypass_cache,
+        )
+        async for event in _analysis_events(
+            analysis,
+            lambda result: DeepAnalysisResponse(
+                success=True,
+                result=build_deep_result(result),
+                username=profile.username,
+                post_count_analyzed=post_count,
+            ),
+            rate_limiter,
+            client_id,
+            username=profile.username,
+        ):
+            yield event
+
+    return stream_response(request, events())
+
+
+@router.post("/analyze-screenshots-deep/stream")
+async def analyze_screenshots_deep_stream(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    language: str = "tr",
+    bypass_cache: bool = False,
+    x_user_id: Optional[str] = Header(None, alias="X-User-ID"),
+    ai_service: AIService = Depends(get_ai_service),
+    rate_limiter: RateLimiter = Depends(get_rate_limiter),
+    image_store: ImageStore = Depends(get_image_store),
+    result_cache: ResultCache = Depends(get_result_cache),
+):
+    """
+    Streaming `/analyze-screenshots-deep`. The result event carries a DeepAnalysisResponse.
+    """
+    client_id = get_client_id(x_user_id, request)
+
+    if not rate_limiter.check_limit(client_id):
+        return stream_response(request, _single_event(_error_event("Günlük limit doldu. Yarın tekrar dene!", "rate_limit")))
+
+    if len(files) < 3:
+        return stream_response(request, _single_event(_error_event(
+            f"Derin analiz için en az 3 screenshot gerekli. {len(files)} dosya yüklendi.",
+            "insufficient_files",
+            post_count_analyzed=len(files),
+        )))
+
+    # Read image bytes (uploads must be read before the handler returns)
+    images = []
+    for file in files[:9]:
+        content = await file.read()
+        if len(content) > 1000:  # Basic validation
+            images.append(await image_store.aput(content))
+
+    if len(images) < 3:
+        return stream_response(request, _single_event(_error_event(
+            "Yüklenen dosyalar geçersiz veya çok küçük.",
+            "invalid_files",
+            post_count_analyzed=len(images),
+        )))
+
+    analysis = result_cache.stream_profile_deep(
+        ai_service,
+        images=images,
+        captions=[],  # No captions from screenshots
+        like_counts=[],
+        comment_counts=[],
+        follower_count=0,
+        bio="",
+        language=language,
+        bypass=bypass_cache,
+    )
+    return stream_response(request, _analysis_events(
+        analysis,
+        lambda result: DeepAnalysisResponse(
+            success=True,
+            result=build_deep_result(result),
+            post_count_analyzed=len(images),
+        ),
+        rate_limiter,
+        client_id,
+    ))
+
@@ -0,0 +1,365 @@
+import os
+import json
+import time
+import shutil
+import asyncio
+import tarfile
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.config import get_settings
+
+
+# Hidden temp entries (".<id>.tmp") older than this were left by a crash
+STALE_TEMP_SECONDS = 3600
+# Shared images are written just before their request is renamed into
+# place, so an unreferenced image younger than this may be about to be used
+IMAGE_GRACE_SECONDS = 60
+
+
+@dataclass
+class _Image:
+    """One file in the shared image directory."""
+    path: str
+    bytes: int
+    mtime: float
+
+
+@dataclass
+class _Entry:
+    """One bridge request id: its request directory and/or response file."""
+    request_id: str
+    state: str = "pending"
+    request_path: Optional[str] = None
+    response_path: Optional[str] = None
+    bytes: int = 0
+    mtime: float = 0.0
+    # Shared image file names its deep-request manifest references
+    images: List[str] = field(default_factory=list)
+
+    @property
+    def paths(self) -> List[str]:
+        return [path for path in (self.request_path, self.response_path) if path]
+
+
+def _path_bytes(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _manifest_images(request_path: str) -> List[str]:
+    """Shared image files a deep request's manifest references."""
+    try:
+        with open(os.path.join(request_path, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return [post["image"]["path"] for post in manifest.get("posts", []) if post.get("image")]
+
+
+def _remove(path: str) -> None:
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class BridgeJanitor:
+    """
+    Background retention for the bridge directories. Each sweep classifies
+    request ids as pending (no response yet), completed (response written)
+    or expired (no response after the bridge timeout, so nobody is waiting).
+    Completed and expired ids older than the retention age are removed,
+    oldest-first (expired before completed) while the total is over the
+    byte limit; pending requests are never touched. Removed entries can
+    be archived to a .tar.gz bundle first. Shared deep-request images count
+    toward the byte limit and are kept while any remaining request's
+    manifest references them; unreferenced ones go once past the
+    retention age (reuse touches them), or first under byte pressure.
+    """
+
+    def __init__(
+        self,
+        request_dir: str,
+        response_dir: str,
+        timeout_seconds: float = 300,
+        max_age_seconds: float = 86400,
+        max_bytes: int = 512 * 1024 * 1024,
+        interval_seconds: float = 300,
+        archive_dir: str = "",
+        image_dir: str = "",
+    ):
+        self.request_dir = request_dir
+        self.response_dir = response_dir
+        self.image_dir = image_dir
+        self.timeout_seconds = timeout_seconds
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self.interval_seconds = interval_seconds
+        self.archive_dir = archive_dir
+        self._task: Optional[asyncio.Task] = None
+        self.sweeps = 0
+        self.removed = 0
+        self.removed_bytes = 0
+        self.archived = 0
+        self.archives = 0
+        self.stale_temps = 0
+        self.removed_images = 0
+        self.errors = 0
+        self.last_sweep: Optional[str] = None
+        self.last_sweep_seconds = 0.0
+        self._snapshot: Dict[str, Dict[str, int]] = {}
+        self._images: Dict[str, int] = {"count": 0, "bytes": 0}
+
+    def _scan(self, now: float) -> List[_Entry]:
+        entries: Dict[str, _Entry] = {}
+
+        for directory, is_response in ((self.request_dir, False), (self.response_dir, True)):
+            if not os.path.isdir(directory):
+                continue
+            for item in os.scandir(directory):
+                try:
+                    mtime = item.stat().st_mtime
+                    if item.name.startswith("."):
+                        # Being written, or left behind by a crash
+                        if now - mtime > STALE_TEMP_SECONDS:
+                            _remove(item.path)
+                            self.stale_temps += 1
+                        continue
+                    if is_response:
+                        if not item.name.endswith(".json"):
+                            continue
+                        request_id = item.name[:-len(".json")]
+                    elif item.is_dir():
+                        request_id = item.name
+                    else:
+                        continue
+                    size = _path_bytes(item.path)
+                except FileNotFoundError:
+                    # Removed while scanning
+                    continue
+
+                entry = entries.setdefault(request_id, _Entry(request_id))
+                if is_response:
+                    entry.response_path = item.path
+                    entry.state = "completed"
+                else:
+                    entry.request_path = item.path
+                    entry.images = [os.path.basename(path) for path in _manifest_images(item.path)]
+                entry.bytes += size
+                entry.mtime = max(entry.mtime, mtime)
+
+        for entry in entries.values():
+            if entry.state == "pending" and now - entry.mtime > self.timeout_seconds:
+                entry.state = "expired"
+        return list(entries.values())
+
+    def _archive(self, entries: List[_Entry]) -> None:
+        os.makedirs(self.archive_dir, exist_ok=True)
+        name = f"bridge-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{len(entries)}.tar.gz"
+        path = os.path.join(self.archive_dir, name)
+        tmp_path = os.path.join(self.archive_dir, f".{name}.tmp")
+        images = set()
+        with tarfile.open(tmp_path, "w:gz") as bundle:
+            for entry in entries:
+                if entry.request_path:
+                    bundle.add(entry.request_path, arcname=f"requests/{entry.request_id}")
+                    for image_path in _manifest_images(entry.request_path):
+                        # Shared between requests; once per bundle
+                        if image_path not in images and os.path.exists(image_path):
+                            images.add(image_path)
+                            bundle.add(image_path, arcname=f"images/{os.path.basename(image_path)}")
+                if entry.response_path:
+                    bundle.add(entry.response_path, arcname=f"responses/{entry.request_id}.json")
+        os.replace(tmp_path, path)
+        self.archives += 1
+        self.archived += len(entries)
+        print(f"[BridgeJanitor] Archived {len(entries)} request(s) to {path}")
+
+    def _scan_images(self, now: float) -> Dict[str, _Image]:
+        """Shared image files by name; stale temp files are removed on the way."""
+        images: Dict[str, _Image] = {}
+        if not os.path.isdir(self.image_dir):
+            return images
+        for item in os.scandir(self.image_dir):
+            try:
+                stat = item.stat()
+            except FileNotFoundError:
+                continue
+            if item.name.startswith("."):
+                if now - stat.st_mtime > STALE_TEMP_SECONDS:
+                    _remove(item.path)
+                    self.stale_temps += 1
+                continue
+            images[item.name] = _Image(item.path, stat.st_size, stat.st_mtime)
+        return images
+
+    def sweep(self) -> Dict[str, Any]:
+        """One retention pass (blocking; the background loop runs it on a thread)."""
+        started = time.monotonic()
+        now = time.time()
+        entries = self._scan(now)
+        images = self._scan_images(now) if self.image_dir else {}
+
+        removable = [entry for entry in entries if entry.state != "pending"]
+        expired_by_age = {
+            entry.request_id for entry in removable
+            if self.max_age_seconds and now - entry.mtime > self.max_age_seconds
+        }
+        to_remove = [entry for entry in removable if entry.request_id in expired_by_age]
+
+        # Images stay while any remaining request references them
+        refs = Counter(
+            name for entry in entries if entry.request_id not in expired_by_age for name in entry.images
+        )
+
+        def unreferenced(name: str) -> bool:
+            return refs[name] == 0 and now - images[name].mtime > IMAGE_GRACE_SECONDS
+
+        # Reuse touches an image, so age counts from its last use
+        image_age_limit = max(self.max_age_seconds, self.timeout_seconds)
+        images_to_remove = [
+            name for name in images
+            if unreferenced(name) and self.max_age_seconds and now - images[name].mtime > image_age_limit
+        ]
+
+        if self.max_bytes:
+            removed_images = set(images_to_remove)
+            total = sum(entry.bytes for entry in entries if entry.request_id not in expired_by_age)
+            total += sum(image.bytes for name, image in images.items() if name not in removed_images)
+            # Unreferenced images go first (nothing needs them), oldest first
+            for name in sorted((n for n in images if n not in removed_images and unreferenced(n)),
+                               key=lambda n: images[n].mtime):
+                if total <= self.max_bytes:
+                    break
+                images_to_remove.append(name)
+                removed_images.add(name)
+                total -= images[name].bytes
+            # Then expired requests before completed ones, oldest first, each
+            # releasing the images no remaining request references
+            candidates = sorted(
+                (entry for entry in removable if entry.request_id not in expired_by_age),
+                key=lambda entry: (entry.state != "expired", entry.mtime),
+            )
+            for entry in candidates:
+                if total <= self.max_bytes:
+                    break
+                to_remove.append(entry)
+                total -= entry.bytes
+                for name in entry.images:
+                    refs[name] -= 1
+                    if name in images and name not in removed_images and unreferenced(name):
+                        images_to_remove.append(name)
+                        removed_images.add(name)
+                        total -= images[name].bytes
+
+        if to_remove:
+            if self.archive_dir:
+                self._archive(to_remove)
+            for entry in to_remove:
+                for path in entry.paths:
+                    _remove(path)
+            freed = sum(entry.bytes for entry in to_remove)
+            self.removed += len(to_remove)
+            self.removed_bytes += freed
+            print(f"[BridgeJanitor] Removed {len(to_remove)} request(s), {freed // 1024} KB")
+
+        if images_to_remove:
+            freed = 0
+            for name in images_to_remove:
+                _remove(images[name].path)
+                freed += images[name].bytes
+            self.removed_images += len(images_to_remove)
+            self.removed_bytes += freed
+            print(f"[BridgeJanitor] Removed {len(images_to_remove)} shared image(s), {freed // 1024} KB")
+
+        removed_ids = {entry.request_id for entry in to_remove}
+        snapshot = {state: {"count": 0, "bytes": 0} for state in ("pending", "completed", "expired")}
+        for entry in entries:
+            if entry.request_id not in removed_ids:
+                snapshot[entry.state]["count"] += 1
+                snapshot[entry.state]["bytes"] += entry.bytes
+        self._snapshot = snapshot
+        removed_names = set(images_to_remove)
+        kept = [image for name, image in images.items() if name not in removed_names]
+        self._images = {"count": len(kept), "bytes": sum(image.bytes for image in kept)}
+        self.sweeps += 1
+        self.last_sweep = datetime.now().isoformat()
+        self.last_sweep_seconds = time.monotonic() - started
+        return snapshot
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception as e:
+                self.errors += 1
+                print(f"[BridgeJanitor] Sweep failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        """Start the background sweep loop (called from the app lifespan)."""
+        if self._task is None and self.interval_seconds > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Directory contents as of the last sweep, plus removal counters."""
+        return {
+            "max_age_seconds": self.max_age_seconds,
+            "max_bytes": self.max_bytes,
+            "archive_dir": self.archive_dir or None,
+            "requests": self._snapshot,
+            "images": self._images,
+            "sweeps": self.sweeps,
+            "last_sweep": self.last_sweep,
+            "last_sweep_seconds": round(self.last_sweep_seconds, 3),
+            "removed": self.removed,
+            "removed_bytes": self.removed_bytes,
+            "archived": self.archived,
+            "archives": self.archives,
+            "removed_images": self.removed_images,
+            "stale_temps": self.stale_temps,
+            "errors": self.errors,
+        }
+
+
+# Singleton
+_bridge_janitor: Optional[BridgeJanitor] = None
+
+
+def get_bridge_janitor() -> BridgeJanitor:
+    global _bridge_janitor
+    if _bridge_janitor is None:
+        settings = get_settings()
+        _bridge_janitor = BridgeJanitor(
+            request_dir=settings.bridge_request_dir,
+            response_dir=settings.bridge_response_dir,
+            timeout_seconds=settings.bridge_timeout_seconds,
+            max_age_seconds=settings.bridge_retention_seconds,
+            max_bytes=settings.bridge_retention_max_mb * 1024 * 1024,
+            interval_seconds=settings.bridge_janitor_interval_seconds,
+            archive_dir=settings.bridge_archive_dir,
+            image_dir=settings.bridge_image_dir,
+        )
+    return _bridge_janitor
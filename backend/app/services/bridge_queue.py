@@ -0,0 +1,269 @@
+"""
+Lease-based work queue over the bridge request directory, so several
+consumers can drain bridge requests without doing the same one twice.
+
+Every change to a request's lease happens under an exclusive flock on
+its directory, so the read-decide-write steps below never interleave
+between consumers (or processes):
+
+- claim: with no lease (and no response yet), write `<request>/.lease`
+  naming the consumer, a token and an expiry. Busy directories are
+  skipped rather than waited on.
+- heartbeat: the holder rewrites its lease with a later expiry, after
+  checking the token is still its own.
+- abandoned work: an expired lease is replaced by the new consumer's,
+  with the attempt count carried over; after `max_attempts` the request
+  is failed instead of re-queued.
+- complete / fail: the holder writes `<response_dir>/<id>.json` and
+  drops its lease.
+
+Lease and response files are written through a temp name and rename, so
+`snapshot()` can read them without the lock. Requests older than the
+bridge timeout have nobody waiting for them and are not handed out.
+"""
+import os
+import json
+import time
+import uuid
+import fcntl
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Optional
+from app.config import get_settings
+
+
+LEASE_FILE = ".lease"
+
+
+class LeaseLostError(Exception):
+    """The lease expired and was taken over, or was never held."""
+
+
+@dataclass
+class Lease:
+    request_id: str
+    consumer: str
+    token: str
+    claimed_at: float
+    expires_at: float
+    attempt: int = 1
+
+
+def _write_json_atomic(path: str, data: Dict[str, Any]) -> None:
+    tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{uuid.uuid4().hex[:8]}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _read_lease(path: str) -> Optional[Lease]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return Lease(**json.load(f))
+    except FileNotFoundError:
+        return None
+    except (ValueError, TypeError):
+        # Not written by this protocol; treat it as long expired
+        return Lease(request_id="", consumer="?", token="", claimed_at=0, expires_at=0)
+
+
+def _created_at(entry: os.DirEntry) -> float:
+    """When a request was written; lease files change the directory's own mtime."""
+    try:
+        return os.stat(os.path.join(entry.path, "metadata.json")).st_mtime
+    except FileNotFoundError:
+        return entry.stat().st_mtime
+
+
+class BridgeQueue:
+    """Claims, heartbeats and completes bridge requests for consumers, and reports queue state."""
+
+    def __init__(
+        self,
+        request_dir: str,
+        response_dir: str,
+        lease_seconds: float = 120,
+        max_attempts: int = 3,
+        timeout_seconds: float = 300,
+    ):
+        self.request_dir = request_dir
+        self.response_dir = response_dir
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.timeout_seconds = timeout_seconds
+
+    def _lease_path(self, request_id: str) -> str:
+        return os.path.join(self.request_dir, request_id, LEASE_FILE)
+
+    def _response_path(self, request_id: str) -> str:
+        return os.path.join(self.response_dir, f"{request_id}.json")
+
+    def _requests(self) -> List[os.DirEntry]:
+        """Visible request directories, oldest first."""
+        if not os.path.isdir(self.request_dir):
+            return []
+        entries = [entry for entry in os.scandir(self.request_dir) if entry.is_dir() and not entry.name.startswith(".")]
+        return sorted(entries, key=_created_at)
+
+    @contextmanager
+    def _locked(self, request_id: str, wait: bool = True) -> Iterator[bool]:
+        """
+        Hold the request directory's exclusive lock. Yields False if the
+        directory is gone or, with wait=False, another consumer holds it.
+        """
+        try:
+            fd = os.open(os.path.join(self.request_dir, request_id), os.O_RDONLY)
+        except FileNotFoundError:
+            yield False
+            return
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            yield True
+        finally:
+            # Closing the descriptor releases the lock
+            os.close(fd)
+
+    def _new_lease(self, request_id: str, consumer: str, attempt: int) -> Lease:
+        now = time.time()
+        lease = Lease(request_id, consumer, uuid.uuid4().hex, now, now + self.lease_seconds, attempt)
+        _write_json_atomic(self._lease_path(request_id), asdict(lease))
+        return lease
+
+    def _try_claim(self, request_id: str, consumer: str) -> Optional[Lease]:
+        """Claim one request if it is free or abandoned; None if it isn't (or is busy)."""
+        with self._locked(request_id, wait=False) as locked:
+            if not locked:
+                return None
+            # Checked under the lock: complete() writes the response while holding it
+            if os.path.exists(self._response_path(request_id)):
+                return None
+            previous = _read_lease(self._lease_path(request_id))
+            if previous is None:
+                return self._new_lease(request_id, consumer, 1)
+            if previous.expires_at > time.time():
+                return None
+
+            attempt = previous.attempt + 1
+            print(f"[BridgeQueue] {request_id}: lease of {previous.consumer} expired, "
+                  f"attempt {attempt}/{self.max_attempts}")
+            if attempt > self.max_attempts:
+                self._write_response(request_id, {
+                    "bridge_error": f"Abandoned after {self.max_attempts} attempt(s)",
+                })
+                os.remove(self._lease_path(request_id))
+                return None
+            return self._new_lease(request_id, consumer, attempt)
+
+    def claim(self, consumer: str) -> Optional[Lease]:
+        """Lease the oldest unclaimed (or abandoned) request that someone is still waiting for."""
+        now = time.time()
+        for entry in self._requests():
+            request_id = entry.name
+            if now - _created_at(entry) > self.timeout_seconds:
+                continue
+            if os.path.exists(self._response_path(request_id)):
+                continue
+            lease = _read_lease(self._lease_path(request_id))
+            if lease is not None and lease.expires_at > now:
+                continue
+            lease = self._try_claim(request_id, consumer)
+            if lease:
+                print(f"[BridgeQueue] {request_id} claimed by {consumer} (attempt {lease.attempt})")
+                return lease
+        return None
+
+    def _check(self, request_id: str, token: str) -> Lease:
+        lease = _read_lease(self._lease_path(request_id))
+        if lease is None or lease.token != token:
+            raise LeaseLostError(f"Lease on {request_id} is no longer held")
+        return lease
+
+    def heartbeat(self, request_id: str, token: str) -> Lease:
+        """Extend a held lease; raises LeaseLostError if it was taken over."""
+        with self._locked(request_id):
+            lease = self._check(request_id, token)
+            lease.expires_at = time.time() + self.lease_seconds
+            _write_json_atomic(self._lease_path(request_id), asdict(lease))
+            return lease
+
+    def _write_response(self, request_id: str, result: Dict[str, Any]) -> None:
+        os.makedirs(self.response_dir, exist_ok=True)
+        _write_json_atomic(self._response_path(request_id), result)
+
+    def complete(self, request_id: str, token: str, result: Dict[str, Any]) -> None:
+        """Publish the result for a held request and drop the lease."""
+        with self._locked(request_id):
+            self._check(request_id, token)
+            self._write_response(request_id, result)
+            os.remove(self._lease_path(request_id))
+
+    def fail(self, request_id: str, token: str, error: str) -> None:
+        """Give up on a held request; the waiting API call fails with `error`."""
+        self.complete(request_id, token, {"bridge_error": error})
+
+    def release(self, request_id: str, token: str) -> None:
+        """Drop a held lease without a result, putting the request back in the queue."""
+        with self._locked(request_id):
+            try:
+                self._check(request_id, token)
+                os.remove(self._lease_path(request_id))
+            except (LeaseLostError, FileNotFoundError):
+                pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Every request with its queue state, plus counts per state."""
+        now = time.time()
+        items = []
+        counts = {"queued": 0, "claimed": 0, "abandoned": 0, "completed": 0, "stale": 0}
+        for entry in self._requests():
+            request_id = entry.name
+            age = now - _created_at(entry)
+            lease = _read_lease(self._lease_path(request_id))
+            item: Dict[str, Any] = {"request_id": request_id, "age_seconds": round(age, 1)}
+            if os.path.exists(self._response_path(request_id)):
+                state = "completed"
+            elif age > self.timeout_seconds:
+                state = "stale"
+            elif lease is None:
+                state = "queued"
+            elif lease.expires_at > now:
+                state = "claimed"
+            else:
+                state = "abandoned"
+            if lease is not None and state in ("claimed", "abandoned"):
+                item.update({
+                    "consumer": lease.consumer,
+                    "attempt": lease.attempt,
+                    "lease_remaining_seconds": round(lease.expires_at - now, 1),
+                })
+            item["state"] = state
+            counts[state] += 1
+            items.append(item)
+        return {
+            "lease_seconds": self.lease_seconds,
+            "max_attempts": self.max_attempts,
+            "counts": counts,
+            "requests": items,
+        }
+
+
+# Singleton
+_bridge_queue: Optional[BridgeQueue] = None
+
+
+def get_bridge_queue() -> BridgeQueue:
+    global _bridge_queue
+    if _bridge_queue is None:
+        settings = get_settings()
+        _bridge_queue = BridgeQueue(
+            request_dir=settings.bridge_request_dir,
+            response_dir=settings.bridge_response_dir,
+            lease_seconds=settings.bridge_lease_seconds,
+            max_attempts=settings.bridge_max_attempts,
+            timeout_seconds=settings.bridge_timeout_seconds,
+        )
+    return _bridge_queue
@@ -0,0 +1,212 @@
+import os
+import time
+import struct
+import asyncio
+import ctypes
+import ctypes.util
+import sys
+from typing import Any, Dict, List, Optional
+from app.config import get_settings
+
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Minimal inotify binding: one watch on one directory, read without blocking."""
+
+    def __init__(self, directory: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # Renamed into place (atomic writers) or closed after writing (direct writers)
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), IN_MOVED_TO | IN_CLOSE_WRITE)
+        if wd < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"inotify_add_watch failed for {directory}")
+
+    def read(self) -> Optional[List[str]]:
+        """Names of files that changed, or None if the kernel queue overflowed."""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names = []
+        overflow = False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+            elif name:
+                names.append(os.fsdecode(name))
+        return None if overflow else names
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def _inotify_available() -> bool:
+    return sys.platform.startswith("linux")
+
+
+class ResponseWatcher:
+    """
+    One watcher over the bridge response directory, shared by every
+    waiting request. Each waiter registers a future for its file name;
+    inotify events (or, without inotify, one polling loop) resolve the
+    futures as soon as the file is renamed or written into place.
+    """
+
+    def __init__(self, directory: str, mode: str = "auto", poll_interval: float = 0.25):
+        self.directory = directory
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.backend: Optional[str] = None
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._inotify: Optional[_Inotify] = None
+        self._poller: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.delivered = 0
+        self.timeouts = 0
+        self.events = 0
+        self.overflows = 0
+        self.total_delay_seconds = 0.0
+
+    def _start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self.backend is not None:
+            return
+        if self._loop is not None and self._loop is not loop:
+            # Started under another event loop (e.g. a previous asyncio.run)
+            self.close()
+        self._loop = loop
+        os.makedirs(self.directory, exist_ok=True)
+
+        if self.mode in ("auto", "inotify") and _inotify_available():
+            try:
+                self._inotify = _Inotify(self.directory)
+                loop.add_reader(self._inotify.fd, self._on_inotify)
+                self.backend = "inotify"
+            except (OSError, AttributeError, NotImplementedError) as e:
+                if self._inotify is not None:
+                    self._inotify.close()
+                    self._inotify = None
+                print(f"[BridgeWatcher] inotify unavailable ({e}), polling instead")
+        if self.backend is None:
+            self._poller = loop.create_task(self._poll())
+            self.backend = "poll"
+        print(f"[BridgeWatcher] Watching {self.directory} ({self.backend})")
+
+    def _on_inotify(self) -> None:
+        names = self._inotify.read()
+        if names is None:
+            # Events were dropped; check every pending file directly
+            self.overflows += 1
+            names = list(self._waiters)
+        self.events += len(names)
+        for name in names:
+            self._resolve(name)
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if not self._waiters:
+                continue
+            try:
+                present = {entry.name for entry in os.scandir(self.directory)}
+            except FileNotFoundError:
+                continue
+            for name in present.intersection(self._waiters):
+                self.events += 1
+                self._resolve(name)
+
+    def _resolve(self, name: str) -> None:
+        for future in self._waiters.pop(name, []):
+            if not future.done():
+                future.set_result(os.path.join(self.directory, name))
+
+    async def wait(self, name: str, timeout: float) -> str:
+        """Wait until `name` exists in the directory; returns its path."""
+        self._start()
+        path = os.path.join(self.directory, name)
+        future = self._loop.create_future()
+        self._waiters.setdefault(name, []).append(future)
+        started = time.monotonic()
+        # The file may have landed before the waiter was registered
+        if os.path.exists(path):
+            self._resolve(name)
+
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waiters = self._waiters.get(name)
+            if waiters and future in waiters:
+                waiters.remove(future)
+                if not waiters:
+                    del self._waiters[name]
+
+        self.delivered += 1
+        self.total_delay_seconds += time.monotonic() - started
+        return path
+
+    def close(self) -> None:
+        """Stop watching; pending waiters keep waiting until their timeout."""
+        # The loop may already be closed at shutdown
+        if self._inotify is not None:
+            try:
+                self._loop.remove_reader(self._inotify.fd)
+            except RuntimeError:
+                pass
+            self._inotify.close()
+            self._inotify = None
+        if self._poller is not None:
+            try:
+                self._poller.cancel()
+            except RuntimeError:
+                pass
+            self._poller = None
+        self.backend = None
+
+    def stats(self) -> Dict[str, Any]:
+        delivered = self.delivered
+        return {
+            "directory": self.directory,
+            "backend": self.backend or "idle",
+            "waiting": sum(len(waiters) for waiters in self._waiters.values()),
+            "delivered": delivered,
+            "timeouts": self.timeouts,
+            "events": self.events,
+            "overflows": self.overflows,
+            "avg_wait_seconds": round(self.total_delay_seconds / delivered, 3) if delivered else 0.0,
+        }
+
+
+# Singleton
+_response_watcher: Optional[ResponseWatcher] = None
+
+
+def get_response_watcher() -> ResponseWatcher:
+    global _response_watcher
+    if _response_watcher is None:
+        settings = get_settings()
+        _response_watcher = ResponseWatcher(
+            directory=settings.bridge_response_dir,
+            mode=settings.bridge_watch_mode,
+            poll_interval=settings.bridge_poll_interval_seconds,
+        )
+    return _response_watcher
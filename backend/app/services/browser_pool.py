@@ -0,0 +1,300 @@
+import os
+import time
+import asyncio
+import importlib.util
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from app.config import get_settings
+
+
+BROWSER_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-accelerated-2d-canvas',
+    '--disable-gpu',
+]
+
+
+def _is_chromium(comm: str) -> bool:
+    return "chrom" in comm or "headless" in comm
+
+
+def _browser_rss_mb() -> Optional[float]:
+    """
+    Resident memory of the Chromium process trees spawned under this
+    process (Linux only; blocking, so it runs on a thread). Other
+    descendants, such as the Playwright driver or CPU executor workers,
+    are not counted.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+
+    children: Dict[int, List[int]] = {}
+    comms: Dict[int, str] = {}
+    rss_pages: Dict[int, int] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        pid = int(entry)
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                head, tail = f.read().rsplit(")", 1)
+            with open(f"/proc/{entry}/statm") as f:
+                rss_pages[pid] = int(f.read().split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        comms[pid] = head.split("(", 1)[-1]
+        children.setdefault(int(tail.split()[1]), []).append(pid)
+
+    total = 0
+    # Walk our descendants; the first Chromium process on each branch roots a browser tree
+    stack = [(pid, False) for pid in children.get(os.getpid(), [])]
+    while stack:
+        pid, in_browser = stack.pop()
+        in_browser = in_browser or _is_chromium(comms.get(pid, ""))
+        if in_browser:
+            total += rss_pages.get(pid, 0)
+        stack.extend((child, in_browser) for child in children.get(pid, []))
+
+    return total * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+@dataclass
+class _BrowserSlot:
+    browser: Any
+    idle: List[Tuple[Any, Any]] = field(default_factory=list)  # (context, page)
+    active: int = 0
+    navigations: int = 0
+    retiring: bool = False
+
+
+class BrowserPool:
+    """
+    Process-wide pool of warm headless Chromium browsers.
+    Contexts and pages are reused between requests; browsers are recycled
+    after a number of navigations or when browser memory gets too high.
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        max_pages: int = 4,
+        max_navigations: int = 50,
+        max_memory_mb: int = 1024,
+        memory_check_seconds: float = 10.0,
+    ):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_navigations = max_navigations
+        self.max_memory_mb = max_memory_mb
+        self.memory_check_seconds = memory_check_seconds
+        self._memory_mb: Optional[float] = None
+        self._memory_checked = 0.0
+        self._memory_sample: Optional[asyncio.Task] = None
+        self._playwright = None
+        self._slots: List[_BrowserSlot] = []
+        self._semaphore = asyncio.Semaphore(max_pages)
+        self._lock = asyncio.Lock()
+        self.total_launches = 0
+        self.total_recycles = 0
+        self.total_pages = 0
+        self.waiting = 0
+
+    @property
+    def available(self) -> bool:
+        return importlib.util.find_spec("playwright") is not None
+
+    async def start(self) -> None:
+        """Pre-warm the pool (called from the app lifespan)."""
+        if not self.available:
+            print("[BrowserPool] Playwright not installed, pool disabled")
+            return
+        try:
+            async with self._lock:
+                while len(self._slots) < self.size:
+                    await self._launch()
+            print(f"[BrowserPool] Pre-warmed {len(self._slots)} browser(s)")
+        except Exception as e:
+            print(f"[BrowserPool] Pre-warm failed: {e}")
+
+    async def close(self) -> None:
+        """Close every browser and stop Playwright."""
+        async with self._lock:
+            for slot in self._slots:
+                await self._close_slot(slot)
+            self._slots = []
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+        print("[BrowserPool] Closed")
+
+    @asynccontextmanager
+    async def page(self, user_agent: Optional[str] = None) -> AsyncIterator[Any]:
+        """
+        Borrow a warm page; it is cleaned and returned to the pool afterwards.
+        `user_agent` only applies when a new context has to be created.
+        """
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        try:
+            slot, context, page = await self._checkout(user_agent)
+            healthy = True
+            try:
+                yield page
+            except BaseException:
+                healthy = False
+                raise
+            finally:
+                await self._checkin(slot, context, page, healthy)
+        finally:
+            self._semaphore.release()
+
+    async def _launch(self) -> _BrowserSlot:
+        if self._playwright is None:
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
+
+        browser = await self._playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+        slot = _BrowserSlot(browser=browser)
+        self._slots.append(slot)
+        self.total_launches += 1
+        print(f"[BrowserPool] Launched browser #{self.total_launches}")
+        return slot
+
+    async def _browser_memory_mb(self) -> Optional[float]:
+        """Browser memory, re-sampled on a thread at most every `memory_check_seconds`."""
+        if time.monotonic() - self._memory_checked < self.memory_check_seconds:
+            return self._memory_mb
+        # Concurrent check-ins share one sample
+        if self._memory_sample is None or self._memory_sample.done():
+            self._memory_sample = asyncio.ensure_future(asyncio.to_thread(_browser_rss_mb))
+        self._memory_mb = await asyncio.shield(self._memory_sample)
+        self._memory_checked = time.monotonic()
+        return self._memory_mb
+
+    async def _checkout(self, user_agent: Optional[str]) -> Tuple[_BrowserSlot, Any, Any]:
+        async with self._lock:
+            live = [slot for slot in self._slots if not slot.retiring]
+            if len(live) < self.size:
+                slot = await self._launch()
+            else:
+                slot = min(live, key=lambda s: s.active)
+            slot.active += 1
+
+        try:
+            if slot.idle:
+                context, page = slot.idle.pop()
+            else:
+                # Create context with realistic settings
+                context = await slot.browser.new_context(
+                    viewport={'width': 1920, 'height': 1080},
+                    user_agent=user_agent,
+                    locale='en-US',
+                    timezone_id='America/New_York',
+                )
+                page = await context.new_page()
+        except BaseException:
+            slot.active -= 1
+            slot.retiring = True
+            await self._retire_if_idle(slot)
+            raise
+
+        self.total_pages += 1
+        return slot, context, page
+
+    async def _checkin(self, slot: _BrowserSlot, context: Any, page: Any, healthy: bool) -> None:
+        slot.active -= 1
+        slot.navigations += 1
+
+        reused = False
+        if healthy and not slot.retiring:
+            try:
+                # Reset state so the next request starts clean
+                await context.clear_cookies()
+                await page.goto("about:blank", timeout=5000)
+                slot.idle.append((context, page))
+                reused = True
+            except Exception as e:
+                print(f"[BrowserPool] Page reset failed, dropping context: {e}")
+        if not reused:
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+        if not slot.retiring:
+            if slot.navigations >= self.max_navigations:
+                print(f"[BrowserPool] Recycling browser after {slot.navigations} navigations")
+                slot.retiring = True
+            else:
+                rss_mb = await self._browser_memory_mb()
+                if rss_mb is not None and rss_mb > self.max_memory_mb:
+                    print(f"[BrowserPool] Recycling browser, memory at {rss_mb:.0f} MB")
+                    slot.retiring = True
+
+        await self._retire_if_idle(slot)
+
+    async def _retire_if_idle(self, slot: _BrowserSlot) -> None:
+        if not slot.retiring or slot.active > 0:
+            return
+        async with self._lock:
+            if slot in self._slots:
+                self._slots.remove(slot)
+                self.total_recycles += 1
+        await self._close_slot(slot)
+
+    async def _close_slot(self, slot: _BrowserSlot) -> None:
+        for context, _ in slot.idle:
+            try:
+                await context.close()
+            except Exception:
+                pass
+        slot.idle = []
+        try:
+            await slot.browser.close()
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size, page usage and recycling counters; memory is the last sample."""
+        rss_mb = self._memory_mb
+        return {
+            "available": self.available,
+            "size": self.size,
+            "max_pages": self.max_pages,
+            "max_navigations": self.max_navigations,
+            "max_memory_mb": self.max_memory_mb,
+            "browsers": len(self._slots),
+            "active_pages": sum(slot.active for slot in self._slots),
+            "idle_pages": sum(len(slot.idle) for slot in self._slots),
+            "waiting": self.waiting,
+            "memory_mb": round(rss_mb, 1) if rss_mb is not None else None,
+            "total_launches": self.total_launches,
+            "total_recycles": self.total_recycles,
+            "total_pages": self.total_pages,
+            "navigations": [slot.navigations for slot in self._slots],
+        }
+
+
+# Singleton
+_browser_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    global _browser_pool
+    if _browser_pool is None:
+        settings = get_settings()
+        _browser_pool = BrowserPool(
+            size=settings.browser_pool_size,
+            max_pages=settings.browser_pool_max_pages,
+            max_navigations=settings.browser_pool_max_navigations,
+            max_memory_mb=settings.browser_pool_max_memory_mb,
+            memory_check_seconds=settings.browser_pool_memory_check_seconds,
+        )
+    return _browser_pool
@@ -0,0 +1,424 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+import aiofiles
+from app.services.ai_service import AIService, ClaudeAPIService
+from app.services.image_store import ImageStore
+from app.services.prompts import PROMPT_VERSION
+
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
+# Max 9 images per deep analysis, as in the API
+MAX_DEEP_IMAGES = 9
+# Provider limit is 256 MB per batch; leave room for the JSON around the images
+MAX_BATCH_BYTES = 200 * 1024 * 1024
+
+
+@dataclass
+class BulkItem:
+    """One analysis to run: a single image, or up to 9 for a deep analysis."""
+    id: str
+    kind: str
+    images: List[str]
+    language: str = "tr"
+    roast_mode: bool = True
+    captions: List[str] = field(default_factory=list)
+    like_counts: List[int] = field(default_factory=list)
+    comment_counts: List[int] = field(default_factory=list)
+    follower_count: int = 0
+    bio: str = ""
+
+
+def _is_image(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS
+
+
+def scan_directory(root: str, language: str, roast_mode: bool) -> List[BulkItem]:
+    """
+    Image files directly under `root` become profile analyses; each
+    subdirectory of images becomes one deep analysis, like a set of
+    uploaded screenshots.
+    """
+    items = []
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if os.path.isfile(path) and _is_image(path):
+            items.append(BulkItem(id=name, kind="profile", images=[path], language=language, roast_mode=roast_mode))
+        elif os.path.isdir(path):
+            images = sorted(
+                os.path.join(path, child) for child in os.listdir(path)
+                if _is_image(child) and os.path.isfile(os.path.join(path, child))
+            )
+            if images:
+                items.append(BulkItem(id=name, kind="deep", images=images[:MAX_DEEP_IMAGES], language=language))
+    return items
+
+
+def read_manifest(path: str, language: str, roast_mode: bool) -> List[BulkItem]:
+    """
+    A JSON list or NDJSON file of entries like
+    `{"id": ..., "image": "a.jpg"}` or `{"images": [...], "kind": "deep", "bio": ...}`.
+    Relative image paths are resolved against the manifest's directory.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        entries = json.loads(stripped)
+    else:
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    items = []
+    for number, entry in enumerate(entries, 1):
+        images = entry.get("images") or ([entry["image"]] if entry.get("image") else [])
+        if not images:
+            raise ValueError(f"Manifest entry {number} has no image")
+        images = [image if os.path.isabs(image) else os.path.join(base, image) for image in images]
+        kind = entry.get("kind") or ("deep" if len(images) > 1 else "profile")
+        if kind not in ("profile", "deep"):
+            raise ValueError(f"Manifest entry {number} has unknown kind {kind!r}")
+        items.append(BulkItem(
+            id=str(entry.get("id") or os.path.relpath(images[0], base)),
+            kind=kind,
+            images=images[:MAX_DEEP_IMAGES] if kind == "deep" else images[:1],
+            language=entry.get("language", language),
+            roast_mode=entry.get("roast_mode", roast_mode),
+            captions=entry.get("captions", []),
+            like_counts=entry.get("like_counts", []),
+            comment_counts=entry.get("comment_counts", []),
+            follower_count=entry.get("follower_count", 0),
+            bio=entry.get("bio", ""),
+        ))
+
+    ids = [item.id for item in items]
+    if len(set(ids)) != len(ids):
+        raise ValueError("Manifest ids must be unique")
+    return items
+
+
+def load_items(source: str, language: str = "tr", roast_mode: bool = True) -> List[BulkItem]:
+    """Items from a directory of images or a manifest file."""
+    if os.path.isdir(source):
+        return scan_directory(source, language, roast_mode)
+    return read_manifest(source, language, roast_mode)
+
+
+def _request_bytes(params: Dict[str, Any]) -> int:
+    """Rough encoded size of a request, dominated by its base64 images."""
+    size = 16 * 1024
+    for message in params.get("messages", []):
+        for block in message.get("content", []):
+            if block.get("type") == "image":
+                size += len(block["source"]["data"])
+    return size
+
+
+def _ends_mid_line(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return False
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+
+def custom_id(item_id: str) -> str:
+    """Message batch custom_id for an item (1-64 chars of [A-Za-z0-9_-])."""
+    return "item_" + hashlib.sha256(item_id.encode("utf-8")).hexdigest()[:40]
+
+
+class JobCheckpoint:
+    """
+    Progress of a job, kept next to its NDJSON output. The output is
+    append-only and flushed per record, so on restart the items already
+    written under the current prompt version are skipped. Provider
+    batches that were submitted but not collected are kept in
+    `<output>.batches.json` so a restart picks them up instead of
+    submitting them again.
+    """
+
+    def __init__(self, output_path: str, prompt_version: str = PROMPT_VERSION, retry_failed: bool = True):
+        self.output_path = output_path
+        self.state_path = output_path + ".batches.json"
+        self.prompt_version = prompt_version
+        self.retry_failed = retry_failed
+        self.done: Set[str] = set()
+        self.batches: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._file = None
+
+    def load(self) -> None:
+        if os.path.exists(self.output_path):
+            with open(self.output_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A line cut off by a crash; that item runs again
+                        continue
+                    if record.get("prompt_version") != self.prompt_version:
+                        continue
+                    if record.get("status") == "ok" or not self.retry_failed:
+                        self.done.add(record["id"])
+        if os.path.exists(self.state_path):
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                self.batches = json.load(f).get("batches", {})
+        if self.done or self.batches:
+            print(f"[BulkJob] Resuming: {len(self.done)} done, {len(self.batches)} batch(es) pending")
+
+    def pending(self, items: Iterable[BulkItem]) -> List[BulkItem]:
+        """Items not yet done and not waiting in a submitted batch."""
+        submitted = {entry["id"] for batch in self.batches.values() for entry in batch.values()}
+        return [item for item in items if item.id not in self.done and item.id not in submitted]
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self._file is None:
+            self._file = open(self.output_path, "a", encoding="utf-8")
+            if _ends_mid_line(self.output_path):
+                # Don't append onto a line cut off by a crash
+                self._file.write("\n")
+        record["prompt_version"] = self.prompt_version
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        if record.get("status") == "ok" or not self.retry_failed:
+            self.done.add(record["id"])
+
+    def save_batches(self) -> None:
+        if not self.batches:
+            if os.path.exists(self.state_path):
+                os.remove(self.state_path)
+            return
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"batches": self.batches}, f)
+        os.replace(tmp_path, self.state_path)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class BulkAnalysisJob:
+    """
+    Runs stored images through an AIService with bounded concurrency,
+    writing one NDJSON record per item. With a ClaudeAPIService it can
+    instead submit the work as provider message batches and collect them.
+    """
+
+    def __init__(
+        self,
+        service: AIService,
+        image_store: ImageStore,
+        checkpoint: JobCheckpoint,
+        concurrency: int = 4,
+        progress_seconds: float = 10.0,
+    ):
+        self.service = service
+        self.image_store = image_store
+        self.checkpoint = checkpoint
+        self.concurrency = max(1, concurrency)
+        self.progress_seconds = progress_seconds
+        self.total = 0
+        self.completed = 0
+        self.failed = 0
+        self._started = 0.0
+        self._last_progress = 0.0
+
+    async def _load_images(self, item: BulkItem) -> list:
+        images = []
+        for path in item.images:
+            async with aiofiles.open(path, "rb") as f:
+                images.append(await self.image_store.aput(await f.read()))
+        return images
+
+    def _record(self, item_id: str, kind: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None, **extra: Any) -> None:
+        record = {"id": item_id, "kind": kind, "status": "ok" if error is None else "error"}
+        if error is None:
+            record["result"] = result
+        else:
+            record["error"] = error
+            self.failed += 1
+        record.update(extra)
+        record["finished_at"] = datetime.now().isoformat()
+        self.checkpoint.write(record)
+        self.completed += 1
+        self._report_progress()
+
+    def _report_progress(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_progress < self.progress_seconds:
+            return
+        self._last_progress = now
+        elapsed = max(now - self._started, 1e-6)
+        print(f"[BulkJob] {self.completed}/{self.total} done ({self.failed} failed), "
+              f"{self.completed / elapsed:.2f}/s")
+
+    def _start(self, items: List[BulkItem]) -> List[BulkItem]:
+        self.checkpoint.load()
+        todo = self.checkpoint.pending(items)
+        self.total = len(todo)
+        self._started = self._last_progress = time.monotonic()
+        print(f"[BulkJob] {len(items)} item(s), {len(todo)} to run")
+        return todo
+
+    async def _analyze(self, item: BulkItem) -> Dict[str, Any]:
+        images = await self._load_images(item)
+        if item.kind == "deep":
+            return await self.service.analyze_profile_deep(
+                images=images,
+                captions=item.captions,
+                like_counts=item.like_counts,
+                comment_counts=item.comment_counts,
+                follower_count=item.follower_count,
+                bio=item.bio,
+                language=item.language,
+            )
+        return await self.service.analyze_profile(images[0], item.language, roast_mode=item.roast_mode)
+
+    async def run(self, items: List[BulkItem]) -> Dict[str, Any]:
+        """Analyze items directly through the service, `concurrency` at a time."""
+        todo = iter(self._start(items))
+
+        async def worker():
+            for item in todo:
+                started = time.monotonic()
+                try:
+                    result = await self._analyze(item)
+                except Exception as e:
+                    print(f"[BulkJob] {item.id} failed: {type(e).__name__}: {e}")
+                    self._record(item.id, item.kind, error=f"{type(e).__name__}: {e}")
+                else:
+                    self._record(item.id, item.kind, result, elapsed_seconds=round(time.monotonic() - started, 3))
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        finally:
+            self.checkpoint.close()
+        return self.summary()
+
+    # -- provider batch mode --
+
+    async def _batch_request(self, item: BulkItem) -> Dict[str, Any]:
+        """Batch request for an item, plus what's needed to parse its result."""
+        service: ClaudeAPIService = self.service
+        images = await self._load_images(item)
+        engagement_rate = 0.0
+        if item.kind == "deep":
+            params, engagement_rate = await service.deep_request(
+                images, item.captions, item.like_counts, item.comment_counts,
+                item.follower_count, item.bio, item.language,
+            )
+        else:
+            params = await service.profile_request(images[0], item.language, roast_mode=item.roast_mode)
+        return {
+            "request": {"custom_id": custom_id(item.id), "params": params},
+            "entry": {"id": item.id, "kind": item.kind, "engagement_rate": engagement_rate},
+        }
+
+    async def _submit(self, chunk: List[BulkItem]) -> None:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def build(item: BulkItem):
+            async with semaphore:
+                try:
+                    return await self._batch_request(item)
+                except Exception as e:
+                    self._record(item.id, item.kind, error=f"{type(e).__name__}: {e}")
+                    return None
+
+        built = [entry for entry in await asyncio.gather(*(build(item) for item in chunk)) if entry]
+
+        # Split further if the images would push a batch over the size limit
+        group, group_bytes = [], 0
+        for entry in built:
+            size = _request_bytes(entry["request"]["params"])
+            if group and group_bytes + size > MAX_BATCH_BYTES:
+                await self._create(group)
+                group, group_bytes = [], 0
+            group.append(entry)
+            group_bytes += size
+        if group:
+            await self._create(group)
+
+    async def _create(self, built: List[Dict[str, Any]]) -> None:
+        batch = await self.service.create_batch([entry["request"] for entry in built])
+        self.checkpoint.batches[batch["id"]] = {entry["request"]["custom_id"]: entry["entry"] for entry in built}
+        self.checkpoint.save_batches()
+        print(f"[BulkJob] Submitted batch {batch['id']} ({len(built)} request(s))")
+
+    async def _collect(self, batch_id: str, poll_seconds: float) -> None:
+        service: ClaudeAPIService = self.service
+        while True:
+            batch = await service.get_batch(batch_id)
+            if batch.get("processing_status") == "ended":
+                break
+            counts = batch.get("request_counts", {})
+            print(f"[BulkJob] Batch {batch_id}: {batch.get('processing_status')} {counts}")
+            await asyncio.sleep(poll_seconds)
+
+        entries = self.checkpoint.batches[batch_id]
+        for line in await service.batch_results(batch):
+            entry = entries.pop(line.get("custom_id"), None)
+            # Skip results recorded before an interrupted collection
+            if entry is None or entry["id"] in self.checkpoint.done:
+                continue
+            result = line.get("result", {})
+            if result.get("type") != "succeeded":
+                error = result.get("error", {}).get("error", result.get("error")) or result.get("type")
+                self._record(entry["id"], entry["kind"], error=f"batch {result.get('type')}: {error}", batch_id=batch_id)
+                continue
+            try:
+                text = result["message"]["content"][0]["text"]
+                if entry["kind"] == "deep":
+                    parsed = service.parse_deep(text, entry["engagement_rate"])
+                else:
+                    parsed = service.parse_profile(text)
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                # One malformed result line fails its item, not the whole batch
+                self._record(entry["id"], entry["kind"], error=f"{type(e).__name__}: {e}", batch_id=batch_id)
+            else:
+                self._record(entry["id"], entry["kind"], parsed, batch_id=batch_id)
+        for entry in entries.values():
+            if entry["id"] not in self.checkpoint.done:
+                self._record(entry["id"], entry["kind"], error="batch result missing", batch_id=batch_id)
+
+        del self.checkpoint.batches[batch_id]
+        self.checkpoint.save_batches()
+
+    async def run_batches(self, items: List[BulkItem], batch_size: int = 100, poll_seconds: float = 30.0) -> Dict[str, Any]:
+        """Submit items as provider message batches, then wait for and record the results."""
+        if not isinstance(self.service, ClaudeAPIService):
+            raise ValueError("Batch mode needs the Claude API service")
+        todo = self._start(items)
+        self.total += sum(
+            1
+            for batch in self.checkpoint.batches.values()
+            for entry in batch.values()
+            if entry["id"] not in self.checkpoint.done
+        )
+        try:
+            for start in range(0, len(todo), batch_size):
+                await self._submit(todo[start:start + batch_size])
+            await asyncio.gather(*(
+                self._collect(batch_id, poll_seconds) for batch_id in list(self.checkpoint.batches)
+            ))
+        finally:
+            self.checkpoint.close()
+        return self.summary()
+
+    def summary(self) -> Dict[str, Any]:
+        self._report_progress(force=True)
+        return {
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "seconds": round(time.monotonic() - self._started, 1),
+            "output": self.checkpoint.output_path,
+        }
@@ -0,0 +1,133 @@
+import asyncio
+import time
+from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+from app.config import get_settings
+
+
+T = TypeVar("T")
+
+
+def _timed_call(fn: Callable[..., T], args: Tuple[Any, ...], submitted_at: float) -> Tuple[T, float, float]:
+    """
+    Runs in the worker: returns (result, queue seconds, run seconds).
+    Wall-clock time is used for the queue measurement so it also holds
+    across processes.
+    """
+    started_at = time.time()
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, max(0.0, started_at - submitted_at), time.perf_counter() - started
+
+
+class _LabelStats:
+    """Queue and run time counters for one kind of offloaded work."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_queue_seconds = 0.0
+        self.max_queue_seconds = 0.0
+        self.total_run_seconds = 0.0
+        self.max_run_seconds = 0.0
+
+    def record(self, queue_seconds: float, run_seconds: float) -> None:
+        self.calls += 1
+        self.total_queue_seconds += queue_seconds
+        self.max_queue_seconds = max(self.max_queue_seconds, queue_seconds)
+        self.total_run_seconds += run_seconds
+        self.max_run_seconds = max(self.max_run_seconds, run_seconds)
+
+    def as_dict(self) -> Dict[str, Any]:
+        calls = self.calls
+        return {
+            "calls": calls,
+            "errors": self.errors,
+            "avg_queue_seconds": round(self.total_queue_seconds / calls, 4) if calls else 0.0,
+            "max_queue_seconds": round(self.max_queue_seconds, 4),
+            "avg_run_seconds": round(self.total_run_seconds / calls, 4) if calls else 0.0,
+            "max_run_seconds": round(self.max_run_seconds, 4),
+        }
+
+
+class CpuExecutor:
+    """
+    Runs CPU-heavy steps (image normalization, base64, JSON encoding,
+    HTML extraction) on a thread or process pool so they don't stall
+    the event loop. Every call records its queue time and run time.
+    In process mode, callables and their arguments must be picklable.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 4, slow_seconds: float = 0.5):
+        self.kind = "process" if kind == "process" else "thread"
+        self.max_workers = max_workers
+        self.slow_seconds = slow_seconds
+        self._executor: Optional[Executor] = None
+        self._labels: Dict[str, _LabelStats] = defaultdict(_LabelStats)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    @property
+    def executor(self) -> Executor:
+        """The worker pool; created lazily on first use."""
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cpu")
+        return self._executor
+
+    async def run(self, label: str, fn: Callable[..., T], *args: Any) -> T:
+        """Run `fn(*args)` on the pool and await its result."""
+        stats = self._labels[label]
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            result, queue_seconds, run_seconds = await loop.run_in_executor(
+                self.executor, _timed_call, fn, args, time.time()
+            )
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+        stats.record(queue_seconds, run_seconds)
+        if queue_seconds + run_seconds > self.slow_seconds:
+            print(f"[CpuExecutor] {label}: queued {queue_seconds:.3f}s, ran {run_seconds:.3f}s")
+        return result
+
+    def close(self) -> None:
+        """Shut the pool down (called from the app lifespan)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            print(f"[CpuExecutor] {self.kind} pool closed")
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool config and per-label queue/run time."""
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "labels": {label: stats.as_dict() for label, stats in sorted(self._labels.items())},
+        }
+
+
+# Singleton
+_cpu_executor: Optional[CpuExecutor] = None
+
+
+def get_cpu_executor() -> CpuExecutor:
+    global _cpu_executor
+    if _cpu_executor is None:
+        settings = get_settings()
+        _cpu_executor = CpuExecutor(
+            kind=settings.cpu_executor_kind,
+            max_workers=settings.cpu_executor_workers,
+            slow_seconds=settings.cpu_executor_slow_seconds,
+        )
+    return _cpu_executor
@@ -0,0 +1,239 @@
+import re
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Pass 1: every JSON field of interest. All branches share the leading
+# quote, which keeps sre on its fast literal-prefix search.
+_JSON_FIELD = re.compile(
+    r'"(display_url|thumbnail_src|profile_pic_url_hd|profile_pic_url|profilePicUrl'
+    r'|src|url|contentUrl|image|user_id|is_private|edge_media_to_caption|ProfilePage)"\s*:\s*'
+)
+_JSON_STRING = re.compile(r'"([^"]*)"')
+_CAPTION = re.compile(r'\{"edges":\[\{"node":\{"text":"([^"]+)"')
+
+# Pass 2: the handful of tags we care about, then their attributes
+_TAG = re.compile(r'<(meta|img|source|script)\b[^>]*>')
+_ATTR = re.compile(r'([a-z]+)="([^"]*)"')
+
+_PAGE_ID = re.compile(r'profilePage_(\d+)')
+_SHARED_DATA = re.compile(r'window\._sharedData\s*=\s*')
+
+# Last-resort sweep for anything that looks like an image URL
+_ANY_IMAGE_URL = re.compile(r'https://[^"<>\s]+\.(?:jpg|jpeg|png|webp)')
+
+_FOLLOWERS = re.compile(r'([\d,KMB.]+)\s*Follower', re.IGNORECASE)
+_DESC_BIO = re.compile(r'Posts?\s*[-–]\s*(.+)$')
+_TITLE_NAME = re.compile(r'^([^(@]+)')
+_TITLE_SUFFIX = re.compile(r'\s*[•\|@].*$')
+
+CDN_HOSTS = ("cdninstagram", "fbcdn", "scontent")
+
+_decoder = json.JSONDecoder()
+
+
+def unescape_url(raw: str) -> str:
+    """Undo JSON/HTML escaping in a URL pulled out of page source."""
+    return raw.replace("\\u0026", "&").replace("\\/", "/").replace("&amp;", "&")
+
+
+def _unique(values: List[str]) -> List[str]:
+    """Unescape each distinct raw value once, keeping first-seen order."""
+    seen = set()
+    result = []
+    for raw in dict.fromkeys(values):
+        url = unescape_url(raw)
+        if url not in seen:
+            seen.add(url)
+            result.append(url)
+    return result
+
+
+@dataclass
+class PageData:
+    """Everything the scrapers read from an Instagram profile page."""
+    meta: Dict[str, str] = field(default_factory=dict)
+    profile_pic_urls: List[str] = field(default_factory=list)
+    display_urls: List[str] = field(default_factory=list)
+    media_urls: List[str] = field(default_factory=list)
+    captions: List[str] = field(default_factory=list)
+    user_ids: List[str] = field(default_factory=list)
+    is_private: bool = False
+    login_required: bool = False
+    not_found: bool = False
+    # JSON blobs embedded in the page, decoded during extraction so the
+    # page HTML itself never has to travel back from a worker process
+    shared_data_json: Optional[Dict[str, Any]] = field(default=None, repr=False)
+    person_json: Optional[Dict[str, Any]] = field(default=None, repr=False)
+    profile_page_json: Optional[Dict[str, Any]] = field(default=None, repr=False)
+    # Every image-looking URL; only swept when no CDN URL matched
+    fallback_image_urls: List[str] = field(default_factory=list)
+
+    @property
+    def profile_pic_url(self) -> Optional[str]:
+        return self.profile_pic_urls[0] if self.profile_pic_urls else None
+
+    @property
+    def user_id(self) -> Optional[str]:
+        return self.user_ids[0] if self.user_ids else None
+
+    def cdn_image_urls(self) -> List[str]:
+        """Post image URLs on Instagram's CDN, display URLs first."""
+        urls = []
+        for url in self.display_urls + self.media_urls:
+            if url not in urls and any(host in url for host in CDN_HOSTS):
+                urls.append(url)
+        return urls
+
+    def any_image_urls(self) -> List[str]:
+        """Every image-looking URL in the page (slow path, only when nothing else matched)."""
+        return self.fallback_image_urls
+
+    def shared_data(self) -> Optional[Dict[str, Any]]:
+        """Decoded `window._sharedData`, if present."""
+        return self.shared_data_json
+
+    def person_ld_json(self) -> Optional[Dict[str, Any]]:
+        """First ld+json block describing a Person."""
+        return self.person_json
+
+    def profile_page(self) -> Optional[Dict[str, Any]]:
+        """First entry of an embedded `"ProfilePage":[...]` list."""
+        return self.profile_page_json
+
+
+def _decode_at(html: str, pos: Optional[int]) -> Optional[Any]:
+    if pos is None:
+        return None
+    try:
+        return _decoder.raw_decode(html, pos)[0]
+    except ValueError:
+        return None
+
+
+def extract_page(html: str) -> PageData:
+    """Scan profile page HTML once per token kind and collect all fields of interest."""
+    page = PageData()
+    ld_json_at: List[int] = []
+    profile_page_at: Optional[int] = None
+    pics: Dict[str, List[str]] = {"og": [], "profile_pic_url_hd": [], "profile_pic_url": [], "profilePicUrl": []}
+    display: List[str] = []
+    media: List[str] = []
+
+    for match in _JSON_FIELD.finditer(html):
+        key = match.group(1)
+        pos = match.end()
+        if key == "is_private":
+            if html.startswith("true", pos):
+                page.is_private = True
+            continue
+        if key == "edge_media_to_caption":
+            caption = _CAPTION.match(html, pos)
+            if caption:
+                page.captions.append(caption.group(1))
+            continue
+        if key == "ProfilePage":
+            if profile_page_at is None and html.startswith("[{", pos):
+                profile_page_at = pos + 1
+            continue
+
+        value = _JSON_STRING.match(html, pos)
+        if not value or not value.group(1):
+            continue
+        value = value.group(1)
+        if key in pics:
+            pics[key].append(value)
+        elif key in ("display_url", "thumbnail_src"):
+            display.append(value)
+        elif key == "user_id":
+            if value.isdigit() and value not in page.user_ids:
+                page.user_ids.append(value)
+        elif value.startswith(("https://", "https:\\/\\/")):
+            media.append(value)
+
+    for match in _TAG.finditer(html):
+        tag = match.group(1)
+        attrs = dict(_ATTR.findall(match.group(0)))
+        if tag == "meta":
+            key = attrs.get("property") or attrs.get("name")
+            if key in ("og:image", "og:title", "og:description", "description") and not page.meta.get(key):
+                page.meta[key] = attrs.get("content", "")
+                if key == "og:image" and page.meta[key]:
+                    pics["og"].append(page.meta[key])
+                continue
+        elif tag == "script":
+            if attrs.get("type") == "application/ld+json" and html.startswith("{", match.end()):
+                ld_json_at.append(match.end())
+            continue
+        for name in ("content", "srcset", "src"):
+            url = attrs.get(name, "").split(" ")[0]
+            if url.startswith("https://"):
+                media.append(url)
+
+    page_id = _PAGE_ID.search(html)
+    if page_id and page_id.group(1) not in page.user_ids:
+        page.user_ids.append(page_id.group(1))
+
+    shared_data = _SHARED_DATA.search(html)
+    if shared_data and html.startswith("{", shared_data.end()):
+        page.shared_data_json = _decode_at(html, shared_data.end())
+    for pos in ld_json_at:
+        data = _decode_at(html, pos)
+        if isinstance(data, dict) and data.get("@type") == "Person":
+            page.person_json = data
+            break
+    page.profile_page_json = _decode_at(html, profile_page_at)
+
+    # Plain substring checks run at C speed and need no regex
+    if "This Account is Private" in html or "This account is private" in html:
+        page.is_private = True
+    page.login_required = '"require_login":true' in html
+    page.not_found = "Sorry, this page" in html or "Page Not Found" in html
+
+    page.profile_pic_urls = _unique(
+        pics["og"] + pics["profile_pic_url_hd"] + pics["profile_pic_url"] + pics["profilePicUrl"]
+    )
+    page.display_urls = _unique(display)
+    page.media_urls = _unique(media)
+    if not page.cdn_image_urls():
+        page.fallback_image_urls = _ANY_IMAGE_URL.findall(html)
+    return page
+
+
+def parse_count(text: str) -> Optional[int]:
+    """Parse follower-style counts such as '1,234', '12.5K' or '3M'."""
+    text = text.replace(",", "").upper()
+    try:
+        if "K" in text:
+            return int(float(text.replace("K", "")) * 1000)
+        if "M" in text:
+            return int(float(text.replace("M", "")) * 1000000)
+        return int(text)
+    except ValueError:
+        return None
+
+
+def parse_og_description(desc: str) -> Tuple[Optional[int], Optional[str]]:
+    """Follower count and bio from "X Followers, Y Following, Z Posts - BIO"."""
+    follower_count = None
+    stats_match = _FOLLOWERS.search(desc)
+    if stats_match:
+        follower_count = parse_count(stats_match.group(1))
+
+    bio = None
+    bio_match = _DESC_BIO.search(desc)
+    if bio_match:
+        bio = bio_match.group(1).strip()
+    return follower_count, bio
+
+
+def name_from_title(title: str) -> Optional[str]:
+    """Display name from an og:title like "Jane Doe (@jane) • Instagram photos"."""
+    match = _TITLE_NAME.search(title)
+    return match.group(1).strip() if match else None
+
+
+def strip_title_suffix(title: str) -> str:
+    """Drop everything from the first '•', '|' or '@' in an og:title."""
+    return _TITLE_SUFFIX.sub("", title).strip()
@@ -0,0 +1,247 @@
+import asyncio
+import importlib.util
+import time
+from collections import defaultdict
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+from app.config import get_settings
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (httpx[http2])."""
+    return importlib.util.find_spec("h2") is not None
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response stream that frees its host slot once the body is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class _HostLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    Transport wrapper that caps in-flight requests per host and keeps
+    counters so pool saturation can be observed under load.
+    """
+
+    def __init__(self, transport: httpx.AsyncHTTPTransport, max_per_host: int):
+        self._transport = transport
+        self._max_per_host = max_per_host
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.in_flight: Dict[str, int] = defaultdict(int)
+        self.waiting: Dict[str, int] = defaultdict(int)
+        self.peak_in_flight = 0
+        self.total_requests = 0
+        self.total_errors = 0
+        self.total_wait_seconds = 0.0
+
+    def _semaphore(self, host: str) -> asyncio.Semaphore:
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self._max_per_host)
+        return self._semaphores[host]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        semaphore = self._semaphore(host)
+
+        self.waiting[host] += 1
+        wait_started = time.monotonic()
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting[host] -= 1
+        self.total_wait_seconds += time.monotonic() - wait_started
+
+        self.in_flight[host] += 1
+        self.total_requests += 1
+        self.peak_in_flight = max(self.peak_in_flight, sum(self.in_flight.values()))
+
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self.in_flight[host] -= 1
+                semaphore.release()
+
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            self.total_errors += 1
+            release()
+            raise
+
+        if response.is_closed:
+            # Body was already buffered by the inner transport
+            release()
+        else:
+            response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    def connection_stats(self) -> Dict[str, int]:
+        """Open/idle connection counts from the underlying httpcore pool."""
+        pool = getattr(self._transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = 0
+        for connection in connections:
+            try:
+                if connection.is_idle():
+                    idle += 1
+            except Exception:
+                continue
+        return {"open_connections": len(connections), "idle_connections": idle}
+
+
+class HttpPool:
+    """
+    Shared, keep-alive `httpx.AsyncClient` for outbound requests.
+    Created in the app lifespan and closed on shutdown.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        max_per_host: int = 10,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        timeout: float = 20.0,
+    ):
+        self.name = name
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.max_per_host = max_per_host
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and _http2_available()
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._transport: Optional[_HostLimitedTransport] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The pooled client; created lazily if the lifespan hook did not run."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    def _build_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        self._transport = _HostLimitedTransport(
+            httpx.AsyncHTTPTransport(limits=limits, http2=self.http2),
+            max_per_host=self.max_per_host,
+        )
+        # Strategies share the client, so cookies must not leak between them
+        no_cookies = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+        return httpx.AsyncClient(
+            transport=self._transport,
+            timeout=self.timeout,
+            cookies=no_cookies,
+        )
+
+    async def start(self) -> None:
+        """Open the client (called from the app lifespan)."""
+        _ = self.client
+        print(
+            f"[HttpPool] {self.name}: started (max={self.max_connections}, "
+            f"keepalive={self.max_keepalive_connections}, per_host={self.max_per_host}, "
+            f"http2={self.http2})"
+        )
+
+    async def close(self) -> None:
+        """Close the client and drop all pooled connections."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            print(f"[HttpPool] {self.name}: closed")
+        self._client = None
+        self._transport = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size and saturation counters."""
+        stats: Dict[str, Any] = {
+            "name": self.name,
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+            "max_per_host": self.max_per_host,
+            "started": self._client is not None and not self._client.is_closed,
+        }
+        transport = self._transport
+        if transport is None:
+            return stats
+
+        in_flight = sum(transport.in_flight.values())
+        stats.update(transport.connection_stats())
+        stats.update({
+            "in_flight": in_flight,
+            "waiting": sum(transport.waiting.values()),
+            "peak_in_flight": transport.peak_in_flight,
+            "saturation": round(in_flight / self.max_connections, 3) if self.max_connections else 0.0,
+            "total_requests": transport.total_requests,
+            "total_errors": transport.total_errors,
+            "total_wait_seconds": round(transport.total_wait_seconds, 3),
+            "hosts": {
+                host: {"in_flight": count, "waiting": transport.waiting.get(host, 0)}
+                for host, count in transport.in_flight.items()
+                if count or transport.waiting.get(host, 0)
+            },
+        })
+        return stats
+
+
+# Singleton
+_instagram_http_pool: Optional[HttpPool] = None
+_claude_http_pool: Optional[HttpPool] = None
+
+
+def get_instagram_http_pool() -> HttpPool:
+    global _instagram_http_pool
+    if _instagram_http_pool is None:
+        settings = get_settings()
+        _instagram_http_pool = HttpPool(
+            name="instagram",
+            max_connections=settings.instagram_http_max_connections,
+            max_keepalive_connections=settings.instagram_http_max_keepalive,
+            max_per_host=settings.instagram_http_max_per_host,
+            keepalive_expiry=settings.instagram_http_keepalive_expiry,
+            http2=settings.instagram_http2,
+        )
+    return _instagram_http_pool
+
+
+def get_claude_http_pool() -> HttpPool:
+    global _claude_http_pool
+    if _claude_http_pool is None:
+        settings = get_settings()
+        _claude_http_pool = HttpPool(
+            name="claude",
+            max_connections=settings.claude_http_max_connections,
+            max_keepalive_connections=settings.claude_http_max_keepalive,
+            max_per_host=settings.claude_http_max_connections,
+            http2=settings.claude_http2,
+            timeout=120.0,
+        )
+    return _claude_http_pool
@@ -0,0 +1,227 @@
+import time
+import random
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from dataclasses import dataclass, field
+import httpx
+from app.config import get_settings
+from app.services.image_store import ImageHandle
+
+
+# Enough leading bytes to recognise every format below
+SNIFF_BYTES = 12
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Image MIME type from the file's magic bytes, or None if it isn't one we accept."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:8] == b"ftyp" and head[8:12] in (b"avif", b"avis", b"heic", b"heix", b"mif1"):
+        return "image/avif"
+    return None
+
+
+@dataclass
+class PostMedia:
+    """A post image to download, with the metadata that must stay aligned to it."""
+    url: str
+    caption: str = ""
+    like_count: int = 0
+    comment_count: int = 0
+
+
+@dataclass
+class PostBatch:
+    """Downloaded posts in original order; all lists share the same index."""
+    images: List[ImageHandle] = field(default_factory=list)
+    captions: List[str] = field(default_factory=list)
+    like_counts: List[int] = field(default_factory=list)
+    comment_counts: List[int] = field(default_factory=list)
+
+    def append(self, post: PostMedia, image: ImageHandle) -> None:
+        self.images.append(image)
+        self.captions.append(post.caption)
+        self.like_counts.append(post.like_count)
+        self.comment_counts.append(post.comment_count)
+
+    def __len__(self) -> int:
+        return len(self.images)
+
+
+class ImageDownloader:
+    """
+    Concurrent post image download stage for deep fetches.
+    Bounded by a per-profile cap and a process-wide cap, with a time budget.
+    """
+
+    def __init__(
+        self,
+        max_global: int = 16,
+        max_per_profile: int = 4,
+        budget_seconds: float = 12.0,
+        jitter_seconds: float = 0.2,
+        max_bytes: int = 8 * 1024 * 1024,
+    ):
+        self.max_per_profile = max_per_profile
+        self.budget_seconds = budget_seconds
+        self.jitter_seconds = jitter_seconds
+        self.max_bytes = max_bytes
+        self._global = asyncio.Semaphore(max_global)
+        self.downloads = 0
+        self.bytes_downloaded = 0
+        self.bytes_saved = 0
+        self.rejected: Dict[str, int] = {}
+
+    def _reject(self, reason: str, saved: int = 0) -> None:
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        self.bytes_saved += saved
+
+    async def fetch(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        min_bytes: int = 0,
+        max_bytes: Optional[int] = None,
+        timeout: float = 15.0,
+    ) -> Optional[bytes]:
+        """
+        Stream one image, checking headers and magic bytes before the body.
+        Non-images, bodies of min_bytes or less and bodies over max_bytes
+        are dropped without being read in full.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+
+        async with client.stream("GET", url, headers=headers, timeout=timeout, follow_redirects=True) as response:
+            declared = response.headers.get("content-length")
+            declared_len = int(declared) if declared and declared.isdigit() else None
+
+            if response.status_code != 200:
+                print(f"[Downloader] Image download status: {response.status_code}")
+                self._reject("status", declared_len or 0)
+                return None
+
+            content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+            if content_type and not content_type.startswith(("image/", "application/octet-stream", "binary/octet-stream")):
+                print(f"[Downloader] Not an image: {content_type}")
+                self._reject("content_type", declared_len or 0)
+                return None
+
+            if declared_len is not None and declared_len > max_bytes:
+                print(f"[Downloader] Image too large: {declared_len} bytes")
+                self._reject("too_large", declared_len)
+                return None
+            if declared_len is not None and declared_len <= min_bytes:
+                print(f"[Downloader] Image too small: {declared_len} bytes")
+                self._reject("too_small", declared_len)
+                return None
+
+            body = bytearray()
+            sniffed = False
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if not sniffed and len(body) >= SNIFF_BYTES:
+                    if sniff_image_type(bytes(body[:SNIFF_BYTES])) is None:
+                        print("[Downloader] Not an image: unrecognised magic bytes")
+                        self._reject("magic_bytes", max((declared_len or 0) - len(body), 0))
+                        return None
+                    sniffed = True
+                if len(body) > max_bytes:
+                    print(f"[Downloader] Image too large: over {max_bytes} bytes")
+                    self._reject("too_large", max((declared_len or 0) - len(body), 0))
+                    return None
+
+        if not sniffed and sniff_image_type(bytes(body)) is None:
+            self._reject("magic_bytes")
+            return None
+        if len(body) <= min_bytes:
+            print(f"[Downloader] Image too small: {len(body)} bytes")
+            self._reject("too_small")
+            return None
+
+        self.downloads += 1
+        self.bytes_downloaded += len(body)
+        print(f"[Downloader] Downloaded image: {len(body)} bytes")
+        return bytes(body)
+
+    async def download(
+        self,
+        fetch: Callable[[str], Awaitable[Optional[ImageHandle]]],
+        posts: List[PostMedia],
+        limit: int,
+        budget_seconds: Optional[float] = None,
+    ) -> PostBatch:
+        """
+        Download `posts` concurrently and return up to `limit` successful
+        images in original post order. Downloads still running when the
+        budget runs out are cancelled.
+        """
+        batch = PostBatch()
+        if not posts or limit <= 0:
+            return batch
+
+        budget = self.budget_seconds if budget_seconds is None else budget_seconds
+        per_profile = asyncio.Semaphore(self.max_per_profile)
+        started = time.monotonic()
+
+        async def fetch_one(url: str) -> Optional[ImageHandle]:
+            if self.jitter_seconds > 0:
+                await asyncio.sleep(random.uniform(0, self.jitter_seconds))
+            async with per_profile:
+                async with self._global:
+                    return await fetch(url)
+
+        tasks = [asyncio.create_task(fetch_one(post.url)) for post in posts]
+        done, pending = await asyncio.wait(tasks, timeout=budget)
+
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            print(f"[Downloader] Budget of {budget}s exhausted, cancelled {len(pending)} downloads")
+
+        for post, task in zip(posts, tasks):
+            if len(batch) >= limit:
+                break
+            if task not in done or task.cancelled() or task.exception():
+                continue
+            image = task.result()
+            if image:
+                batch.append(post, image)
+
+        print(f"[Downloader] {len(batch)}/{len(posts)} images in {time.monotonic() - started:.2f}s")
+        return batch
+
+    def stats(self) -> Dict[str, Any]:
+        """Download counters, rejections by reason and bytes not transferred."""
+        return {
+            "max_bytes": self.max_bytes,
+            "downloads": self.downloads,
+            "bytes_downloaded": self.bytes_downloaded,
+            "rejected": dict(self.rejected),
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+# Singleton
+_image_downloader: Optional[ImageDownloader] = None
+
+
+def get_image_downloader() -> ImageDownloader:
+    global _image_downloader
+    if _image_downloader is None:
+        settings = get_settings()
+        _image_downloader = ImageDownloader(
+            max_global=settings.image_download_max_global,
+            max_per_profile=settings.image_download_max_per_profile,
+            budget_seconds=settings.image_download_budget_seconds,
+            jitter_seconds=settings.image_download_jitter_seconds,
+            max_bytes=settings.image_download_max_kb * 1024,
+        )
+    return _image_downloader
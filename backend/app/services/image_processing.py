@@ -0,0 +1,201 @@
+import io
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from PIL import Image, ImageOps
+from app.config import get_settings
+from app.services.image_downloader import sniff_image_type
+
+
+# Formats the model API accepts as-is
+MEDIA_TYPES = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp",
+    "GIF": "image/gif",
+}
+
+
+@dataclass
+class PreparedImage:
+    """Normalized image ready to send to the model."""
+    data: bytes
+    media_type: str
+    original_bytes: int
+    width: int = 0
+    height: int = 0
+    normalized: bool = True
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - len(self.data)
+
+
+class ImagePreprocessor:
+    """
+    Normalizes images before model submission: applies EXIF orientation,
+    drops metadata, caps the longest edge and re-encodes (JPEG, or PNG when
+    there is transparency), stepping quality and size down until the
+    image fits its byte budget.
+    """
+
+    def __init__(
+        self,
+        max_edge: int = 1568,
+        quality: int = 85,
+        max_bytes: int = 1024 * 1024,
+        deep_total_bytes: int = 4 * 1024 * 1024,
+        min_edge: int = 512,
+    ):
+        self.max_edge = max_edge
+        self.quality = quality
+        self.max_bytes = max_bytes
+        self.deep_total_bytes = deep_total_bytes
+        self.min_edge = min_edge
+        self.images = 0
+        self.failures = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.formats: Dict[str, int] = {}
+
+    def budget(self, count: int) -> Tuple[int, int]:
+        """(max edge, max bytes) per image when `count` images share one request."""
+        if count <= 1:
+            return self.max_edge, self.max_bytes
+        max_bytes = min(self.max_bytes, self.deep_total_bytes // count)
+        # Pixels scale with the square of the edge, so shrink the edge by sqrt
+        scale = min(1.0, (self.deep_total_bytes / (count * self.max_bytes)) ** 0.5)
+        return max(self.min_edge, int(self.max_edge * scale)), max_bytes
+
+    def normalize(self, data: bytes, max_edge: Optional[int] = None, max_bytes: Optional[int] = None) -> PreparedImage:
+        """
+        Normalize one image without touching the counters, so it can run in
+        a worker thread or process. Undecodable input is passed through unchanged.
+        """
+        max_edge = max_edge or self.max_edge
+        max_bytes = max_bytes or self.max_bytes
+        data = bytes(data)
+        try:
+            return self._normalize(data, max_edge, max_bytes)
+        except Exception as e:
+            print(f"[ImagePrep] Could not normalize image, sending as-is: {e}")
+            return PreparedImage(
+                data=data,
+                media_type=sniff_image_type(data[:12]) or "image/jpeg",
+                original_bytes=len(data),
+                normalized=False,
+            )
+
+    def normalize_many(self, images: List[bytes]) -> List[PreparedImage]:
+        """Normalize a batch, shrinking the per-image budget as the batch grows."""
+        max_edge, max_bytes = self.budget(len(images))
+        return [self.normalize(data, max_edge, max_bytes) for data in images]
+
+    def record(self, prepared: List[PreparedImage]) -> None:
+        """Add normalized images to the counters."""
+        for image in prepared:
+            self.images += 1
+            self.bytes_in += image.original_bytes
+            self.bytes_out += len(image.data)
+            if not image.normalized:
+                self.failures += 1
+            self.formats[image.media_type] = self.formats.get(image.media_type, 0) + 1
+
+    def report(self, prepared: List[PreparedImage]) -> None:
+        """Log bytes saved for one request."""
+        before = sum(image.original_bytes for image in prepared)
+        after = sum(len(image.data) for image in prepared)
+        if before:
+            print(
+                f"[ImagePrep] {len(prepared)} image(s): {before // 1024} KB -> {after // 1024} KB "
+                f"(saved {100 * (before - after) / before:.0f}%)"
+            )
+
+    def _normalize(self, data: bytes, max_edge: int, max_bytes: int) -> PreparedImage:
+        with Image.open(io.BytesIO(data)) as source:
+            source_format = source.format
+            # Animated GIF/WebP: the first frame is what the model would see anyway
+            source.seek(0)
+            image = ImageOps.exif_transpose(source)
+            image.load()
+
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        out_format = "PNG" if has_alpha else "JPEG"
+
+        if max(image.size) > max_edge:
+            image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+        quality = self.quality
+        encoded = self._encode(image, out_format, quality)
+        # Step quality, then size, down until the image fits its budget
+        while len(encoded) > max_bytes:
+            if out_format == "JPEG" and quality > 55:
+                quality -= 15
+            elif max(image.size) > self.min_edge:
+                edge = max(self.min_edge, int(max(image.size) * 0.75))
+                image.thumbnail((edge, edge), Image.LANCZOS)
+            else:
+                break
+            encoded = self._encode(image, out_format, quality)
+
+        # Re-encoding a small, already-clean file can make it bigger; keep the
+        # original then, as long as it needed no rotation or resize
+        if (
+            len(encoded) >= len(data)
+            and source_format in MEDIA_TYPES
+            and image.size == self._size(data)
+            and not self._has_metadata(data)
+        ):
+            return PreparedImage(data, MEDIA_TYPES[source_format], len(data), *image.size)
+
+        return PreparedImage(encoded, MEDIA_TYPES[out_format], len(data), *image.size)
+
+    @staticmethod
+    def _encode(image: Image.Image, out_format: str, quality: int) -> bytes:
+        buffer = io.BytesIO()
+        if out_format == "JPEG":
+            image.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+        else:
+            image.save(buffer, "PNG", optimize=True)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _size(data: bytes) -> Tuple[int, int]:
+        with Image.open(io.BytesIO(data)) as image:
+            return image.size
+
+    @staticmethod
+    def _has_metadata(data: bytes) -> bool:
+        with Image.open(io.BytesIO(data)) as image:
+            return bool(image.getexif()) or any(key in image.info for key in ("exif", "icc_profile", "xmp", "comment"))
+
+    def stats(self) -> Dict[str, Any]:
+        """Image counts by output type and total bytes saved."""
+        return {
+            "max_edge": self.max_edge,
+            "quality": self.quality,
+            "max_bytes": self.max_bytes,
+            "images": self.images,
+            "failures": self.failures,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+            "media_types": dict(self.formats),
+        }
+
+
+# Singleton
+_image_preprocessor: Optional[ImagePreprocessor] = None
+
+
+def get_image_preprocessor() -> ImagePreprocessor:
+    global _image_preprocessor
+    if _image_preprocessor is None:
+        settings = get_settings()
+        _image_preprocessor = ImagePreprocessor(
+            max_edge=settings.image_prep_max_edge,
+            quality=settings.image_prep_quality,
+            max_bytes=settings.image_prep_max_kb * 1024,
+            deep_total_bytes=settings.image_prep_deep_total_kb * 1024,
+        )
+    return _image_preprocessor
@@ -0,0 +1,279 @@
+import os
+import asyncio
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Union
+from app.config import get_settings
+
+
+@dataclass(frozen=True)
+class ImageHandle:
+    """Lightweight reference to an image held by the ImageStore."""
+    digest: str
+    size: int
+
+    def __len__(self) -> int:
+        return self.size
+
+
+# Raw bytes (e.g. uploads) or a handle into the store
+ImageLike = Union[bytes, ImageHandle]
+
+
+class ImageStore:
+    """
+    Content-addressed image store keyed by SHA-256.
+    Recently used images stay in RAM; older ones spill to a disk tier.
+    Both tiers are LRU-bounded by bytes, and identical images are stored
+    once no matter how many profiles use them. Disk writes and the
+    startup index run on a single writer thread, never on the event
+    loop; an image being spilled is still served from memory, and until
+    the index is built, lookups check the disk tier file directly. The
+    indexes are shared with executor threads and guarded by a lock.
+    """
+
+    def __init__(self, disk_dir: str, ram_max_bytes: int = 64 * 1024 * 1024, disk_max_bytes: int = 1024 * 1024 * 1024):
+        self.disk_dir = disk_dir
+        self.ram_max_bytes = ram_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self._lock = threading.RLock()
+        self._ram: "OrderedDict[str, bytes]" = OrderedDict()
+        self._ram_bytes = 0
+        # Evicted from RAM, waiting for the writer thread
+        self._spilling: Dict[str, bytes] = {}
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self.puts = 0
+        self.dedup_hits = 0
+        self.ram_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.spills = 0
+        self.evictions = 0
+
+        os.makedirs(disk_dir, exist_ok=True)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-store")
+        self._indexing = self._writer.submit(self._index_disk)
+
+    def _index_disk(self) -> None:
+        """Pick up images left on disk by a previous run, oldest first (writer thread)."""
+        entries = []
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if len(name) != 64:
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, name, stat.st_size))
+
+        with self._lock:
+            # Older than anything spilled since startup, so they go first
+            spilled = list(self._disk.items())
+            self._disk.clear()
+            self._disk_bytes = 0
+            for _, digest, size in sorted(entries):
+                self._disk[digest] = size
+                self._disk_bytes += size
+            for digest, size in spilled:
+                if digest not in self._disk:
+                    self._disk[digest] = size
+                    self._disk_bytes += size
+            self._evict_disk()
+
+    async def wait_indexed(self) -> None:
+        """Wait until images left by a previous run are indexed."""
+        await asyncio.wrap_future(self._indexing)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.disk_dir, digest[:2], digest)
+
+    def put(self, data: bytes) -> ImageHandle:
+        """Store image bytes and return their handle."""
+        digest = hashlib.sha256(data).hexdigest()
+        handle = ImageHandle(digest=digest, size=len(data))
+
+        with self._lock:
+            self.puts += 1
+            if digest in self._ram:
+                self._ram.move_to_end(digest)
+                self.dedup_hits += 1
+                return handle
+            if digest in self._spilling:
+                self.dedup_hits += 1
+                return handle
+            if digest in self._disk:
+                self._disk.move_to_end(digest)
+                self.dedup_hits += 1
+                return handle
+
+            self._ram[digest] = bytes(data)
+            self._ram_bytes += len(data)
+            self._evict_ram()
+        return handle
+
+    def get(self, handle: ImageHandle) -> bytes:
+        """Image content for a handle."""
+        with self._lock:
+            data = self._ram.get(handle.digest)
+            if data is not None:
+                self._ram.move_to_end(handle.digest)
+                self.ram_hits += 1
+                return data
+            data = self._spilling.get(handle.digest)
+            if data is not None:
+                self.ram_hits += 1
+                return data
+            indexed = handle.digest in self._disk
+            if indexed:
+                self._disk.move_to_end(handle.digest)
+
+        # Not indexed yet, but it may have been left on disk by a previous run
+        if indexed or not self._indexing.done():
+            try:
+                with open(self._path(handle.digest), "rb") as f:
+                    data = f.read()
+                with self._lock:
+                    self.disk_hits += 1
+                return data
+            except OSError:
+                if indexed:
+                    with self._lock:
+                        self._drop_disk(handle.digest)
+
+        with self._lock:
+            self.misses += 1
+        raise KeyError(f"Image {handle.digest[:12]} is no longer in the store")
+
+    def contains(self, handle: ImageHandle) -> bool:
+        with self._lock:
+            if handle.digest in self._ram or handle.digest in self._spilling or handle.digest in self._disk:
+                return True
+        return not self._indexing.done() and os.path.exists(self._path(handle.digest))
+
+    def load(self, image: ImageLike) -> bytes:
+        """Resolve raw bytes or a handle to image content."""
+        if isinstance(image, ImageHandle):
+            return self.get(image)
+        return image
+
+    async def aput(self, data: bytes) -> ImageHandle:
+        """`put` for the event loop: hashing a large upload runs on a thread."""
+        return await asyncio.to_thread(self.put, data)
+
+    async def aget(self, handle: ImageHandle) -> bytes:
+        """`get` for the event loop: memory hits are served inline, disk reads run on a thread."""
+        with self._lock:
+            in_memory = handle.digest in self._ram or handle.digest in self._spilling
+        if in_memory:
+            return self.get(handle)
+        return await asyncio.to_thread(self.get, handle)
+
+    async def aload(self, image: ImageLike) -> bytes:
+        """`load` for the event loop."""
+        if isinstance(image, ImageHandle):
+            return await self.aget(image)
+        return image
+
+    def flush(self) -> None:
+        """Spill every RAM-tier image to disk (on shutdown) so it survives a restart."""
+        with self._lock:
+            while self._ram:
+                digest, data = self._ram.popitem(last=False)
+                self._ram_bytes -= len(data)
+                self._queue_spill(digest, data)
+        # One writer thread, so this runs after every queued spill
+        self._writer.submit(lambda: None).result()
+
+    def _evict_ram(self) -> None:
+        # Hand least recently used images to the writer thread
+        while self._ram_bytes > self.ram_max_bytes and self._ram:
+            digest, data = self._ram.popitem(last=False)
+            self._ram_bytes -= len(data)
+            self._queue_spill(digest, data)
+
+    def _queue_spill(self, digest: str, data: bytes) -> None:
+        self._spilling[digest] = data
+        self._writer.submit(self._spill, digest, data)
+
+    def _spill(self, digest: str, data: bytes) -> None:
+        """Write one evicted image to the disk tier (writer thread)."""
+        path = self._path(digest)
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            written = True
+        except OSError as e:
+            print(f"[ImageStore] Spill to disk failed: {e}")
+            written = False
+
+        with self._lock:
+            self._spilling.pop(digest, None)
+            if not written:
+                self.evictions += 1
+                return
+            if digest not in self._disk:
+                self._disk[digest] = len(data)
+                self._disk_bytes += len(data)
+            self._evict_disk()
+            if digest in self._disk:
+                self.spills += 1
+            else:
+                self.evictions += 1
+
+    def _evict_disk(self) -> None:
+        while self._disk_bytes > self.disk_max_bytes and self._disk:
+            digest = next(iter(self._disk))
+            self._drop_disk(digest)
+            self.evictions += 1
+
+    def _drop_disk(self, digest: str) -> None:
+        size = self._disk.pop(digest, 0)
+        self._disk_bytes -= size
+        try:
+            os.remove(self._path(digest))
+        except OSError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Tier sizes and hit/dedup/eviction counters."""
+        return {
+            "ram_images": len(self._ram),
+            "ram_bytes": self._ram_bytes,
+            "ram_max_bytes": self.ram_max_bytes,
+            "spilling_images": len(self._spilling),
+            "disk_images": len(self._disk),
+            "disk_bytes": self._disk_bytes,
+            "disk_max_bytes": self.disk_max_bytes,
+            "puts": self.puts,
+            "dedup_hits": self.dedup_hits,
+            "ram_hits": self.ram_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "spills": self.spills,
+            "evictions": self.evictions,
+        }
+
+
+# Singleton
+_image_store: Optional[ImageStore] = None
+
+
+def get_image_store() -> ImageStore:
+    global _image_store
+    if _image_store is None:
+        settings = get_settings()
+        _image_store = ImageStore(
+            disk_dir=settings.image_store_dir or os.path.join(tempfile.gettempdir(), "profile-whisperer-images"),
+            ram_max_bytes=settings.image_store_ram_mb * 1024 * 1024,
+            disk_max_bytes=settings.image_store_disk_mb * 1024 * 1024,
+        )
+    return _image_store
@@ -1,10 +1,20 @@
 import re
 import json
 import httpx
+import time
 import random
 import asyncio
-from typing import Optional, List
+from typing import Awaitable, Callable, Dict, Optional, List, Tuple
 from dataclasses import dataclass
+from app.config import get_settings
+from app.services.http_pool import HttpPool, get_instagram_http_pool
+from app.services.browser_pool import BrowserPool, get_browser_pool
+from app.services.image_store import ImageHandle, ImageStore, get_image_store
+from app.services.profile_cache import NegativeCache, ProfileCache, get_negative_cache, get_profile_cache
+from app.services.image_downloader import ImageDownloader, PostBatch, PostMedia, get_image_downloader
+from app.services.strategy_stats import StrategyStats, get_strategy_stats
+from app.services.cpu_executor import CpuExecutor, get_cpu_executor
+from app.services.html_extractor import extract_page, name_from_title, parse_og_description, strip_title_suffix
 
 
 # Rotating User Agents
@@ -22,6 +32,12 @@ APP_IDS = [
     "124024574287414",
 ]
 
+# Failures that won't change on an immediate retry, in order of confidence
+DEFINITIVE_ERRORS = ["user_not_found", "login_required"]
+# Strategies that must agree on a missing user before it is negative-cached,
+# unless one of them got an authoritative answer
+NOT_FOUND_AGREEMENT = 2
+
 
 @dataclass
 class InstagramProfile:
@@ -29,13 +45,16 @@ class InstagramProfile:
     full_name: Optional[str]
     bio: Optional[str]
     profile_pic_url: Optional[str]
-    profile_pic_bytes: Optional[bytes]
-    post_images: List[bytes]
+    # Images are handles into the shared ImageStore, not raw bytes
+    profile_pic_bytes: Optional[ImageHandle]
+    post_images: List[ImageHandle]
     follower_count: Optional[int]
     following_count: Optional[int]
     post_count: Optional[int]
     is_private: bool
     error: Optional[str] = None
+    # The error came from an authoritative answer (a 404 from the web profile endpoint)
+    error_confirmed: bool = False
     # Deep analysis fields
     post_captions: List[str] = None
     post_like_counts: List[int] = None
@@ -53,8 +72,36 @@ class InstagramProfile:
 class InstagramScraper:
     """
     Multi-strategy Instagram profile scraper.
+    All strategies share one pooled HTTP client and one warm browser pool.
+    HTML extraction and large JSON decodes run on the CPU executor.
     """
 
+    def __init__(
+        self,
+        http: HttpPool,
+        downloader: ImageDownloader,
+        browsers: BrowserPool,
+        images: ImageStore,
+        cache: ProfileCache,
+        negative_cache: NegativeCache,
+        strategy_stats: StrategyStats,
+        cpu: CpuExecutor,
+        strategy_mode: str = "hedged",
+        hedge_delay: float = 3.0,
+        adaptive: bool = True,
+    ):
+        self.http = http
+        self.downloader = downloader
+        self.browsers = browsers
+        self.images = images
+        self.cache = cache
+        self.negative_cache = negative_cache
+        self.strategy_stats = strategy_stats
+        self.cpu = cpu
+        self.strategy_mode = strategy_mode
+        self.hedge_delay = hedge_delay
+        self.adaptive = adaptive
+
     @staticmethod
     def extract_username(url_or_username: str) -> Optional[str]:
         """Extract username from Instagram URL or return as-is."""
@@ -80,27 +127,41 @@ class InstagramScraper:
         if not username:
             return self._error_profile("", "invalid_username")
 
+        cached = await self.cache.get(username, "basic")
+        if cached:
+            print(f"[Instagram] Cache hit: @{username}")
+            return cached
+
+        # Private accounts still have a usable profile pic, so only
+        # definitive errors short-circuit a basic fetch
+        cached_error = self.negative_cache.get(username, DEFINITIVE_ERRORS)
+        if cached_error:
+            print(f"[Instagram] Negative cache hit: @{username} ({cached_error})")
+            return self._error_profile(username, cached_error)
+
         print(f"[Instagram] Fetching profile: @{username}")
 
-        # Try methods in order
+        # Methods in order of preference
         methods = [
-            self._try_web_profile_info,
-            self._try_graphql_api,
-            self._try_mobile_page,
-            self._try_desktop_page,
+            (self._try_web_profile_info, "web_profile_info"),
+            (self._try_graphql_api, "graphql_api"),
+            (self._try_mobile_page, "mobile_page"),
+            (self._try_desktop_page, "desktop_page"),
         ]
+        attempts = [(lambda method=method: method(username), name) for method, name in methods]
 
-        for method in methods:
-            try:
-                result = await method(username)
-                if result and not result.error:
-                    print(f"[Instagram] Success with {method.__name__}")
-                    return result
-                elif result and result.error:
-                    print(f"[Instagram] {method.__name__} failed: {result.error}")
-            except Exception as e:
-                print(f"[Instagram] {method.__name__} error: {e}")
-                continue
+        result, others = await self._run_strategies(attempts, accept=lambda profile: True)
+        if result:
+            await self.cache.set(username, "basic", result)
+            if result.is_private:
+                self.negative_cache.set(username, "private_account")
+            return result
+
+        error = self._definitive_error(others)
+        if error:
+            if self._cacheable_error(error, others):
+                self.negative_cache.set(username, error)
+            return self._error_profile(username, error)
 
         return self._error_profile(username, "all_methods_failed")
 
@@ -111,9 +172,23 @@ class InstagramScraper:
         if not username:
             return self._error_profile("", "invalid_username")
 
+        depth = f"deep:{max_posts}"
+        cached = await self.cache.get(username, depth)
+        if cached:
+            print(f"[Instagram] Cache hit: @{username} ({depth})")
+            return cached
+
+        cached_error = self.negative_cache.get(username, DEFINITIVE_ERRORS + ["private_account"])
+        if cached_error == "private_account":
+            print(f"[Instagram] Negative cache hit: @{username} (private)")
+            return self._private_profile(username)
+        if cached_error:
+            print(f"[Instagram] Negative cache hit: @{username} ({cached_error})")
+            return self._error_profile(username, cached_error)
+
         print(f"[Instagram] Deep fetching profile: @{username} (max {max_posts} posts)")
 
-        # Try multiple methods for deep fetch
+        # Multiple methods for deep fetch, strongest first
         methods = [
             (self._try_playwright_deep, "playwright_deep"),  # Headless browser - most reliable
             (self._try_web_profile_info_deep, "web_profile_info_deep"),
@@ -121,77 +196,201 @@ class InstagramScraper:
             (self._try_graphql_deep, "graphql_deep"),
             (self._try_html_scrape_deep, "html_scrape_deep"),
         ]
+        attempts = [(lambda method=method: method(username, max_posts), name) for method, name in methods]
+
+        # If we get 3+ posts, use it immediately
+        result, candidates = await self._run_strategies(
+            attempts,
+            accept=lambda profile: len(profile.post_images) >= 3,
+        )
+        if result:
+            await self.cache.set(username, depth, result)
+            return result
+
+        # Otherwise use the best result if it has at least 1 image
+        best_result = max(
+            (profile for profile in candidates if not profile.error),
+            key=lambda profile: len(profile.post_images),
+            default=None,
+        )
+        if best_result and len(best_result.post_images) >= 1:
+            print(f"[Instagram] Using best result with {len(best_result.post_images)} posts")
+            await self.cache.set(username, depth, best_result)
+            return best_result
+
+        # No point falling back if the strategies already gave a reliable definitive answer
+        error = self._definitive_error(candidates)
+        if error and self._cacheable_error(error, candidates):
+            self.negative_cache.set(username, error)
+            return self._error_profile(username, error)
 
-        best_result = None
-        best_count = 0
+        # Fallback to regular fetch if deep fetch fails
+        print("[Instagram] Deep fetch failed, falling back to regular fetch")
+        return await self.fetch_profile(url_or_username)
 
-        for method, name in methods:
+    async def _run_strategies(
+        self,
+        attempts: List[Tuple[Callable[[], Awaitable[Optional[InstagramProfile]]], str]],
+        accept: Callable[[InstagramProfile], bool],
+    ) -> Tuple[Optional[InstagramProfile], List[InstagramProfile]]:
+        """
+        Run strategies until one returns an acceptable profile.
+        Returns (accepted result or None, every other returned profile,
+        including error profiles).
+        """
+        if self.adaptive:
+            by_name = {name: attempt for attempt, name in attempts}
+            order = self.strategy_stats.order([name for _, name in attempts])
+            if order != [name for _, name in attempts]:
+                print(f"[Instagram] Strategy order: {', '.join(order)}")
+            attempts = [(by_name[name], name) for name in order]
+        attempts = [(self._timed(attempt, name, accept), name) for attempt, name in attempts]
+
+        if self.strategy_mode == "sequential":
+            return await self._run_sequential(attempts, accept)
+        return await self._run_hedged(attempts, accept)
+
+    def _timed(self, attempt, name: str, accept: Callable[[InstagramProfile], bool]):
+        """Wrap an attempt so its outcome and latency feed the strategy stats."""
+        async def run() -> Optional[InstagramProfile]:
+            started = time.monotonic()
+            try:
+                result = await attempt()
+            except Exception:
+                self.strategy_stats.record(name, 0.0, time.monotonic() - started)
+                raise
+            # Cancelled (hedged-out) attempts say nothing about the strategy and aren't recorded
+            self.strategy_stats.record(name, self._reward(result, accept), time.monotonic() - started)
+            return result
+        return run
+
+    @staticmethod
+    def _reward(result: Optional[InstagramProfile], accept: Callable[[InstagramProfile], bool]) -> float:
+        """1 for a usable answer (including a confirmed missing user), 0.5 for a partial one."""
+        if result is None:
+            return 0.0
+        if result.error:
+            return 1.0 if result.error == "user_not_found" else 0.0
+        return 1.0 if accept(result) else 0.5
+
+    def _check_result(
+        self,
+        name: str,
+        result: Optional[InstagramProfile],
+        accept: Callable[[InstagramProfile], bool],
+        candidates: List[InstagramProfile],
+    ) -> bool:
+        """Log a strategy outcome; True if it should be used right away."""
+        if result and not result.error:
+            print(f"[Instagram] {name} returned {len(result.post_images)} posts")
+            if accept(result):
+                print(f"[Instagram] Success with {name}")
+                return True
+            candidates.append(result)
+        elif result and result.error:
+            print(f"[Instagram] {name} failed: {result.error}")
+            candidates.append(result)
+        return False
+
+    @staticmethod
+    def _definitive_error(results: List[InstagramProfile]) -> Optional[str]:
+        """The most reliable definitive error reported by any strategy, unless another one found the profile."""
+        if any(not profile.error for profile in results):
+            return None
+        errors = {profile.error for profile in results if profile.error}
+        for error in DEFINITIVE_ERRORS:
+            if error in errors:
+                return error
+        return None
+
+    @staticmethod
+    def _cacheable_error(error: str, results: List[InstagramProfile]) -> bool:
+        """
+        Whether a definitive error is reliable enough to negative-cache. One
+        strategy reporting a missing user may just have hit a login wall or
+        an error page, so that needs an authoritative answer or agreement.
+        """
+        if error != "user_not_found":
+            return True
+        reports = [profile for profile in results if profile.error == error]
+        return any(profile.error_confirmed for profile in reports) or len(reports) >= NOT_FOUND_AGREEMENT
+
+    async def _run_sequential(self, attempts, accept):
+        """Try each strategy one after another."""
+        candidates: List[InstagramProfile] = []
+
+        for attempt, name in attempts:
             try:
                 print(f"[Instagram] Trying {name}...")
-                result = await method(username, max_posts)
-                if result and not result.error:
-                    post_count = len(result.post_images)
-                    print(f"[Instagram] {name} returned {post_count} posts")
-
-                    # If we get 3+ posts, use it immediately
-                    if post_count >= 3:
-                        print(f"[Instagram] Deep fetch success with {name}: {post_count} posts")
-                        return result
-
-                    # Otherwise, keep track of the best result
-                    if post_count > best_count:
-                        best_result = result
-                        best_count = post_count
-                elif result and result.error:
-                    print(f"[Instagram] {name} failed: {result.error}")
+                result = await attempt()
             except Exception as e:
                 print(f"[Instagram] {name} error: {e}")
                 continue
+            if self._check_result(name, result, accept, candidates):
+                return result, candidates
+
+        return None, candidates
+
+    async def _run_hedged(self, attempts, accept):
+        """
+        Start the strongest strategy, then launch the next one after the
+        hedge delay or as soon as a running one finishes without an
+        acceptable result. The first acceptable result wins; the rest
+        are cancelled.
+        """
+        candidates: List[InstagramProfile] = []
+        remaining = list(attempts)
+        running: Dict[asyncio.Task, str] = {}
+
+        def launch_next() -> None:
+            if remaining:
+                attempt, name = remaining.pop(0)
+                print(f"[Instagram] Trying {name}...")
+                running[asyncio.create_task(attempt())] = name
 
-        # If we have at least 1 image, use it
-        if best_result and best_count >= 1:
-            print(f"[Instagram] Using best result with {best_count} posts")
-            return best_result
+        launch_next()
+        try:
+            while running:
+                done, _ = await asyncio.wait(
+                    running.keys(),
+                    timeout=self.hedge_delay if remaining else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
 
-        # Fallback to regular fetch if deep fetch fails
-        print("[Instagram] Deep fetch failed, falling back to regular fetch")
-        return await self.fetch_profile(url_or_username)
+                if not done:
+                    # Hedge: the running strategies are slow, start another one
+                    launch_next()
+                    continue
+
+                for task in done:
+                    name = running.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        print(f"[Instagram] {name} error: {e}")
+                        result = None
+                    if self._check_result(name, result, accept, candidates):
+                        return result, candidates
+                    launch_next()
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        return None, candidates
 
     async def _try_playwright_deep(self, username: str, max_posts: int = 9) -> Optional[InstagramProfile]:
         """Use Playwright headless browser to scrape Instagram profile."""
-        try:
-            from playwright.async_api import async_playwright
-        except ImportError:
+        if not self.browsers.available:
             print("[Instagram] Playwright not installed")
             return None
 
         print(f"[Instagram] Starting Playwright for @{username}")
 
         try:
-            async with async_playwright() as p:
-                # Launch headless browser
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--no-sandbox',
-                        '--disable-setuid-sandbox',
-                        '--disable-dev-shm-usage',
-                        '--disable-accelerated-2d-canvas',
-                        '--disable-gpu',
-                        '--single-process',
-                    ]
-                )
-
-                # Create context with realistic settings
-                context = await browser.new_context(
-                    viewport={'width': 1920, 'height': 1080},
-                    user_agent=random.choice(USER_AGENTS),
-                    locale='en-US',
-                    timezone_id='America/New_York',
-                )
-
-                page = await context.new_page()
-
+            # Borrow a warm page from the shared browser pool
+            async with self.browsers.page(user_agent=random.choice(USER_AGENTS)) as page:
                 # Navigate to profile
                 url = f"https://www.instagram.com/{username}/"
                 print(f"[Instagram] Playwright navigating to {url}")
@@ -321,16 +520,15 @@ class InstagramScraper:
                         print(f"[Instagram] Playwright found {len(image_urls)} post URLs")
 
                         # Download images
-                        async with httpx.AsyncClient(timeout=15.0) as client:
-                            for i, img_url in enumerate(image_urls[:max_posts]):
-                                if i > 0:
-                                    await asyncio.sleep(random.uniform(0.2, 0.5))
-                                img_bytes = await self._download_image(client, img_url)
-                                if img_bytes and len(img_bytes) > 5000:
-                                    post_images.append(img_bytes)
-                                    post_captions.append("")
-                                    post_like_counts.append(0)
-                                    post_comment_counts.append(0)
+                        batch = await self._download_posts(
+                            [PostMedia(url=img_url) for img_url in image_urls[:max_posts]],
+                            limit=max_posts,
+                            min_bytes=5000,
+                        )
+                        post_images = batch.images
+                        post_captions = batch.captions
+                        post_like_counts = batch.like_counts
+                        post_comment_counts = batch.comment_counts
 
                     except Exception as e:
                         print(f"[Instagram] Playwright image extraction error: {e}")
@@ -338,10 +536,7 @@ class InstagramScraper:
                 # Download profile pic
                 profile_pic_bytes = None
                 if profile_pic_url:
-                    async with httpx.AsyncClient(timeout=15.0) as client:
-                        profile_pic_bytes = await self._download_image(client, profile_pic_url)
-
-                await browser.close()
+                    profile_pic_bytes = await self._download_image(self.http.client, profile_pic_url)
 
                 print(f"[Instagram] Playwright found {len(post_images)} post images")
 
@@ -403,85 +598,69 @@ class InstagramScraper:
 
         await asyncio.sleep(random.uniform(0.5, 1.5))
 
-        async with httpx.AsyncClient(timeout=20.0, follow_redirects=True) as client:
-            try:
-                response = await client.get(url, headers=headers)
-                print(f"[Instagram] Mobile API response: {response.status_code}")
-
-                if response.status_code == 429:
-                    print("[Instagram] Mobile API rate limited")
-                    return None
-
-                if response.status_code != 200:
-                    return None
-
-                data = response.json()
-                user = data.get("data", {}).get("user")
-
-                if not user:
-                    return None
-
-                profile_pic_url = user.get("profile_pic_url_hd") or user.get("profile_pic_url")
-                is_private = user.get("is_private", False)
-
-                # Download profile pic
-                await asyncio.sleep(random.uniform(0.2, 0.5))
-                profile_pic_bytes = await self._download_image(client, profile_pic_url)
+        client = self.http.client
+        try:
+            response = await client.get(url, headers=headers, timeout=20.0, follow_redirects=True)
+            print(f"[Instagram] Mobile API response: {response.status_code}")
 
-                post_images = []
-                post_captions = []
-                post_like_counts = []
-                post_comment_counts = []
+            if response.status_code == 429:
+                print("[Instagram] Mobile API rate limited")
+                return None
 
-                if not is_private:
-                    edges = user.get("edge_owner_to_timeline_media", {}).get("edges", [])
-                    for i, edge in enumerate(edges[:max_posts]):
-                        node = edge.get("node", {})
-                        img_url = node.get("display_url")
+            if response.status_code != 200:
+                return None
 
-                        if img_url:
-                            if i > 0:
-                                await asyncio.sleep(random.uniform(0.2, 0.4))
+            data = await self.cpu.run("json_decode", json.loads, response.content)
+            user = data.get("data", {}).get("user")
 
-                            img_bytes = await self._download_image(client, img_url)
-                            if img_bytes:
-                                post_images.append(img_bytes)
+            if not user:
+                return None
 
-                                caption_edges = node.get("edge_media_to_caption", {}).get("edges", [])
-                                caption = caption_edges[0].get("node", {}).get("text", "") if caption_edges else ""
-                                post_captions.append(caption)
+            profile_pic_url = user.get("profile_pic_url_hd") or user.get("profile_pic_url")
+            is_private = user.get("is_private", False)
 
-                                like_count = node.get("edge_liked_by", {}).get("count", 0) or node.get("edge_media_preview_like", {}).get("count", 0)
-                                post_like_counts.append(like_count)
+            # Download profile pic
+            await asyncio.sleep(random.uniform(0.2, 0.5))
+            profile_pic_bytes = await self._download_image(client, profile_pic_url)
 
-                                comment_count = node.get("edge_media_to_comment", {}).get("count", 0) or node.get("edge_media_preview_comment", {}).get("count", 0)
-                                post_comment_counts.append(comment_count)
+            post_images = []
+            post_captions = []
+            post_like_counts = []
+            post_comment_counts = []
 
-                print(f"[Instagram] Mobile API deep: {len(post_images)} posts")
+            if not is_private:
+                edges = user.get("edge_owner_to_timeline_media", {}).get("edges", [])
+                batch = await self._download_posts(self._timeline_posts(edges[:max_posts]), limit=max_posts)
+                post_images = batch.images
+                post_captions = batch.captions
+                post_like_counts = batch.like_counts
+                post_comment_counts = batch.comment_counts
 
-                if len(post_images) < 3:
-                    return None
+            print(f"[Instagram] Mobile API deep: {len(post_images)} posts")
 
-                return InstagramProfile(
-                    username=username,
-                    full_name=user.get("full_name"),
-                    bio=user.get("biography"),
-                    profile_pic_url=profile_pic_url,
-                    profile_pic_bytes=profile_pic_bytes,
-                    post_images=post_images,
-                    follower_count=user.get("edge_followed_by", {}).get("count"),
-                    following_count=user.get("edge_follow", {}).get("count"),
-                    post_count=user.get("edge_owner_to_timeline_media", {}).get("count"),
-                    is_private=is_private,
-                    error=None,
-                    post_captions=post_captions,
-                    post_like_counts=post_like_counts,
-                    post_comment_counts=post_comment_counts,
-                )
-            except Exception as e:
-                print(f"[Instagram] Mobile API exception: {e}")
+            if len(post_images) < 3:
                 return None
 
+            return InstagramProfile(
+                username=username,
+                full_name=user.get("full_name"),
+                bio=user.get("biography"),
+                profile_pic_url=profile_pic_url,
+                profile_pic_bytes=profile_pic_bytes,
+                post_images=post_images,
+                follower_count=user.get("edge_followed_by", {}).get("count"),
+                following_count=user.get("edge_follow", {}).get("count"),
+                post_count=user.get("edge_owner_to_timeline_media", {}).get("count"),
+                is_private=is_private,
+                error=None,
+                post_captions=post_captions,
+                post_like_counts=post_like_counts,
+                post_comment_counts=post_comment_counts,
+            )
+        except Exception as e:
+            print(f"[Instagram] Mobile API exception: {e}")
+            return None
+
     async def _try_graphql_deep(self, username: str, max_posts: int = 9) -> Optional[InstagramProfile]:
         """Try Instagram GraphQL API for deep analysis."""
         # First get user ID from profile page
@@ -498,206 +677,126 @@ class InstagramScraper:
 
         await asyncio.sleep(random.uniform(0.5, 1.0))
 
-        async with httpx.AsyncClient(timeout=20.0, follow_redirects=True) as client:
-            try:
-                # Get profile page to extract user_id
-                response = await client.get(profile_url, headers=headers)
-                print(f"[Instagram] GraphQL profile page: {response.status_code}")
-
-                if response.status_code != 200:
-                    return None
-
-                html = response.text
-
-                # Debug: Log HTML length and check for login redirect
-                print(f"[Instagram] HTML length: {len(html)} chars")
-                if 'login' in html.lower()[:1000]:
-                    print("[Instagram] Page requires login")
-                if 'not-logged-in' in html:
-                    print("[Instagram] User not logged in detected")
-
-                # Try to extract user_id from various patterns
-                user_id = None
-                id_patterns = [
-                    r'"user_id"\s*:\s*"(\d+)"',
-                    r'"profilePage_(\d+)"',
-                    r'"id"\s*:\s*"(\d+)".*?"username"\s*:\s*"' + username + '"',
-                    r'logging_page_id["\']?\s*:\s*["\']?profilePage_(\d+)',
-                ]
-
-                for pattern in id_patterns:
-                    match = re.search(pattern, html)
-                    if match:
-                        user_id = match.group(1)
-                        print(f"[Instagram] Found user_id: {user_id}")
-                        break
-
-                # Extract data from shared data in page
-                shared_data_match = re.search(
-                    r'<script type="application/json" data-sjs>(\{.*?"require".*?\})</script>',
-                    html,
-                    re.DOTALL
-                )
-
-                profile_pic_url = None
-                bio = None
-                full_name = None
-                is_private = False
-                follower_count = None
-                following_count = None
-                post_count = None
-
-                # Extract from meta tags as backup
-                og_image = re.search(r'<meta property="og:image" content="([^"]+)"', html)
-                if og_image:
-                    profile_pic_url = og_image.group(1)
-                    print(f"[Instagram] Found og:image: {profile_pic_url[:80]}...")
-                else:
-                    print("[Instagram] No og:image found in HTML")
-
-                og_desc = re.search(r'<meta property="og:description" content="([^"]+)"', html)
-                if og_desc:
-                    desc = og_desc.group(1)
-                    # Parse "X Followers, Y Following, Z Posts - BIO"
-                    stats_match = re.search(r'([\d,KMB.]+)\s*Follower', desc, re.IGNORECASE)
-                    if stats_match:
-                        follower_str = stats_match.group(1).replace(',', '')
-                        if 'K' in follower_str.upper():
-                            follower_count = int(float(follower_str.upper().replace('K', '')) * 1000)
-                        elif 'M' in follower_str.upper():
-                            follower_count = int(float(follower_str.upper().replace('M', '')) * 1000000)
-                        else:
-                            try:
-                                follower_count = int(follower_str)
-                            except:
-                                pass
-                    bio_match = re.search(r'Posts?\s*[-–]\s*(.+)$', desc)
-                    if bio_match:
-                        bio = bio_match.group(1).strip()
-
-                og_title = re.search(r'<meta property="og:title" content="([^"]+)"', html)
-                if og_title:
-                    title = og_title.group(1)
-                    name_match = re.search(r'^([^(@]+)', title)
-                    if name_match:
-                        full_name = name_match.group(1).strip()
-
-                # Check if private
-                if 'This Account is Private' in html or '"is_private":true' in html:
-                    is_private = True
-
-                # Find all image URLs - try multiple patterns
-                image_urls = []
-
-                # Try to find embedded JSON data first
-                json_patterns = [
-                    r'<script type="application/ld\+json"[^>]*>(\{[^<]+\})</script>',
-                    r'"xdt_api__v1__feed__user_timeline_graphql_connection":\s*(\{[^}]+\})',
-                    r'edges":\s*\[(.*?)\]',
-                ]
-
-                # Pattern for display URLs in JSON and HTML
-                display_patterns = [
-                    r'"display_url"\s*:\s*"([^"]+)"',
-                    r'"thumbnail_src"\s*:\s*"([^"]+)"',
-                    r'"src"\s*:\s*"(https://[^"]*(?:cdninstagram|fbcdn)[^"]*\.jpg[^"]*)"',
-                    r'"url"\s*:\s*"(https://[^"]*(?:cdninstagram|fbcdn)[^"]*\.jpg[^"]*)"',
-                    r'content="(https://[^"]*(?:cdninstagram|fbcdn)[^"]*\.jpg[^"]*)"',
-                    r'"image"\s*:\s*"(https://[^"]+)"',
-                    r'"contentUrl"\s*:\s*"(https://[^"]+)"',
-                ]
-
-                for pattern in display_patterns:
-                    matches = re.findall(pattern, html)
-                    for match in matches:
-                        clean_url = match.replace('\\u0026', '&').replace('\\/', '/').replace('&amp;', '&')
-                        # Filter for actual Instagram image URLs
-                        if clean_url not in image_urls and ('cdninstagram' in clean_url or 'fbcdn' in clean_url or 'instagram' in clean_url):
-                            if '.jpg' in clean_url or '.png' in clean_url or 'scontent' in clean_url:
-                                image_urls.append(clean_url)
-
-                print(f"[Instagram] GraphQL found {len(image_urls)} image URLs")
-
-                # Also try to find caption data
-                caption_pattern = r'"edge_media_to_caption":\{"edges":\[\{"node":\{"text":"([^"]+)"\}\}\]\}'
-                captions_found = re.findall(caption_pattern, html)
+        client = self.http.client
+        try:
+            # Get profile page to extract user_id
+            response = await client.get(profile_url, headers=headers, timeout=20.0, follow_redirects=True)
+            print(f"[Instagram] GraphQL profile page: {response.status_code}")
 
-                # Download profile pic
-                profile_pic_bytes = None
-                if profile_pic_url:
-                    await asyncio.sleep(random.uniform(0.2, 0.5))
-                    profile_pic_bytes = await self._download_image(client, profile_pic_url)
+            if response.status_code != 200:
+                return None
 
-                # Download post images
-                post_images = []
-                post_captions = []
-                post_like_counts = []
-                post_comment_counts = []
+            html = response.text
 
-                # Remove duplicates and profile pic from images
-                unique_images = []
-                for url in image_urls:
-                    if url not in unique_images:
-                        unique_images.append(url)
+            # Debug: Log HTML length and check for login redirect
+            print(f"[Instagram] HTML length: {len(html)} chars")
+            if 'login' in html.lower()[:1000]:
+                print("[Instagram] Page requires login")
+            if 'not-logged-in' in html:
+                print("[Instagram] User not logged in detected")
+
+            page = await self.cpu.run("html_extract", extract_page, html)
+            if page.user_id:
+                print(f"[Instagram] Found user_id: {page.user_id}")
+
+            bio = None
+            full_name = None
+            is_private = page.is_private
+            follower_count = None
+            following_count = None
+            post_count = None
+
+            # Extract from meta tags as backup
+            profile_pic_url = page.meta.get("og:image") or None
+            if profile_pic_url:
+                print(f"[Instagram] Found og:image: {profile_pic_url[:80]}...")
+            else:
+                print("[Instagram] No og:image found in HTML")
 
-                for i, img_url in enumerate(unique_images[:max_posts]):
-                    if i > 0:
-                        await asyncio.sleep(random.uniform(0.2, 0.4))
+            desc = page.meta.get("og:description")
+            if desc:
+                # Parse "X Followers, Y Following, Z Posts - BIO"
+                follower_count, bio = parse_og_description(desc)
 
-                    img_bytes = await self._download_image(client, img_url)
-                    if img_bytes and len(img_bytes) > 10000:  # Skip small images
-                        post_images.append(img_bytes)
+            title = page.meta.get("og:title")
+            if title:
+                full_name = name_from_title(title)
 
-                        # Add caption if available
-                        if i < len(captions_found):
-                            post_captions.append(captions_found[i])
-                        else:
-                            post_captions.append("")
+            # Post image URLs (display_url, thumbnail_src, CDN src/url/content)
+            image_urls = [
+                url for url in page.cdn_image_urls()
+                if '.jpg' in url or '.png' in url or 'scontent' in url
+            ]
 
-                        post_like_counts.append(0)
-                        post_comment_counts.append(0)
+            print(f"[Instagram] GraphQL found {len(image_urls)} image URLs")
 
-                print(f"[Instagram] GraphQL deep: {len(post_images)} posts")
+            # Also try to find caption data
+            captions_found = page.captions
 
-                # If we have profile pic but no posts, use profile pic for analysis
-                if profile_pic_bytes and len(post_images) == 0:
-                    print(f"[Instagram] Using profile pic as only image for analysis")
-                    post_images.append(profile_pic_bytes)
-                    post_captions.append(bio or "")
-                    post_like_counts.append(0)
-                    post_comment_counts.append(0)
-                # If we have profile pic and some posts but less than 3, add profile pic
-                elif profile_pic_bytes and len(post_images) < 3:
-                    print(f"[Instagram] Adding profile pic to supplement {len(post_images)} posts")
-                    post_images.insert(0, profile_pic_bytes)
-                    post_captions.insert(0, bio or "")
-                    post_like_counts.insert(0, 0)
-                    post_comment_counts.insert(0, 0)
+            # Download profile pic
+            profile_pic_bytes = None
+            if profile_pic_url:
+                await asyncio.sleep(random.uniform(0.2, 0.5))
+                profile_pic_bytes = await self._download_image(client, profile_pic_url)
 
-                if len(post_images) < 1:
-                    return self._error_profile(username, "insufficient_data")
+            # Remove duplicates and profile pic from images
+            unique_images = []
+            for url in image_urls:
+                if url not in unique_images:
+                    unique_images.append(url)
 
-                print(f"[Instagram] Final image count for analysis: {len(post_images)}")
+            # Download post images, with caption i attached to image i if available
+            posts = [
+                PostMedia(url=img_url, caption=captions_found[i] if i < len(captions_found) else "")
+                for i, img_url in enumerate(unique_images[:max_posts])
+            ]
+            batch = await self._download_posts(posts, limit=max_posts, min_bytes=10000)  # Skip small images
+            post_images = batch.images
+            post_captions = batch.captions
+            post_like_counts = batch.like_counts
+            post_comment_counts = batch.comment_counts
+
+            print(f"[Instagram] GraphQL deep: {len(post_images)} posts")
+
+            # If we have profile pic but no posts, use profile pic for analysis
+            if profile_pic_bytes and len(post_images) == 0:
+                print(f"[Instagram] Using profile pic as only image for analysis")
+                post_images.append(profile_pic_bytes)
+                post_captions.append(bio or "")
+                post_like_counts.append(0)
+                post_comment_counts.append(0)
+            # If we have profile pic and some posts but less than 3, add profile pic
+            elif profile_pic_bytes and len(post_images) < 3:
+                print(f"[Instagram] Adding profile pic to supplement {len(post_images)} posts")
+                post_images.insert(0, profile_pic_bytes)
+                post_captions.insert(0, bio or "")
+                post_like_counts.insert(0, 0)
+                post_comment_counts.insert(0, 0)
+
+            if len(post_images) < 1:
+                return self._error_profile(username, "insufficient_data")
+
+            print(f"[Instagram] Final image count for analysis: {len(post_images)}")
 
-                return InstagramProfile(
-                    username=username,
-                    full_name=full_name,
-                    bio=bio,
-                    profile_pic_url=profile_pic_url,
-                    profile_pic_bytes=profile_pic_bytes,
-                    post_images=post_images,
-                    follower_count=follower_count,
-                    following_count=following_count,
-                    post_count=post_count,
-                    is_private=is_private,
-                    error=None,
-                    post_captions=post_captions,
-                    post_like_counts=post_like_counts,
-                    post_comment_counts=post_comment_counts,
-                )
-            except Exception as e:
-                print(f"[Instagram] GraphQL deep exception: {e}")
-                return None
+            return InstagramProfile(
+                username=username,
+                full_name=full_name,
+                bio=bio,
+                profile_pic_url=profile_pic_url,
+                profile_pic_bytes=profile_pic_bytes,
+                post_images=post_images,
+                follower_count=follower_count,
+                following_count=following_count,
+                post_count=post_count,
+                is_private=is_private,
+                error=None,
+                post_captions=post_captions,
+                post_like_counts=post_like_counts,
+                post_comment_counts=post_comment_counts,
+            )
+        except Exception as e:
+            print(f"[Instagram] GraphQL deep exception: {e}")
+            return None
 
     async def _try_html_scrape_deep(self, username: str, max_posts: int = 9) -> Optional[InstagramProfile]:
         """Try scraping Instagram HTML page for deep analysis data."""
@@ -721,165 +820,115 @@ class InstagramScraper:
 
         await asyncio.sleep(random.uniform(0.5, 1.5))
 
-        async with httpx.AsyncClient(timeout=20.0, follow_redirects=True) as client:
-            try:
-                response = await client.get(url, headers=headers)
-                print(f"[Instagram] HTML scrape response: {response.status_code}")
-
-                if response.status_code != 200:
-                    return None
-
-                html = response.text
-
-                # Try to find JSON data in the page
-                # Look for _sharedData or similar patterns
-                patterns = [
-                    r'<script type="application/ld\+json"[^>]*>(\{.*?"@type"\s*:\s*"Person".*?\})</script>',
-                    r'window\._sharedData\s*=\s*(\{.*?\});</script>',
-                    r'"ProfilePage":\[(\{.*?\})\]',
-                ]
-
-                user_data = None
-                for pattern in patterns:
-                    match = re.search(pattern, html, re.DOTALL)
-                    if match:
-                        try:
-                            user_data = json.loads(match.group(1))
-                            print(f"[Instagram] Found user data via pattern")
-                            break
-                        except json.JSONDecodeError:
-                            continue
-
-                # Extract basic info from meta tags
-                bio = None
-                full_name = None
-                profile_pic_url = None
+        client = self.http.client
+        try:
+            response = await client.get(url, headers=headers, timeout=20.0, follow_redirects=True)
+            print(f"[Instagram] HTML scrape response: {response.status_code}")
 
-                # Meta description often contains bio
-                meta_desc = re.search(r'<meta name="description" content="([^"]*)"', html)
-                if meta_desc:
-                    bio = meta_desc.group(1)
-
-                # OG image for profile pic
-                og_image = re.search(r'<meta property="og:image" content="([^"]+)"', html)
-                if og_image:
-                    profile_pic_url = og_image.group(1)
-                    print(f"[Instagram] HTML scrape found og:image: {profile_pic_url[:80]}...")
-                else:
-                    print("[Instagram] HTML scrape: No og:image found")
-
-                # OG title for name
-                og_title = re.search(r'<meta property="og:title" content="([^"]+)"', html)
-                if og_title:
-                    title = og_title.group(1)
-                    name_match = re.search(r'^([^(@]+)', title)
-                    if name_match:
-                        full_name = name_match.group(1).strip()
-
-                # Look for image URLs in the HTML
-                image_urls = []
-
-                # Find Instagram CDN image URLs with multiple patterns
-                cdn_patterns = [
-                    r'"display_url"\s*:\s*"([^"]+)"',
-                    r'"thumbnail_src"\s*:\s*"([^"]+)"',
-                    r'"src"\s*:\s*"(https://[^"]*(?:cdninstagram|fbcdn|scontent)[^"]*)"',
-                    r'"url"\s*:\s*"(https://[^"]*(?:cdninstagram|fbcdn|scontent)[^"]*)"',
-                    r'content="(https://[^"]*(?:cdninstagram|fbcdn|scontent)[^"]*\.jpg[^"]*)"',
-                    r'"image"\s*:\s*\{"url"\s*:\s*"([^"]+)"',
-                    r'"contentUrl"\s*:\s*"([^"]+)"',
-                    r'srcset="([^"]+(?:cdninstagram|fbcdn|scontent)[^"]*)"',
-                ]
-
-                for pattern in cdn_patterns:
-                    matches = re.findall(pattern, html)
-                    for match in matches:
-                        clean_url = match.replace('\\u0026', '&').replace('\\/', '/').replace('&amp;', '&')
-                        # Take first URL if srcset
-                        if ' ' in clean_url:
-                            clean_url = clean_url.split(' ')[0]
-                        if clean_url not in image_urls:
-                            if 'cdninstagram' in clean_url or 'fbcdn' in clean_url or 'scontent' in clean_url:
-                                image_urls.append(clean_url)
-
-                print(f"[Instagram] HTML scrape found {len(image_urls)} image URLs")
-
-                # Debug: log a sample of the HTML to see what we're working with
-                if len(image_urls) == 0:
-                    # Look for any URLs that might be images
-                    all_urls = re.findall(r'https://[^"<>\s]+\.(?:jpg|jpeg|png|webp)', html)
-                    print(f"[Instagram] Found {len(all_urls)} potential image URLs in HTML")
-                    for url in all_urls[:5]:
-                        print(f"[Instagram] Sample URL: {url[:100]}...")
-                    image_urls = all_urls[:max_posts]
-
-                # Continue even if no image_urls - we might have profile_pic_url
-                if not profile_pic_url and not image_urls:
-                    print("[Instagram] HTML scrape: No images found at all")
-                    return self._error_profile(username, "no_images_found")
-
-                # Download images
-                profile_pic_bytes = None
-                if profile_pic_url:
-                    await asyncio.sleep(random.uniform(0.2, 0.5))
-                    profile_pic_bytes = await self._download_image(client, profile_pic_url)
+            if response.status_code != 200:
+                return None
 
-                post_images = []
-                post_captions = []
-                post_like_counts = []
-                post_comment_counts = []
+            html = response.text
 
-                # Download post images (skip first as it might be profile pic)
-                for i, img_url in enumerate(image_urls[:max_posts + 1]):
-                    if i > 0:
-                        await asyncio.sleep(random.uniform(0.2, 0.4))
-                    img_bytes = await self._download_image(client, img_url)
-                    if img_bytes and len(img_bytes) > 5000:  # Skip tiny images
-                        post_images.append(img_bytes)
-                        post_captions.append("")  # No captions from HTML scrape
-                        post_like_counts.append(0)
-                        post_comment_counts.append(0)
+            page = await self.cpu.run("html_extract", extract_page, html)
 
-                        if len(post_images) >= max_posts:
-                            break
+            # Look for embedded JSON (ld+json Person, _sharedData, ProfilePage)
+            user_data = page.person_ld_json() or page.shared_data() or page.profile_page()
+            if user_data:
+                print(f"[Instagram] Found user data via embedded JSON")
 
-                print(f"[Instagram] HTML scrape: {len(post_images)} posts found")
+            # Extract basic info from meta tags
+            full_name = None
 
-                # If we have profile pic but no posts, use profile pic
-                if profile_pic_bytes and len(post_images) == 0:
-                    print(f"[Instagram] HTML scrape: Using profile pic as only image")
-                    post_images.append(profile_pic_bytes)
-                    post_captions.append(bio or "")
-                    post_like_counts.append(0)
-                    post_comment_counts.append(0)
-                elif profile_pic_bytes and len(post_images) < 3:
-                    print(f"[Instagram] HTML scrape: Adding profile pic to {len(post_images)} posts")
-                    post_images.insert(0, profile_pic_bytes)
-                    post_captions.insert(0, bio or "")
-                    post_like_counts.insert(0, 0)
-                    post_comment_counts.insert(0, 0)
+            # Meta description often contains bio
+            bio = page.meta.get("description")
 
-                print(f"[Instagram] HTML scrape final count: {len(post_images)} images")
+            # OG image for profile pic
+            profile_pic_url = page.meta.get("og:image") or None
+            if profile_pic_url:
+                print(f"[Instagram] HTML scrape found og:image: {profile_pic_url[:80]}...")
+            else:
+                print("[Instagram] HTML scrape: No og:image found")
+
+            # OG title for name
+            title = page.meta.get("og:title")
+            if title:
+                full_name = name_from_title(title)
+
+            # Instagram CDN image URLs (srcset entries keep only their first URL)
+            image_urls = page.cdn_image_urls()
+
+            print(f"[Instagram] HTML scrape found {len(image_urls)} image URLs")
+
+            # Debug: log a sample of the HTML to see what we're working with
+            if len(image_urls) == 0:
+                # Look for any URLs that might be images
+                all_urls = page.any_image_urls()
+                print(f"[Instagram] Found {len(all_urls)} potential image URLs in HTML")
+                for url in all_urls[:5]:
+                    print(f"[Instagram] Sample URL: {url[:100]}...")
+                image_urls = all_urls[:max_posts]
+
+            # Continue even if no image_urls - we might have profile_pic_url
+            if not profile_pic_url and not image_urls:
+                print("[Instagram] HTML scrape: No images found at all")
+                return self._error_profile(username, "no_images_found")
 
-                return InstagramProfile(
-                    username=username,
-                    full_name=full_name,
-                    bio=bio,
-                    profile_pic_url=profile_pic_url,
-                    profile_pic_bytes=profile_pic_bytes,
-                    post_images=post_images,
-                    follower_count=None,
-                    following_count=None,
-                    post_count=None,
-                    is_private=False,
-                    error=None,
-                    post_captions=post_captions,
-                    post_like_counts=post_like_counts,
-                    post_comment_counts=post_comment_counts,
-                )
-            except Exception as e:
-                print(f"[Instagram] HTML scrape exception: {e}")
-                return None
+            # Download images
+            profile_pic_bytes = None
+            if profile_pic_url:
+                await asyncio.sleep(random.uniform(0.2, 0.5))
+                profile_pic_bytes = await self._download_image(client, profile_pic_url)
+
+            # Download post images (one extra as the first might be profile pic)
+            # No captions from HTML scrape
+            batch = await self._download_posts(
+                [PostMedia(url=img_url) for img_url in image_urls[:max_posts + 1]],
+                limit=max_posts,
+                min_bytes=5000,  # Skip tiny images
+            )
+            post_images = batch.images
+            post_captions = batch.captions
+            post_like_counts = batch.like_counts
+            post_comment_counts = batch.comment_counts
+
+            print(f"[Instagram] HTML scrape: {len(post_images)} posts found")
+
+            # If we have profile pic but no posts, use profile pic
+            if profile_pic_bytes and len(post_images) == 0:
+                print(f"[Instagram] HTML scrape: Using profile pic as only image")
+                post_images.append(profile_pic_bytes)
+                post_captions.append(bio or "")
+                post_like_counts.append(0)
+                post_comment_counts.append(0)
+            elif profile_pic_bytes and len(post_images) < 3:
+                print(f"[Instagram] HTML scrape: Adding profile pic to {len(post_images)} posts")
+                post_images.insert(0, profile_pic_bytes)
+                post_captions.insert(0, bio or "")
+                post_like_counts.insert(0, 0)
+                post_comment_counts.insert(0, 0)
+
+            print(f"[Instagram] HTML scrape final count: {len(post_images)} images")
+
+            return InstagramProfile(
+                username=username,
+                full_name=full_name,
+                bio=bio,
+                profile_pic_url=profile_pic_url,
+                profile_pic_bytes=profile_pic_bytes,
+                post_images=post_images,
+                follower_count=None,
+                following_count=None,
+                post_count=None,
+                is_private=False,
+                error=None,
+                post_captions=post_captions,
+                post_like_counts=post_like_counts,
+                post_comment_counts=post_comment_counts,
+            )
+        except Exception as e:
+            print(f"[Instagram] HTML scrape exception: {e}")
+            return None
 
     async def _try_web_profile_info_deep(self, username: str, max_posts: int = 9) -> Optional[InstagramProfile]:
         """Try Instagram's web_profile_info endpoint for deep analysis."""
@@ -911,118 +960,23 @@ class InstagramScraper:
         # Add small random delay to seem more human
         await asyncio.sleep(random.uniform(0.5, 1.5))
 
-        async with httpx.AsyncClient(timeout=20.0, follow_redirects=True) as client:
-            try:
-                response = await client.get(url, headers=headers)
-                print(f"[Instagram] Deep API response: {response.status_code}")
-
-                if response.status_code == 429:
-                    print("[Instagram] Rate limited, waiting...")
-                    await asyncio.sleep(3)
-                    return None
-
-                if response.status_code != 200:
-                    return None
-
-                data = response.json()
-                user = data.get("data", {}).get("user")
-
-                if not user:
-                    return self._error_profile(username, "user_not_found")
-
-                profile_pic_url = user.get("profile_pic_url_hd") or user.get("profile_pic_url")
-                is_private = user.get("is_private", False)
-
-                # Download profile pic with delay
-                await asyncio.sleep(random.uniform(0.3, 0.8))
-                profile_pic_bytes = await self._download_image(client, profile_pic_url)
-
-                # Initialize deep analysis data
-                post_images = []
-                post_captions = []
-                post_like_counts = []
-                post_comment_counts = []
-
-                if not is_private:
-                    edges = user.get("edge_owner_to_timeline_media", {}).get("edges", [])
-                    for i, edge in enumerate(edges[:max_posts]):
-                        node = edge.get("node", {})
-
-                        # Get image URL
-                        img_url = node.get("display_url")
-                        if img_url:
-                            # Small delay between image downloads
-                            if i > 0:
-                                await asyncio.sleep(random.uniform(0.2, 0.5))
-
-                            img_bytes = await self._download_image(client, img_url)
-                            if img_bytes:
-                                post_images.append(img_bytes)
-
-                                # Get caption
-                                caption_edges = node.get("edge_media_to_caption", {}).get("edges", [])
-                                caption = ""
-                                if caption_edges:
-                                    caption = caption_edges[0].get("node", {}).get("text", "")
-                                post_captions.append(caption)
-
-                                # Get like count
-                                like_count = node.get("edge_liked_by", {}).get("count", 0)
-                                if like_count == 0:
-                                    like_count = node.get("edge_media_preview_like", {}).get("count", 0)
-                                post_like_counts.append(like_count)
-
-                                # Get comment count
-                                comment_count = node.get("edge_media_to_comment", {}).get("count", 0)
-                                if comment_count == 0:
-                                    comment_count = node.get("edge_media_preview_comment", {}).get("count", 0)
-                                post_comment_counts.append(comment_count)
-
-                if not profile_pic_bytes and not post_images:
-                    return self._error_profile(username, "no_images_found")
-
-                print(f"[Instagram] Deep fetch: {len(post_images)} posts, {len(post_captions)} captions")
+        client = self.http.client
+        try:
+            response = await client.get(url, headers=headers, timeout=20.0, follow_redirects=True)
+            print(f"[Instagram] Deep API response: {response.status_code}")
 
-                return InstagramProfile(
-                    username=username,
-                    full_name=user.get("full_name"),
-                    bio=user.get("biography"),
-                    profile_pic_url=profile_pic_url,
-                    profile_pic_bytes=profile_pic_bytes,
-                    post_images=post_images,
-                    follower_count=user.get("edge_followed_by", {}).get("count"),
-                    following_count=user.get("edge_follow", {}).get("count"),
-                    post_count=user.get("edge_owner_to_timeline_media", {}).get("count"),
-                    is_private=is_private,
-                    error=None,
-                    post_captions=post_captions,
-                    post_like_counts=post_like_counts,
-                    post_comment_counts=post_comment_counts,
-                )
-            except Exception as e:
-                print(f"[Instagram] Deep fetch exception: {e}")
+            if response.status_code == 429:
+                print("[Instagram] Rate limited, waiting...")
+                await asyncio.sleep(3)
                 return None
 
-    async def _try_web_profile_info(self, username: str) -> Optional[InstagramProfile]:
-        """Try Instagram's web_profile_info endpoint."""
-        url = f"https://www.instagram.com/api/v1/users/web_profile_info/?username={username}"
-
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/121.0.0.0 Safari/537.36",
-            "Accept": "*/*",
-            "Accept-Language": "en-US,en;q=0.9",
-            "X-IG-App-ID": "936619743392459",
-            "X-Requested-With": "XMLHttpRequest",
-            "Referer": f"https://www.instagram.com/{username}/",
-        }
-
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url, headers=headers)
+            if response.status_code == 404:
+                return self._error_profile(username, "user_not_found", confirmed=True)
 
             if response.status_code != 200:
                 return None
 
-            data = response.json()
+            data = await self.cpu.run("json_decode", json.loads, response.content)
             user = data.get("data", {}).get("user")
 
             if not user:
@@ -1031,23 +985,29 @@ class InstagramScraper:
             profile_pic_url = user.get("profile_pic_url_hd") or user.get("profile_pic_url")
             is_private = user.get("is_private", False)
 
-            # Download profile pic
+            # Download profile pic with delay
+            await asyncio.sleep(random.uniform(0.3, 0.8))
             profile_pic_bytes = await self._download_image(client, profile_pic_url)
 
-            # Get post images if public
+            # Initialize deep analysis data
             post_images = []
+            post_captions = []
+            post_like_counts = []
+            post_comment_counts = []
+
             if not is_private:
                 edges = user.get("edge_owner_to_timeline_media", {}).get("edges", [])
-                for edge in edges[:3]:
-                    img_url = edge.get("node", {}).get("display_url")
-                    if img_url:
-                        img_bytes = await self._download_image(client, img_url)
-                        if img_bytes:
-                            post_images.append(img_bytes)
+                batch = await self._download_posts(self._timeline_posts(edges[:max_posts]), limit=max_posts)
+                post_images = batch.images
+                post_captions = batch.captions
+                post_like_counts = batch.like_counts
+                post_comment_counts = batch.comment_counts
 
             if not profile_pic_bytes and not post_images:
                 return self._error_profile(username, "no_images_found")
 
+            print(f"[Instagram] Deep fetch: {len(post_images)} posts, {len(post_captions)} captions")
+
             return InstagramProfile(
                 username=username,
                 full_name=user.get("full_name"),
@@ -1059,8 +1019,76 @@ class InstagramScraper:
                 following_count=user.get("edge_follow", {}).get("count"),
                 post_count=user.get("edge_owner_to_timeline_media", {}).get("count"),
                 is_private=is_private,
-                error=None
+                error=None,
+                post_captions=post_captions,
+                post_like_counts=post_like_counts,
+                post_comment_counts=post_comment_counts,
             )
+        except Exception as e:
+            print(f"[Instagram] Deep fetch exception: {e}")
+            return None
+
+    async def _try_web_profile_info(self, username: str) -> Optional[InstagramProfile]:
+        """Try Instagram's web_profile_info endpoint."""
+        url = f"https://www.instagram.com/api/v1/users/web_profile_info/?username={username}"
+
+        headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/121.0.0.0 Safari/537.36",
+            "Accept": "*/*",
+            "Accept-Language": "en-US,en;q=0.9",
+            "X-IG-App-ID": "936619743392459",
+            "X-Requested-With": "XMLHttpRequest",
+            "Referer": f"https://www.instagram.com/{username}/",
+        }
+
+        client = self.http.client
+        response = await client.get(url, headers=headers, timeout=10.0)
+
+        if response.status_code == 404:
+            return self._error_profile(username, "user_not_found", confirmed=True)
+
+        if response.status_code != 200:
+            return None
+
+        data = await self.cpu.run("json_decode", json.loads, response.content)
+        user = data.get("data", {}).get("user")
+
+        if not user:
+            return self._error_profile(username, "user_not_found")
+
+        profile_pic_url = user.get("profile_pic_url_hd") or user.get("profile_pic_url")
+        is_private = user.get("is_private", False)
+
+        # Download profile pic
+        profile_pic_bytes = await self._download_image(client, profile_pic_url)
+
+        # Get post images if public
+        post_images = []
+        if not is_private:
+            edges = user.get("edge_owner_to_timeline_media", {}).get("edges", [])
+            for edge in edges[:3]:
+                img_url = edge.get("node", {}).get("display_url")
+                if img_url:
+                    img_bytes = await self._download_image(client, img_url)
+                    if img_bytes:
+                        post_images.append(img_bytes)
+
+        if not profile_pic_bytes and not post_images:
+            return self._error_profile(username, "no_images_found")
+
+        return InstagramProfile(
+            username=username,
+            full_name=user.get("full_name"),
+            bio=user.get("biography"),
+            profile_pic_url=profile_pic_url,
+            profile_pic_bytes=profile_pic_bytes,
+            post_images=post_images,
+            follower_count=user.get("edge_followed_by", {}).get("count"),
+            following_count=user.get("edge_follow", {}).get("count"),
+            post_count=user.get("edge_owner_to_timeline_media", {}).get("count"),
+            is_private=is_private,
+            error=None
+        )
 
     async def _try_graphql_api(self, username: str) -> Optional[InstagramProfile]:
         """Try Instagram's GraphQL endpoint."""
@@ -1072,51 +1100,46 @@ class InstagramScraper:
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
         }
 
-        async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
-            response = await client.get(page_url, headers=headers)
+        client = self.http.client
+        response = await client.get(page_url, headers=headers, timeout=10.0, follow_redirects=True)
 
-            if response.status_code != 200:
-                return None
+        if response.status_code != 200:
+            return None
 
-            html = response.text
+        html = response.text
 
-            # Try to find shared data JSON
-            match = re.search(r'window\._sharedData\s*=\s*({.+?});</script>', html)
-            if match:
-                try:
-                    shared_data = json.loads(match.group(1))
-                    user = shared_data.get("entry_data", {}).get("ProfilePage", [{}])[0].get("graphql", {}).get("user")
-                    if user:
-                        return await self._parse_user_data(client, username, user)
-                except:
-                    pass
+        page = await self.cpu.run("html_extract", extract_page, html)
 
-            # Try additional data JSON
-            match = re.search(r'"user":\s*({[^}]+?"username":\s*"' + username + '"[^}]+})', html)
-            if match:
-                try:
-                    user_json = match.group(1)
-                    # This is partial, try to extract what we can
-                    pic_match = re.search(r'"profile_pic_url(?:_hd)?":"([^"]+)"', html)
-                    if pic_match:
-                        pic_url = pic_match.group(1).replace("\\u0026", "&")
-                        pic_bytes = await self._download_image(client, pic_url)
-                        if pic_bytes:
-                            return InstagramProfile(
-                                username=username,
-                                full_name=None,
-                                bio=None,
-                                profile_pic_url=pic_url,
-                                profile_pic_bytes=pic_bytes,
-                                post_images=[],
-                                follower_count=None,
-                                following_count=None,
-                                post_count=None,
-                                is_private='"is_private":true' in html,
-                                error=None
-                            )
-                except:
-                    pass
+        # Try to find shared data JSON
+        shared_data = page.shared_data()
+        if shared_data:
+            try:
+                user = shared_data.get("entry_data", {}).get("ProfilePage", [{}])[0].get("graphql", {}).get("user")
+                if user:
+                    return await self._parse_user_data(client, username, user)
+            except:
+                pass
+
+        # Partial user data on the page, take the profile pic at least
+        if f'"username":"{username}"' in html or f'"username": "{username}"' in html:
+            pic_urls = [url for url in page.profile_pic_urls if url != page.meta.get("og:image")]
+            if pic_urls:
+                pic_url = pic_urls[0]
+                pic_bytes = await self._download_image(client, pic_url)
+                if pic_bytes:
+                    return InstagramProfile(
+                        username=username,
+                        full_name=None,
+                        bio=None,
+                        profile_pic_url=pic_url,
+                        profile_pic_bytes=pic_bytes,
+                        post_images=[],
+                        follower_count=None,
+                        following_count=None,
+                        post_count=None,
+                        is_private=page.is_private,
+                        error=None
+                    )
 
         return None
 
@@ -1130,14 +1153,14 @@ class InstagramScraper:
             "Accept-Language": "en-US,en;q=0.9",
         }
 
-        async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
-            response = await client.get(url, headers=headers)
+        client = self.http.client
+        response = await client.get(url, headers=headers, timeout=10.0, follow_redirects=True)
 
-            if response.status_code != 200:
-                return None
+        if response.status_code != 200:
+            return None
 
-            html = response.text
-            return await self._extract_from_html(client, username, html)
+        html = response.text
+        return await self._extract_from_html(client, username, html)
 
     async def _try_desktop_page(self, username: str) -> Optional[InstagramProfile]:
         """Try desktop Instagram page with various extraction methods."""
@@ -1150,42 +1173,32 @@ class InstagramScraper:
             "Cache-Control": "no-cache",
         }
 
-        async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
-            response = await client.get(url, headers=headers)
+        client = self.http.client
+        response = await client.get(url, headers=headers, timeout=10.0, follow_redirects=True)
 
-            if response.status_code != 200:
-                return None
+        if response.status_code != 200:
+            return None
 
-            html = response.text
-            return await self._extract_from_html(client, username, html)
+        html = response.text
+        return await self._extract_from_html(client, username, html)
 
     async def _extract_from_html(self, client: httpx.AsyncClient, username: str, html: str) -> Optional[InstagramProfile]:
         """Extract profile data from HTML using multiple patterns."""
 
+        page = await self.cpu.run("html_extract", extract_page, html)
+
         # Check for login wall
-        if 'loginForm' in html.lower() or '"require_login":true' in html:
+        if page.login_required:
             return self._error_profile(username, "login_required")
 
         # Check for 404
-        if "Sorry, this page" in html or "Page Not Found" in html:
+        if page.not_found:
             return self._error_profile(username, "user_not_found")
 
-        is_private = "This account is private" in html or '"is_private":true' in html
-
-        # Try multiple patterns for profile pic
-        profile_pic_url = None
-        profile_pic_patterns = [
-            r'<meta property="og:image" content="([^"]+)"',
-            r'"profile_pic_url_hd":"([^"]+)"',
-            r'"profile_pic_url":"([^"]+)"',
-            r'profilePicUrl["\']?\s*[:=]\s*["\']([^"\']+)["\']',
-        ]
+        is_private = page.is_private
 
-        for pattern in profile_pic_patterns:
-            match = re.search(pattern, html)
-            if match:
-                profile_pic_url = match.group(1).replace("\\u0026", "&").replace("\\/", "/")
-                break
+        # og:image, then profile_pic_url_hd, profile_pic_url, profilePicUrl
+        profile_pic_url = page.profile_pic_url
 
         if not profile_pic_url:
             return self._error_profile(username, "no_profile_pic")
@@ -1199,21 +1212,10 @@ class InstagramScraper:
         # Try to get post images
         post_images = []
         if not is_private:
-            post_patterns = [
-                r'"display_url":"([^"]+)"',
-                r'"src":"(https://[^"]*cdninstagram[^"]*\.jpg[^"]*)"',
+            candidates = page.display_urls + [
+                url for url in page.media_urls if 'cdninstagram' in url and '.jpg' in url
             ]
-
-            found_urls = set()
-            for pattern in post_patterns:
-                for match in re.finditer(pattern, html):
-                    url = match.group(1).replace("\\u0026", "&").replace("\\/", "/")
-                    if "150x150" not in url and "s150x150" not in url and url not in found_urls:
-                        found_urls.add(url)
-                        if len(found_urls) >= 3:
-                            break
-                if len(found_urls) >= 3:
-                    break
+            found_urls = [url for url in candidates if "150x150" not in url][:3]
 
             for url in list(found_urls)[:3]:
                 img_bytes = await self._download_image(client, url)
@@ -1222,15 +1224,10 @@ class InstagramScraper:
 
         # Extract metadata
         full_name = None
-        name_match = re.search(r'<meta property="og:title" content="([^"]+)"', html)
-        if name_match:
-            full_name = name_match.group(1)
-            full_name = re.sub(r'\s*[•\|@].*$', '', full_name).strip()
+        if page.meta.get("og:title"):
+            full_name = strip_title_suffix(page.meta["og:title"])
 
-        bio = None
-        bio_match = re.search(r'<meta property="og:description" content="([^"]+)"', html)
-        if bio_match:
-            bio = bio_match.group(1)
+        bio = page.meta.get("og:description") or None
 
         return InstagramProfile(
             username=username,
@@ -1280,8 +1277,59 @@ class InstagramScraper:
             error=None
         )
 
-    async def _download_image(self, client: httpx.AsyncClient, url: Optional[str]) -> Optional[bytes]:
-        """Download image from URL."""
+    @staticmethod
+    def _timeline_posts(edges: List[dict]) -> List[PostMedia]:
+        """Build download items (image URL + caption/likes/comments) from timeline edges."""
+        posts = []
+        for edge in edges:
+            node = edge.get("node", {})
+
+            # Get image URL
+            img_url = node.get("display_url")
+            if not img_url:
+                continue
+
+            # Get caption
+            caption_edges = node.get("edge_media_to_caption", {}).get("edges", [])
+            caption = ""
+            if caption_edges:
+                caption = caption_edges[0].get("node", {}).get("text", "")
+
+            # Get like count
+            like_count = node.get("edge_liked_by", {}).get("count", 0)
+            if like_count == 0:
+                like_count = node.get("edge_media_preview_like", {}).get("count", 0)
+
+            # Get comment count
+            comment_count = node.get("edge_media_to_comment", {}).get("count", 0)
+            if comment_count == 0:
+                comment_count = node.get("edge_media_preview_comment", {}).get("count", 0)
+
+            posts.append(PostMedia(
+                url=img_url,
+                caption=caption,
+                like_count=like_count,
+                comment_count=comment_count,
+            ))
+        return posts
+
+    async def _download_posts(self, posts: List[PostMedia], limit: int, min_bytes: int = 1000) -> PostBatch:
+        """Download post images concurrently, keeping metadata aligned and in order."""
+        client = self.http.client
+        return await self.downloader.download(
+            lambda url: self._download_image(client, url, min_bytes=min_bytes),
+            posts,
+            limit=limit,
+        )
+
+    async def _download_image(
+        self,
+        client: httpx.AsyncClient,
+        url: Optional[str],
+        min_bytes: int = 1000,
+        max_bytes: Optional[int] = None,
+    ) -> Optional[ImageHandle]:
+        """Stream image from URL into the image store, skipping anything outside the size bounds."""
         if not url:
             return None
 
@@ -1292,22 +1340,31 @@ class InstagramScraper:
                 "Referer": "https://www.instagram.com/",
                 "Accept-Language": "en-US,en;q=0.9",
             }
-            response = await client.get(url, headers=headers, timeout=15.0)
-            if response.status_code == 200:
-                content_len = len(response.content)
-                if content_len > 1000:
-                    print(f"[Instagram] Downloaded image: {content_len} bytes")
-                    return response.content
-                else:
-                    print(f"[Instagram] Image too small: {content_len} bytes")
-            else:
-                print(f"[Instagram] Image download status: {response.status_code}")
+            data = await self.downloader.fetch(client, url, headers=headers, min_bytes=min_bytes, max_bytes=max_bytes)
+            if data:
+                return await self.images.aput(data)
         except Exception as e:
             print(f"[Instagram] Image download failed: {e}")
 
         return None
 
-    def _error_profile(self, username: str, error: str) -> InstagramProfile:
+    def _private_profile(self, username: str) -> InstagramProfile:
+        """Create an image-less profile for a known private account."""
+        return InstagramProfile(
+            username=username,
+            full_name=None,
+            bio=None,
+            profile_pic_url=None,
+            profile_pic_bytes=None,
+            post_images=[],
+            follower_count=None,
+            following_count=None,
+            post_count=None,
+            is_private=True,
+            error=None
+        )
+
+    def _error_profile(self, username: str, error: str, confirmed: bool = False) -> InstagramProfile:
         """Create an error profile."""
         return InstagramProfile(
             username=username,
@@ -1320,7 +1377,8 @@ class InstagramScraper:
             following_count=None,
             post_count=None,
             is_private=True,
-            error=error
+            error=error,
+            error_confirmed=confirmed,
         )
 
 
@@ -1331,5 +1389,18 @@ _instagram_scraper: Optional[InstagramScraper] = None
 def get_instagram_scraper() -> InstagramScraper:
     global _instagram_scraper
     if _instagram_scraper is None:
-        _instagram_scraper = InstagramScraper()
+        settings = get_settings()
+        _instagram_scraper = InstagramScraper(
+            http=get_instagram_http_pool(),
+            downloader=get_image_downloader(),
+            browsers=get_browser_pool(),
+            images=get_image_store(),
+            cache=get_profile_cache(),
+            negative_cache=get_negative_cache(),
+            strategy_stats=get_strategy_stats(),
+            cpu=get_cpu_executor(),
+            strategy_mode=settings.scrape_strategy_mode,
+            hedge_delay=settings.scrape_hedge_delay_seconds,
+            adaptive=settings.scrape_strategy_adaptive,
+        )
     return _instagram_scraper
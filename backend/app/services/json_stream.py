@@ -0,0 +1,429 @@
+import json
+from typing import Any, Dict, List, Optional, Set, Tuple, Type, Union, get_args, get_origin
+from pydantic import BaseModel
+
+
+_WHITESPACE = " \t\r\n"
+_STRUCTURAL = ",:{}[]"
+_ESCAPES = {'"': '"', "'": "'", "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+# Python-style literals models sometimes emit instead of JSON ones
+_LITERALS = {"True": True, "False": False, "None": None, "NaN": None, "undefined": None}
+
+
+class _Frame:
+    """An open object or array and, for objects, the key awaiting its value."""
+    __slots__ = ("container", "key")
+
+    def __init__(self, container: Union[Dict[str, Any], List[Any]]):
+        self.container = container
+        self.key: Optional[str] = None
+
+
+class IncrementalJsonParser:
+    """
+    Tolerant, single-pass parser for a JSON object arriving in chunks.
+    Each top-level field is returned from `feed` as soon as its value is
+    complete; `finish` returns the whole object. Recovers from text around
+    the object, trailing or missing commas, raw newlines and unescaped
+    quotes inside strings, single quotes, Python literals and truncated
+    output. Every repair applied is recorded in `repairs`.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.repairs: Set[str] = set()
+        self._root: Optional[Dict[str, Any]] = None
+        self._stack: List[_Frame] = []
+        self._closed = False
+        self._last = ""
+        # String token state
+        self._string: Optional[List[str]] = None
+        self._quote = '"'
+        self._escape = False
+        self._unicode: Optional[str] = None
+        self._maybe_end: Optional[str] = None
+        # Bare token (number / literal) state
+        self._scalar: Optional[List[str]] = None
+        self._completed: List[Tuple[str, Any]] = []
+
+    @property
+    def fields(self) -> Dict[str, Any]:
+        """Top-level fields completed so far."""
+        return dict(self._root or {})
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Add a chunk; returns the (name, value) top-level fields it completed."""
+        self.text += chunk
+        self._completed = []
+        for c in chunk:
+            self._char(c)
+        return self._completed
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """The parsed object, closing anything the output left open; None if there was no object."""
+        if self._root is None:
+            return None
+        if self._maybe_end is not None:
+            # Cut off after a closing quote: take it as the end of the string
+            pending, self._maybe_end = self._maybe_end, None
+            self._end_string()
+            for ch in pending:
+                self._char(ch)
+        if not self._closed:
+            self.repairs.add("truncated")
+            if self._string is not None:
+                # A cut-off string value is kept; a cut-off key is dropped
+                self._end_string()
+            elif self._scalar is not None:
+                self._end_scalar("")
+            while self._stack:
+                self._close("}" if isinstance(self._stack[-1].container, dict) else "]")
+        return self._root
+
+    # -- character handling --
+
+    def _char(self, c: str) -> None:
+        if self._closed:
+            if c not in _WHITESPACE:
+                self.repairs.add("surrounding_text")
+            return
+
+        if self._root is None:
+            if c == "{":
+                self._root = {}
+                self._stack.append(_Frame(self._root))
+                self._last = c
+            elif c not in _WHITESPACE:
+                self.repairs.add("surrounding_text")
+            return
+
+        if self._string is not None:
+            self._string_char(c)
+            return
+
+        if self._scalar is not None:
+            if c in _WHITESPACE or c in _STRUCTURAL or c in "\"'":
+                self._end_scalar(c)
+            else:
+                self._scalar.append(c)
+                return
+
+        if c in _WHITESPACE:
+            return
+        if c in "\"'":
+            if c == "'":
+                self.repairs.add("single_quotes")
+            self._string = []
+            self._quote = c
+        elif c == "{" or c == "[":
+            self._stack.append(_Frame({} if c == "{" else []))
+        elif c == "}" or c == "]":
+            if self._last == ",":
+                self.repairs.add("trailing_comma")
+            self._close(c)
+        elif c in ",:":
+            pass
+        else:
+            self._scalar = [c]
+        self._last = c
+
+    def _string_char(self, c: str) -> None:
+        if self._maybe_end is not None:
+            # A closing quote only ends the string if structure follows it;
+            # text after it is held back until that is clear, then replayed
+            self._maybe_end += c
+            ends = self._quote_ends_string(self._maybe_end)
+            if ends is None:
+                return
+            pending, self._maybe_end = self._maybe_end, None
+            if ends:
+                self._end_string()
+                for ch in pending:
+                    self._char(ch)
+            else:
+                self.repairs.add("unescaped_quote")
+                self._string.append(self._quote)
+                for ch in pending:
+                    self._string_char(ch)
+            return
+
+        if self._unicode is not None:
+            self._unicode += c
+            if len(self._unicode) == 4:
+                try:
+                    self._string.append(chr(int(self._unicode, 16)))
+                except ValueError:
+                    self.repairs.add("bad_escape")
+                    self._string.append("\\u" + self._unicode)
+                self._unicode = None
+            return
+
+        if self._escape:
+            self._escape = False
+            if c == "u":
+                self._unicode = ""
+            elif c in _ESCAPES:
+                self._string.append(_ESCAPES[c])
+            else:
+                self.repairs.add("bad_escape")
+                self._string.append("\\" + c)
+            return
+
+        if c == "\\":
+            self._escape = True
+        elif c == self._quote:
+            self._maybe_end = ""
+        else:
+            if c < " ":
+                self.repairs.add("control_char")
+            self._string.append(c)
+
+    def _quote_ends_string(self, after: str) -> Optional[bool]:
+        """
+        Whether the quote before `after` closed the string, or None while
+        that can't be told yet. Another string right after it means a
+        missing comma if it starts a new line, is followed by `:` (a key,
+        where the open string was a value) or, in an array, is followed
+        by the next element or the end.
+        """
+        rest = after.lstrip(_WHITESPACE)
+        if not rest:
+            return None
+        if rest[0] in ",:}]":
+            return True
+        if rest[0] not in "\"'":
+            return False
+        frame = self._stack[-1]
+        in_array = isinstance(frame.container, list)
+        if "\n" in after[:len(after) - len(rest)]:
+            self.repairs.add("missing_comma")
+            return True
+        if not in_array and frame.key is None:
+            return False
+
+        # Find the end of the following string
+        i = 1
+        while i < len(rest):
+            if rest[i] == "\\":
+                i += 2
+                continue
+            if rest[i] == "\n":
+                return False
+            if rest[i] == rest[0]:
+                break
+            i += 1
+        else:
+            return None
+        tail = rest[i + 1:].lstrip(_WHITESPACE)
+        if not tail:
+            return None
+        if (tail[0] in ",]\"'") if in_array else tail[0] == ":":
+            self.repairs.add("missing_comma")
+            return True
+        return False
+
+    # -- token completion --
+
+    def _end_string(self) -> None:
+        value = "".join(self._string)
+        if self._unicode is not None or self._escape:
+            # Truncated inside an escape
+            self._unicode = None
+            self._escape = False
+        # Join any surrogate pairs left by \u escapes
+        try:
+            value = value.encode("utf-16", "surrogatepass").decode("utf-16")
+        except UnicodeError:
+            pass
+        self._string = None
+        self._maybe_end = None
+        self._last = '"'
+
+        frame = self._stack[-1]
+        if isinstance(frame.container, dict) and frame.key is None:
+            frame.key = value
+        else:
+            self._attach(value)
+
+    def _end_scalar(self, delimiter: str) -> None:
+        raw = "".join(self._scalar).strip()
+        self._scalar = None
+        frame = self._stack[-1]
+
+        if isinstance(frame.container, dict) and frame.key is None:
+            if delimiter == ":":
+                self.repairs.add("unquoted_key")
+                frame.key = raw
+            else:
+                self.repairs.add("dropped_token")
+            return
+
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            if raw in _LITERALS:
+                self.repairs.add("python_literal")
+                value = _LITERALS[raw]
+            else:
+                self.repairs.add("dropped_token")
+                frame.key = None
+                return
+        self._attach(value)
+
+    def _close(self, c: str) -> None:
+        frame = self._stack.pop()
+        if (c == "}") != isinstance(frame.container, dict):
+            self.repairs.add("mismatched_bracket")
+        if isinstance(frame.container, dict) and frame.key is not None:
+            # Key with no value
+            self.repairs.add("dropped_token")
+        if self._stack:
+            self._attach(frame.container)
+        else:
+            self._closed = True
+
+    def _attach(self, value: Any) -> None:
+        frame = self._stack[-1]
+        if isinstance(frame.container, list):
+            frame.container.append(value)
+            return
+        if frame.key is None:
+            self.repairs.add("dropped_token")
+            return
+        frame.container[frame.key] = value
+        if len(self._stack) == 1:
+            self._completed.append((frame.key, value))
+        frame.key = None
+
+
+def _schema_fields(model: Type[BaseModel]) -> Dict[str, Tuple[Any, bool]]:
+    """Field name -> (annotation, required) for the model fields the model output fills."""
+    return {
+        name: (info.annotation, info.is_required())
+        for name, info in model.model_fields.items()
+        if name not in ("id", "created_at")
+    }
+
+
+def _coerce(value: Any, annotation: Any) -> Tuple[Any, bool]:
+    """Coerce a value to a str / float / List[str] field; returns (value, ok)."""
+    if get_origin(annotation) in (list, List):
+        item_type = (get_args(annotation) or (str,))[0]
+        if isinstance(value, str):
+            value = [value]
+        if not isinstance(value, list):
+            return value, False
+        if item_type is str and not all(isinstance(item, str) for item in value):
+            return [
+                item if isinstance(item, str) else json.dumps(item, ensure_ascii=False)
+                for item in value
+                if item is not None
+            ], False
+        return value, True
+    if annotation is str:
+        if isinstance(value, str):
+            return value, True
+        if isinstance(value, (int, float, bool)) or value is None:
+            return "" if value is None else str(value), False
+        return json.dumps(value, ensure_ascii=False), False
+    if annotation is float:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value), True
+        try:
+            return float(str(value).strip().rstrip("%")), False
+        except ValueError:
+            return 0.0, False
+    return value, True
+
+
+class ModelOutputParser:
+    """
+    Turns model output into a result dict with IncrementalJsonParser, checks
+    it against a response model's fields, and counts how often repairs and
+    schema fixes were needed.
+    """
+
+    def __init__(self):
+        self.parses = 0
+        self.clean = 0
+        self.repaired = 0
+        self.failures = 0
+        self.schema_fixes = 0
+        self.missing_fields = 0
+        self.repairs: Dict[str, int] = {}
+        self._schemas: Dict[Type[BaseModel], Dict[str, Tuple[Any, bool]]] = {}
+
+    def stream(self) -> IncrementalJsonParser:
+        """A parser to feed streamed chunks into; pass it to `finish` at the end."""
+        return IncrementalJsonParser()
+
+    def parse(self, text: str, schema: Type[BaseModel]) -> Dict[str, Any]:
+        """Parse complete model output."""
+        parser = IncrementalJsonParser()
+        parser.feed(text)
+        return self.finish(parser, schema)
+
+    def finish(self, parser: IncrementalJsonParser, schema: Type[BaseModel]) -> Dict[str, Any]:
+        """Finish a fed parser and check the result; raises ValueError if there is no JSON object."""
+        self.parses += 1
+        result = parser.finish()
+        if result is None:
+            self.failures += 1
+            print(f"[ModelOutput] No JSON object in output: {parser.text[:200]!r}")
+            raise ValueError("Model output contained no JSON object")
+
+        # Surrounding prose or code fences are normal and don't count as a repair
+        repairs = parser.repairs - {"surrounding_text"}
+        if repairs:
+            self.repaired += 1
+            for repair in repairs:
+                self.repairs[repair] = self.repairs.get(repair, 0) + 1
+            print(f"[ModelOutput] Repaired output: {', '.join(sorted(repairs))}")
+        else:
+            self.clean += 1
+
+        return self._check(result, schema)
+
+    def _check(self, result: Dict[str, Any], schema: Type[BaseModel]) -> Dict[str, Any]:
+        """Coerce fields to the schema's types; missing ones are left to the response defaults."""
+        if schema not in self._schemas:
+            self._schemas[schema] = _schema_fields(schema)
+
+        fixed = []
+        for name, (annotation, required) in self._schemas[schema].items():
+            if name not in result:
+                if required:
+                    self.missing_fields += 1
+                    fixed.append(f"-{name}")
+                continue
+            result[name], ok = _coerce(result[name], annotation)
+            if not ok:
+                fixed.append(name)
+        if fixed:
+            self.schema_fixes += 1
+            print(f"[ModelOutput] {schema.__name__} schema fixes: {', '.join(fixed)}")
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Parse outcomes and repair counts by kind."""
+        return {
+            "parses": self.parses,
+            "clean": self.clean,
+            "repaired": self.repaired,
+            "failures": self.failures,
+            "repair_rate": round(self.repaired / self.parses, 3) if self.parses else 0.0,
+            "repairs": dict(self.repairs),
+            "schema_fixes": self.schema_fixes,
+            "missing_fields": self.missing_fields,
+        }
+
+
+# Singleton
+_model_output_parser: Optional[ModelOutputParser] = None
+
+
+def get_model_output_parser() -> ModelOutputParser:
+    global _model_output_parser
+    if _model_output_parser is None:
+        _model_output_parser = ModelOutputParser()
+    return _model_output_parser
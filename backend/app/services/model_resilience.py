@@ -0,0 +1,335 @@
+import time
+import random
+import asyncio
+from contextlib import nullcontext
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncContextManager, Awaitable, Callable, Dict, Optional, TypeVar
+import httpx
+from app.config import get_settings
+
+
+T = TypeVar("T")
+
+# Rate limited, overloaded or a transient upstream/gateway failure
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504, 529}
+# Streamed `error` events worth another attempt if nothing was emitted yet
+RETRYABLE_STREAM_ERRORS = {"overloaded_error", "api_error", "rate_limit_error"}
+
+
+class ModelCallError(Exception):
+    """A failed model call; `retryable` when another attempt may succeed."""
+
+    def __init__(
+        self,
+        message: str,
+        status: Optional[int] = None,
+        retryable: bool = False,
+        retry_after: Optional[float] = None,
+    ):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class ModelUnavailableError(ModelCallError):
+    """The call was given up on: the circuit is open or the deadline is spent. Worth trying later."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message, retryable=True, retry_after=retry_after)
+
+
+def parse_retry_after(headers: httpx.Headers) -> Optional[float]:
+    """Seconds to wait from `retry-after-ms` / `retry-after` (seconds or an HTTP date)."""
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def error_from_response(response: httpx.Response) -> ModelCallError:
+    """Classify a non-200 Messages API response (its body must already be read)."""
+    status = response.status_code
+    return ModelCallError(
+        f"Model API returned {status}: {response.text[:300]}",
+        status=status,
+        retryable=status in RETRYABLE_STATUSES,
+        retry_after=parse_retry_after(response.headers),
+    )
+
+
+def error_from_transport(error: httpx.TransportError) -> ModelCallError:
+    """Connection failures and timeouts are always worth another attempt."""
+    return ModelCallError(f"Model API unreachable: {type(error).__name__}: {error}", retryable=True)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive retryable failures and
+    rejects calls until `reset_seconds` (or a longer retry-after) has
+    passed. Then one probe call is let through: success closes the
+    circuit, failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self._probe_started: Optional[float] = None
+        self.opens = 0
+        self.rejected = 0
+
+    def rejecting(self) -> bool:
+        """Whether calls would be rejected right now, without claiming the half-open probe."""
+        if self.state == "closed":
+            return False
+        now = time.monotonic()
+        if self.state == "open":
+            return now < self.open_until
+        return self._probe_started is not None and now - self._probe_started <= self.reset_seconds
+
+    def before_call(self) -> None:
+        """Raise ModelUnavailableError if calls are currently being rejected."""
+        if self.state == "closed":
+            return
+        now = time.monotonic()
+        if self.state == "open" and now >= self.open_until:
+            self.state = "half_open"
+            self._probe_started = None
+        # A probe that never reported back (e.g. its caller was cancelled) is replaced
+        if self.state == "half_open" and (
+            self._probe_started is None or now - self._probe_started > self.reset_seconds
+        ):
+            self._probe_started = now
+            print(f"[CircuitBreaker] {self.name}: probing upstream")
+            return
+        self.rejected += 1
+        retry_after = max(0.0, self.open_until - time.monotonic())
+        raise ModelUnavailableError(
+            f"{self.name} circuit is open, retry in {retry_after:.0f}s",
+            retry_after=retry_after,
+        )
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            print(f"[CircuitBreaker] {self.name}: closed")
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._probe_started = None
+
+    def record_failure(self, retry_after: Optional[float] = None) -> None:
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opens += 1
+            self.state = "open"
+            self._probe_started = None
+            self.open_until = time.monotonic() + max(self.reset_seconds, retry_after or 0.0)
+            print(f"[CircuitBreaker] {self.name}: open for {self.open_until - time.monotonic():.0f}s "
+                  f"after {self.consecutive_failures} failures")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "open_for_seconds": round(max(0.0, self.open_until - time.monotonic()), 1) if self.state == "open" else 0.0,
+            "opens": self.opens,
+            "rejected": self.rejected,
+        }
+
+
+class ModelResilience:
+    """
+    Retry policy, circuit breaker and per-endpoint deadlines for model calls.
+    Retries use full-jitter exponential backoff, or the server's retry-after
+    when it sends one; no retry is started that would overrun the deadline.
+    `call` wraps a whole call; streaming callers drive the loop themselves
+    with `start`, `before_queue`, `before_attempt`, `succeeded` and `retry`.
+    Time spent waiting for a local call slot counts against the deadline
+    but never against the breaker.
+    """
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        deadlines: Dict[str, float],
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        max_retry_after: float = 30.0,
+    ):
+        self.breaker = breaker
+        self.deadlines = deadlines
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.retry_after_honored = 0
+        self.deadline_exceeded = 0
+        self.failures = 0
+
+    def start(self, endpoint: str) -> float:
+        """Monotonic deadline for a new call to `endpoint`."""
+        self.calls += 1
+        return time.monotonic() + self.deadlines.get(endpoint, 60.0)
+
+    def before_queue(self, deadline: float) -> float:
+        """Fail fast while the circuit is open; returns the seconds left to wait for a call slot."""
+        if self.breaker.rejecting():
+            self.breaker.before_call()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self.deadline_exceeded += 1
+            raise ModelUnavailableError("Model call deadline exceeded")
+        return remaining
+
+    def before_attempt(self, deadline: float) -> float:
+        """Check the breaker and deadline; returns the seconds left for this attempt."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self.deadline_exceeded += 1
+            raise ModelUnavailableError("Model call deadline exceeded")
+        self.breaker.before_call()
+        self.attempts += 1
+        return remaining
+
+    def succeeded(self) -> None:
+        self.breaker.record_success()
+
+    def backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Delay before retry number `attempt` (1-based)."""
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def failed(self, error: ModelCallError) -> ModelCallError:
+        """Record a call that is given up on; returns the error to raise."""
+        self._record(error)
+        self.failures += 1
+        return error
+
+    def _record(self, error: ModelCallError) -> None:
+        if error.retryable:
+            self.breaker.record_failure(error.retry_after)
+        else:
+            # The upstream answered; a bad request says nothing about its health
+            self.breaker.record_success()
+
+    async def retry(self, error: ModelCallError, attempt: int, deadline: float) -> None:
+        """Record a failed attempt, then sleep before the next one or re-raise."""
+        if not error.retryable or attempt >= self.max_attempts:
+            raise self.failed(error)
+
+        self._record(error)
+        delay = self.backoff(attempt, error.retry_after)
+        if time.monotonic() + delay >= deadline:
+            self.failures += 1
+            self.deadline_exceeded += 1
+            raise ModelUnavailableError(f"Model call deadline exceeded after {attempt} attempt(s): {error}") from error
+
+        self.retries += 1
+        if error.retry_after is not None:
+            self.retry_after_honored += 1
+        print(f"[ModelResilience] Attempt {attempt} failed ({error.status or 'transport'}), retrying in {delay:.2f}s")
+        await asyncio.sleep(delay)
+
+    async def call(
+        self,
+        endpoint: str,
+        attempt_fn: Callable[[float], Awaitable[T]],
+        slot: Optional[Callable[[float], AsyncContextManager[None]]] = None,
+    ) -> T:
+        """
+        Run `attempt_fn(seconds_left)` with retries until it succeeds or the
+        deadline passes. `slot(seconds_left)`, if given, is held around each
+        attempt and should raise ModelUnavailableError if it can't be had in
+        time; the breaker check and the attempt's timeout start once it is held.
+        """
+        deadline = self.start(endpoint)
+        attempt = 0
+        while True:
+            attempt += 1
+            queue_timeout = self.before_queue(deadline)
+            async with slot(queue_timeout) if slot else nullcontext():
+                remaining = self.before_attempt(deadline)
+                try:
+                    result = await asyncio.wait_for(attempt_fn(remaining), remaining)
+                except asyncio.TimeoutError:
+                    error = ModelCallError("Model call attempt ran out of time", retryable=True)
+                except httpx.TransportError as e:
+                    error = error_from_transport(e)
+                except ModelCallError as e:
+                    error = e
+                else:
+                    self.succeeded()
+                    return result
+            await self.retry(error, attempt, deadline)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retry counters, breaker state and configured deadlines."""
+        return {
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "retry_after_honored": self.retry_after_honored,
+            "deadline_exceeded": self.deadline_exceeded,
+            "failures": self.failures,
+            "max_attempts": self.max_attempts,
+            "deadlines": dict(self.deadlines),
+            "breaker": self.breaker.stats(),
+        }
+
+
+def _create_resilience(breaker_name: str) -> ModelResilience:
+    settings = get_settings()
+    return ModelResilience(
+        breaker=CircuitBreaker(
+            name=breaker_name,
+            failure_threshold=settings.claude_breaker_failures,
+            reset_seconds=settings.claude_breaker_reset_seconds,
+        ),
+        deadlines=settings.claude_deadlines,
+        max_attempts=settings.claude_retry_max_attempts,
+        base_delay=settings.claude_retry_base_seconds,
+        max_delay=settings.claude_retry_max_seconds,
+        max_retry_after=settings.claude_retry_after_max_seconds,
+    )
+
+
+# Singleton
+_model_resilience: Optional[ModelResilience] = None
+_batch_resilience: Optional[ModelResilience] = None
+
+
+def get_model_resilience() -> ModelResilience:
+    global _model_resilience
+    if _model_resilience is None:
+        _model_resilience = _create_resilience("claude")
+    return _model_resilience
+
+
+def get_batch_resilience() -> ModelResilience:
+    """Message Batches calls get their own breaker, so batch trouble never fails interactive calls fast."""
+    global _batch_resilience
+    if _batch_resilience is None:
+        _batch_resilience = _create_resilience("claude_batch")
+    return _batch_resilience
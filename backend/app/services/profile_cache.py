@@ -0,0 +1,350 @@
+import os
+import time
+import asyncio
+import pickle
+import hashlib
+import dataclasses
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+import aiofiles
+import aiofiles.os
+from app.config import get_settings
+from app.services.image_store import ImageStore, get_image_store
+
+
+def _image_bytes(profile: Any) -> int:
+    """Total size of the images a profile references."""
+    total = sum(len(image) for image in profile.post_images)
+    if profile.profile_pic_bytes:
+        total += len(profile.profile_pic_bytes)
+    return total
+
+
+def _copy(profile: Any) -> Any:
+    """Shallow copy so callers can't mutate the cached lists."""
+    return dataclasses.replace(
+        profile,
+        post_images=list(profile.post_images),
+        post_captions=list(profile.post_captions),
+        post_like_counts=list(profile.post_like_counts),
+        post_comment_counts=list(profile.post_comment_counts),
+    )
+
+
+class ProfileCache:
+    """
+    TTL cache for scraped profiles, keyed by (username, depth).
+    In-memory LRU bounded by entry count and total image bytes, with an
+    optional on-disk second tier that survives restarts, bounded by entry
+    count and file bytes (expired entries go first). Profiles hold
+    ImageStore handles, so an entry whose images were evicted from the
+    store counts as a miss.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 600,
+        max_entries: int = 500,
+        max_image_bytes: int = 256 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        image_store: Optional[ImageStore] = None,
+        disk_max_entries: int = 5000,
+        disk_max_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_image_bytes = max_image_bytes
+        self.disk_dir = disk_dir
+        self.image_store = image_store
+        self.disk_max_entries = disk_max_entries
+        self.disk_max_bytes = disk_max_bytes
+        # Disk tier index, oldest write first: file name -> (stored_at, bytes); built on first use
+        self._disk: "Optional[OrderedDict[str, Tuple[float, int]]]" = None
+        self._disk_bytes = 0
+        self.disk_evictions = 0
+        # key -> (stored_at, image_bytes, profile)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, int, Any]]" = OrderedDict()
+        self._image_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def _key(username: str, depth: str) -> Tuple[str, str]:
+        return (username.strip().lstrip("@").lower(), depth)
+
+    def _disk_path(self, key: Tuple[str, str]) -> str:
+        digest = hashlib.sha256(f"{key[0]}:{key[1]}".encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, f"{digest}.pkl")
+
+    async def get(self, username: str, depth: str) -> Optional[Any]:
+        """Return a fresh cached profile, or None."""
+        key = self._key(username, depth)
+        now = time.time()
+
+        entry = self._entries.get(key)
+        if entry:
+            stored_at, _, profile = entry
+            if now - stored_at < self.ttl_seconds and self._images_available(profile):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _copy(profile)
+            self._remove(key)
+            self.expirations += 1
+
+        if self.disk_dir:
+            profile = await self._read_disk(key, now)
+            if profile is not None:
+                self.disk_hits += 1
+                return _copy(profile)
+
+        self.misses += 1
+        return None
+
+    async def set(self, username: str, depth: str, profile: Any) -> None:
+        """Cache a successfully fetched profile."""
+        if profile.error or self.ttl_seconds <= 0:
+            return
+
+        key = self._key(username, depth)
+        stored_at = time.time()
+        self._store(key, stored_at, _copy(profile))
+
+        if self.disk_dir:
+            await self._write_disk(key, stored_at, profile)
+
+    def _store(self, key: Tuple[str, str], stored_at: float, profile: Any) -> None:
+        if key in self._entries:
+            self._remove(key)
+
+        size = _image_bytes(profile)
+        if size > self.max_image_bytes:
+            return
+
+        self._entries[key] = (stored_at, size, profile)
+        self._image_bytes += size
+
+        # Evict least recently used until both bounds hold
+        while len(self._entries) > self.max_entries or self._image_bytes > self.max_image_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _images_available(self, profile: Any) -> bool:
+        if self.image_store is None:
+            return True
+        handles = list(profile.post_images)
+        if profile.profile_pic_bytes:
+            handles.append(profile.profile_pic_bytes)
+        return all(self.image_store.contains(handle) for handle in handles)
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._image_bytes -= size
+
+    def _scan_disk(self) -> "OrderedDict[str, Tuple[float, int]]":
+        """Index entries left by a previous run, oldest first (blocking; run on a thread)."""
+        entries = []
+        for item in os.scandir(self.disk_dir):
+            if not item.name.endswith(".pkl"):
+                continue
+            try:
+                stat = item.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, item.name, stat.st_size))
+        return OrderedDict((name, (stored_at, size)) for stored_at, name, size in sorted(entries))
+
+    async def _disk_index(self) -> "OrderedDict[str, Tuple[float, int]]":
+        if self._disk is None:
+            index = await asyncio.to_thread(self._scan_disk)
+            if self._disk is None:
+                self._disk = index
+                self._disk_bytes = sum(size for _, size in index.values())
+        return self._disk
+
+    async def _remove_disk(self, path: str) -> None:
+        index = await self._disk_index()
+        _, size = index.pop(os.path.basename(path), (0, 0))
+        self._disk_bytes -= size
+        try:
+            await aiofiles.os.remove(path)
+        except OSError:
+            pass
+
+    async def _evict_disk(self) -> None:
+        """Drop expired entries, then the oldest ones while over either disk bound."""
+        index = await self._disk_index()
+        now = time.time()
+        while index:
+            name, (stored_at, _) = next(iter(index.items()))
+            over = len(index) > self.disk_max_entries or self._disk_bytes > self.disk_max_bytes
+            if now - stored_at < self.ttl_seconds and not over:
+                break
+            await self._remove_disk(os.path.join(self.disk_dir, name))
+            self.disk_evictions += 1
+
+    async def _read_disk(self, key: Tuple[str, str], now: float) -> Optional[Any]:
+        path = self._disk_path(key)
+        try:
+            async with aiofiles.open(path, "rb") as f:
+                stored_at, profile = pickle.loads(await f.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[ProfileCache] Unreadable disk entry {path}: {e}")
+            stored_at, profile = 0, None
+
+        if profile is not None and self.image_store is not None:
+            # The image check is only definitive once the store has indexed its disk tier
+            await self.image_store.wait_indexed()
+
+        if profile is None or now - stored_at >= self.ttl_seconds or not self._images_available(profile):
+            self.expirations += 1
+            await self._remove_disk(path)
+            return None
+
+        # Promote to the memory tier
+        self._store(key, stored_at, profile)
+        return profile
+
+    async def _write_disk(self, key: Tuple[str, str], stored_at: float, profile: Any) -> None:
+        path = self._disk_path(key)
+        tmp_path = f"{path}.tmp"
+        data = pickle.dumps((stored_at, profile), protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            async with aiofiles.open(tmp_path, "wb") as f:
+                await f.write(data)
+            await aiofiles.os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"[ProfileCache] Disk write failed: {e}")
+            return
+
+        index = await self._disk_index()
+        name = os.path.basename(path)
+        _, previous = index.pop(name, (0, 0))
+        index[name] = (stored_at, len(data))
+        self._disk_bytes += len(data) - previous
+        await self._evict_disk()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current size."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "image_bytes": self._image_bytes,
+            "max_entries": self.max_entries,
+            "max_image_bytes": self.max_image_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "disk_tier": bool(self.disk_dir),
+            "disk_entries": len(self._disk) if self._disk is not None else None,
+            "disk_bytes": self._disk_bytes,
+            "disk_max_entries": self.disk_max_entries,
+            "disk_max_bytes": self.disk_max_bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "disk_evictions": self.disk_evictions,
+        }
+
+
+class NegativeCache:
+    """
+    Short-lived cache of definitive failures (not found, login wall,
+    private), keyed by (username, error code) with a TTL per code.
+    """
+
+    def __init__(self, ttls: Dict[str, float], max_entries: int = 10000):
+        self.ttls = ttls
+        self.max_entries = max_entries
+        # (username, error code) -> expires_at
+        self._entries: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    @staticmethod
+    def _username(username: str) -> str:
+        return username.strip().lstrip("@").lower()
+
+    def get(self, username: str, error_codes: Iterable[str]) -> Optional[str]:
+        """Return the first cached error code for this username, or None."""
+        name = self._username(username)
+        now = time.time()
+
+        for code in error_codes:
+            key = (name, code)
+            expires_at = self._entries.get(key)
+            if expires_at is None:
+                continue
+            if now < expires_at:
+                self.hits += 1
+                return code
+            del self._entries[key]
+
+        self.misses += 1
+        return None
+
+    def set(self, username: str, error_code: str) -> None:
+        """Remember a failure if its error code has a TTL configured."""
+        ttl = self.ttls.get(error_code, 0)
+        if ttl <= 0:
+            return
+
+        key = (self._username(username), error_code)
+        self._entries.pop(key, None)
+        self._entries[key] = time.time() + ttl
+        self.stores += 1
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        return {
+            "entries": len(self._entries),
+            "ttls": self.ttls,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+        }
+
+
+# Singleton
+_profile_cache: Optional[ProfileCache] = None
+_negative_cache: Optional[NegativeCache] = None
+
+
+def get_profile_cache() -> ProfileCache:
+    global _profile_cache
+    if _profile_cache is None:
+        settings = get_settings()
+        _profile_cache = ProfileCache(
+            ttl_seconds=settings.profile_cache_ttl_seconds,
+            max_entries=settings.profile_cache_max_entries,
+            max_image_bytes=settings.profile_cache_max_image_mb * 1024 * 1024,
+            disk_dir=settings.profile_cache_dir or None,
+            image_store=get_image_store(),
+            disk_max_entries=settings.profile_cache_disk_max_entries,
+            disk_max_bytes=settings.profile_cache_disk_max_mb * 1024 * 1024,
+        )
+    return _profile_cache
+
+
+def get_negative_cache() -> NegativeCache:
+    global _negative_cache
+    if _negative_cache is None:
+        settings = get_settings()
+        _negative_cache = NegativeCache(
+            ttls=settings.negative_cache_ttls,
+            max_entries=settings.negative_cache_max_entries,
+        )
+    return _negative_cache
@@ -0,0 +1,400 @@
+import io
+import os
+import asyncio
+import copy
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import aiofiles
+import aiofiles.os
+from PIL import Image, ImageOps
+from app.config import get_settings
+from app.services.ai_service import AIService, result_events
+from app.services.prompts import PROMPT_VERSION
+from app.services.image_store import ImageHandle, ImageLike, ImageStore, get_image_store
+from app.services.cpu_executor import CpuExecutor, get_cpu_executor
+
+
+def canonical_image_hash(data: bytes) -> str:
+    """
+    Hash of the decoded pixels after applying EXIF orientation, so the same
+    picture re-saved with different metadata hashes the same. Falls back to
+    the raw bytes if Pillow can't decode the image.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ("RGB", "RGBA", "L"):
+                image = image.convert("RGBA")
+            digest = hashlib.sha256(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode())
+            digest.update(image.tobytes())
+            return digest.hexdigest()
+    except Exception:
+        return hashlib.sha256(bytes(data)).hexdigest()
+
+
+class ResultCache:
+    """
+    TTL cache of AI analysis results, keyed by canonical image hashes plus
+    every prompt input (language, roast mode, metadata, prompt version).
+    In-memory LRU with an optional on-disk tier, bounded by bytes; image
+    hashing runs on the CPU executor.
+    """
+
+    def __init__(
+        self,
+        image_store: ImageStore,
+        cpu: CpuExecutor,
+        ttl_seconds: float = 86400,
+        max_entries: int = 2000,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.image_store = image_store
+        self.cpu = cpu
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        # key -> (stored_at, result)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # Disk tier index, oldest write first: key -> (stored_at, bytes); built on first use
+        self._disk: "Optional[OrderedDict[str, Tuple[float, int]]]" = None
+        self._disk_bytes = 0
+        self.disk_evictions = 0
+        # ImageStore digest -> canonical hash, so stored images are decoded once
+        self._fingerprints: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    async def fingerprint(self, image: ImageLike) -> str:
+        """Canonical hash of an image (bytes or store handle)."""
+        if not isinstance(image, ImageHandle):
+            return await self.cpu.run("image_hash", canonical_image_hash, image)
+
+        cached = self._fingerprints.get(image.digest)
+        if cached:
+            self._fingerprints.move_to_end(image.digest)
+            return cached
+
+        fingerprint = await self.cpu.run("image_hash", canonical_image_hash, await self.image_store.aget(image))
+        self._fingerprints[image.digest] = fingerprint
+        while len(self._fingerprints) > self.max_entries * 4:
+            self._fingerprints.popitem(last=False)
+        return fingerprint
+
+    @staticmethod
+    def _key(*parts: Any) -> str:
+        raw = json.dumps([PROMPT_VERSION, *parts], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def _profile_key(self, image: ImageLike, language: str, roast_mode: bool) -> str:
+        return self._key("profile", await self.fingerprint(image), language, roast_mode)
+
+    async def _deep_key(
+        self,
+        images: List[ImageLike],
+        captions: List[str],
+        like_counts: List[int],
+        comment_counts: List[int],
+        follower_count: int,
+        bio: str,
+        language: str,
+    ) -> str:
+        return self._key(
+            "deep",
+            [await self.fingerprint(image) for image in images],
+            captions,
+            like_counts,
+            comment_counts,
+            follower_count,
+            bio,
+            language,
+        )
+
+    async def analyze_profile(
+        self,
+        ai_service: AIService,
+        image: ImageLike,
+        language: str,
+        roast_mode: bool = True,
+        bypass: bool = False,
+    ) -> Dict[str, Any]:
+        """`ai_service.analyze_profile` behind the cache."""
+        key = await self._profile_key(image, language, roast_mode)
+        return await self._get_or_compute(
+            key,
+            lambda: ai_service.analyze_profile(image, language, roast_mode=roast_mode),
+            bypass,
+        )
+
+    async def analyze_profile_deep(
+        self,
+        ai_service: AIService,
+        images: List[ImageLike],
+        captions: List[str],
+        like_counts: List[int],
+        comment_counts: List[int],
+        follower_count: int,
+        bio: str,
+        language: str = "en",
+        bypass: bool = False,
+    ) -> Dict[str, Any]:
+        """`ai_service.analyze_profile_deep` behind the cache."""
+        key = await self._deep_key(images, captions, like_counts, comment_counts, follower_count, bio, language)
+        return await self._get_or_compute(
+            key,
+            lambda: ai_service.analyze_profile_deep(
+                images=images,
+                captions=captions,
+                like_counts=like_counts,
+                comment_counts=comment_counts,
+                follower_count=follower_count,
+                bio=bio,
+                language=language,
+            ),
+            bypass,
+        )
+
+    async def stream_profile(
+        self,
+        ai_service: AIService,
+        image: ImageLike,
+        language: str,
+        roast_mode: bool = True,
+        bypass: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """`ai_service.stream_profile` behind the cache."""
+        key = await self._profile_key(image, language, roast_mode)
+        async for event in self._stream_or_compute(
+            key,
+            lambda: ai_service.stream_profile(image, language, roast_mode=roast_mode),
+            bypass,
+        ):
+            yield event
+
+    async def stream_profile_deep(
+        self,
+        ai_service: AIService,
+        images: List[ImageLike],
+        captions: List[str],
+        like_counts: List[int],
+        comment_counts: List[int],
+        follower_count: int,
+        bio: str,
+        language: str = "en",
+        bypass: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """`ai_service.stream_profile_deep` behind the cache."""
+        key = await self._deep_key(images, captions, like_counts, comment_counts, follower_count, bio, language)
+        async for event in self._stream_or_compute(
+            key,
+            lambda: ai_service.stream_profile_deep(
+                images=images,
+                captions=captions,
+                like_counts=like_counts,
+                comment_counts=comment_counts,
+                follower_count=follower_count,
+                bio=bio,
+                language=language,
+            ),
+            bypass,
+        ):
+            yield event
+
+    async def _stream_or_compute(self, key: str, stream, bypass: bool) -> AsyncIterator[Dict[str, Any]]:
+        """A cache hit replays the stored result as events; a miss stores the streamed one."""
+        if bypass:
+            self.bypasses += 1
+        else:
+            cached = await self.get(key)
+            if cached is not None:
+                print(f"[ResultCache] Hit {key[:12]}")
+                for event in result_events(cached):
+                    yield event
+                return
+
+        async for event in stream():
+            if event["event"] == "done":
+                await self.set(key, event["result"])
+            yield event
+
+    async def _get_or_compute(self, key: str, compute, bypass: bool) -> Dict[str, Any]:
+        if bypass:
+            self.bypasses += 1
+        else:
+            cached = await self.get(key)
+            if cached is not None:
+                print(f"[ResultCache] Hit {key[:12]}")
+                return cached
+
+        result = await compute()
+        await self.set(key, result)
+        return result
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a fresh cached result, or None."""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry:
+            stored_at, result = entry
+            if now - stored_at < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(result)
+            del self._entries[key]
+
+        if self.disk_dir:
+            result = await self._read_disk(key, now)
+            if result is not None:
+                self.disk_hits += 1
+                return copy.deepcopy(result)
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, result: Dict[str, Any]) -> None:
+        """Cache a model result."""
+        if self.ttl_seconds <= 0:
+            return
+        stored_at = time.time()
+        self._store(key, stored_at, copy.deepcopy(result))
+        if self.disk_dir:
+            await self._write_disk(key, stored_at, result)
+
+    def _store(self, key: str, stored_at: float, result: Dict[str, Any]) -> None:
+        self._entries.pop(key, None)
+        self._entries[key] = (stored_at, result)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _scan_disk(self) -> "OrderedDict[str, Tuple[float, int]]":
+        """Index entries left by a previous run, oldest first (blocking; run on a thread)."""
+        entries = []
+        for item in os.scandir(self.disk_dir):
+            if not item.name.endswith(".json"):
+                continue
+            try:
+                stat = item.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, item.name[:-len(".json")], stat.st_size))
+        return OrderedDict((key, (stored_at, size)) for stored_at, key, size in sorted(entries))
+
+    async def _disk_index(self) -> "OrderedDict[str, Tuple[float, int]]":
+        if self._disk is None:
+            index = await asyncio.to_thread(self._scan_disk)
+            if self._disk is None:
+                self._disk = index
+                self._disk_bytes = sum(size for _, size in index.values())
+        return self._disk
+
+    async def _remove_disk(self, key: str) -> None:
+        index = await self._disk_index()
+        _, size = index.pop(key, (0, 0))
+        self._disk_bytes -= size
+        try:
+            await aiofiles.os.remove(self._disk_path(key))
+        except OSError:
+            pass
+
+    async def _evict_disk(self) -> None:
+        """Drop expired entries, then the oldest ones while over the byte budget."""
+        index = await self._disk_index()
+        now = time.time()
+        while index:
+            key, (stored_at, _) = next(iter(index.items()))
+            if now - stored_at < self.ttl_seconds and self._disk_bytes <= self.disk_max_bytes:
+                break
+            await self._remove_disk(key)
+            self.disk_evictions += 1
+
+    async def _read_disk(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        path = self._disk_path(key)
+        try:
+            async with aiofiles.open(path, "r", encoding="utf-8") as f:
+                entry = json.loads(await f.read())
+            stored_at, result = entry["stored_at"], entry["result"]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[ResultCache] Unreadable disk entry {path}: {e}")
+            stored_at, result = 0, None
+
+        if result is None or now - stored_at >= self.ttl_seconds:
+            await self._remove_disk(key)
+            return None
+
+        # Promote to the memory tier
+        self._store(key, stored_at, result)
+        return result
+
+    async def _write_disk(self, key: str, stored_at: float, result: Dict[str, Any]) -> None:
+        path = self._disk_path(key)
+        tmp_path = f"{path}.tmp"
+        data = json.dumps({"stored_at": stored_at, "result": result}, ensure_ascii=False).encode("utf-8")
+        try:
+            async with aiofiles.open(tmp_path, "wb") as f:
+                await f.write(data)
+            await aiofiles.os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"[ResultCache] Disk write failed: {e}")
+            return
+
+        index = await self._disk_index()
+        _, previous = index.pop(key, (0, 0))
+        index[key] = (stored_at, len(data))
+        self._disk_bytes += len(data) - previous
+        await self._evict_disk()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/bypass counters and current size."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "disk_tier": bool(self.disk_dir),
+            "disk_entries": len(self._disk) if self._disk is not None else None,
+            "disk_bytes": self._disk_bytes,
+            "disk_max_bytes": self.disk_max_bytes,
+            "prompt_version": PROMPT_VERSION,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "disk_evictions": self.disk_evictions,
+        }
+
+
+# Singleton
+_result_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    global _result_cache
+    if _result_cache is None:
+        settings = get_settings()
+        _result_cache = ResultCache(
+            image_store=get_image_store(),
+            cpu=get_cpu_executor(),
+            ttl_seconds=settings.result_cache_ttl_seconds,
+            max_entries=settings.result_cache_max_entries,
+            disk_dir=settings.result_cache_dir or None,
+            disk_max_bytes=settings.result_cache_disk_max_mb * 1024 * 1024,
+        )
+    return _result_cache
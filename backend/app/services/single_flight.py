@@ -0,0 +1,93 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+from app.config import get_settings
+
+
+T = TypeVar("T")
+
+
+class _Flight:
+    """One shared in-flight computation and how many callers await it."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key onto one task. Each caller
+    awaits the shared task through a shield, so a caller that goes away is
+    cancelled on its own; the task is only cancelled once every caller for
+    it is gone.
+    """
+
+    def __init__(self, name: str, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.cancelled_waiters = 0
+        self.abandoned = 0
+
+    async def do(self, key: Optional[Hashable], fn: Callable[[], Awaitable[T]]) -> T:
+        """Await `fn()`, sharing it with any in-flight call for `key` (None never coalesces)."""
+        if not self.enabled or key is None:
+            return await fn()
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.create_task(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _task, key=key, flight=flight: self._forget(key, flight))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+            print(f"[SingleFlight] {self.name}: joined in-flight {key} ({flight.waiters + 1} waiting)")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.cancelled():
+                self.cancelled_waiters += 1
+            raise
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left to use the result
+                flight.task.cancel()
+                self.abandoned += 1
+                self._forget(key, flight)
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """In-flight keys and coalescing counters."""
+        calls = self.leaders + self.coalesced
+        return {
+            "name": self.name,
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "waiting": sum(flight.waiters for flight in self._flights.values()),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesce_rate": round(self.coalesced / calls, 3) if calls else 0.0,
+            "cancelled_waiters": self.cancelled_waiters,
+            "abandoned": self.abandoned,
+        }
+
+
+# Singleton
+_analysis_flights: Optional[SingleFlight] = None
+
+
+def get_analysis_flights() -> SingleFlight:
+    global _analysis_flights
+    if _analysis_flights is None:
+        settings = get_settings()
+        _analysis_flights = SingleFlight(name="analysis", enabled=settings.analysis_single_flight)
+    return _analysis_flights
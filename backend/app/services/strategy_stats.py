@@ -0,0 +1,128 @@
+import time
+import random
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from app.config import get_settings
+
+
+class StrategyStats:
+    """
+    Rolling success/latency statistics per scrape strategy, used to order
+    strategies bandit-style: best expected value first, with a small
+    chance of exploring another one. Strategies that keep failing are
+    skipped for a cooldown and re-probed afterwards.
+    """
+
+    def __init__(
+        self,
+        window: int = 50,
+        explore_rate: float = 0.1,
+        skip_after_failures: int = 5,
+        skip_seconds: float = 300,
+        latency_scale: float = 10.0,
+    ):
+        self.window = window
+        self.explore_rate = explore_rate
+        self.skip_after_failures = skip_after_failures
+        self.skip_seconds = skip_seconds
+        self.latency_scale = latency_scale
+        # name -> recent (reward, latency) outcomes
+        self._outcomes: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._skipped_until: Dict[str, float] = {}
+        self._totals: Dict[str, Dict[str, int]] = {}
+        self.explorations = 0
+
+    def record(self, name: str, reward: float, latency: float) -> None:
+        """
+        Record one finished attempt. Reward is 1 for a usable result, 0.5 for
+        a partial one (e.g. too few posts) and 0 for a failure; `score`
+        averages it. Only full rewards count as successes, and any partial
+        one clears a pending skip.
+        """
+        outcomes = self._outcomes.setdefault(name, deque(maxlen=self.window))
+        outcomes.append((reward, latency))
+        totals = self._totals.setdefault(name, {"attempts": 0, "successes": 0, "skips": 0})
+        totals["attempts"] += 1
+        if reward >= 1:
+            totals["successes"] += 1
+
+        recent = list(outcomes)[-self.skip_after_failures:]
+        if len(recent) >= self.skip_after_failures and all(r == 0 for r, _ in recent):
+            if self._skipped_until.get(name, 0) <= time.time():
+                print(f"[Strategies] Skipping {name} for {self.skip_seconds:.0f}s after {len(recent)} failures")
+                totals["skips"] += 1
+            self._skipped_until[name] = time.time() + self.skip_seconds
+        elif reward > 0:
+            self._skipped_until.pop(name, None)
+
+    def score(self, name: str) -> float:
+        """Expected value: smoothed success rate, discounted by mean latency."""
+        outcomes = self._outcomes.get(name)
+        if not outcomes:
+            return 0.5
+        rate = (sum(r for r, _ in outcomes) + 1) / (len(outcomes) + 2)
+        latency = sum(l for _, l in outcomes) / len(outcomes)
+        return rate / (1 + latency / self.latency_scale)
+
+    def is_skipped(self, name: str) -> bool:
+        return self._skipped_until.get(name, 0) > time.time()
+
+    def order(self, names: List[str]) -> List[str]:
+        """
+        Strategies to try, best first. `names` is the default preference
+        order and breaks ties. Skipped strategies are left out unless
+        picked for exploration or every strategy is skipped.
+        """
+        ranked = sorted(names, key=lambda name: (-self.score(name), names.index(name)))
+        active = [name for name in ranked if not self.is_skipped(name)] or ranked
+
+        if len(ranked) > 1 and random.random() < self.explore_rate:
+            # Explore: give a random other strategy (skipped ones included) the first slot
+            choice = random.choice([name for name in ranked if name != active[0]])
+            active = [choice] + [name for name in active if name != choice]
+            self.explorations += 1
+
+        return active
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-strategy rolling success rate, latency, score and skip state."""
+        now = time.time()
+        strategies = {}
+        for name, outcomes in self._outcomes.items():
+            latencies = sorted(l for _, l in outcomes)
+            skipped_until: Optional[float] = self._skipped_until.get(name)
+            strategies[name] = {
+                **self._totals.get(name, {}),
+                "window": len(outcomes),
+                "success_rate": round(sum(r for r, _ in outcomes) / len(outcomes), 3),
+                "mean_latency": round(sum(latencies) / len(latencies), 3),
+                "p90_latency": round(latencies[int(0.9 * (len(latencies) - 1))], 3),
+                "score": round(self.score(name), 3),
+                "skipped_for": round(skipped_until - now, 1) if skipped_until and skipped_until > now else 0,
+            }
+        return {
+            "window": self.window,
+            "explore_rate": self.explore_rate,
+            "skip_after_failures": self.skip_after_failures,
+            "skip_seconds": self.skip_seconds,
+            "explorations": self.explorations,
+            "strategies": strategies,
+        }
+
+
+# Singleton
+_strategy_stats: Optional[StrategyStats] = None
+
+
+def get_strategy_stats() -> StrategyStats:
+    global _strategy_stats
+    if _strategy_stats is None:
+        settings = get_settings()
+        _strategy_stats = StrategyStats(
+            window=settings.strategy_stats_window,
+            explore_rate=settings.strategy_explore_rate,
+            skip_after_failures=settings.strategy_skip_after_failures,
+            skip_seconds=settings.strategy_skip_seconds,
+            latency_scale=settings.strategy_latency_scale_seconds,
+        )
+    return _strategy_stats
@@ -0,0 +1,185 @@
+"""
+Benchmark: precompiled HTML extractor vs. the previous per-field regex passes.
+
+    python -m benchmarks.html_extraction [--runs 20]
+
+Run from backend/. Measures every `benchmarks/fixtures/*.html` page: the
+committed ones are anonymized copies of recorded profile pages (see
+benchmarks/make_fixtures.py), and any real page saved there with e.g.
+`curl -o` is measured too, but keep those out of the repo since they hold
+other people's profile data. Without fixtures it falls back to a simple
+synthetic page.
+"""
+import re
+import sys
+import glob
+import time
+import random
+import argparse
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.html_extractor import extract_page  # noqa: E402
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def legacy_extract(html: str, username: str) -> dict:
+    """The regex passes _extract_from_html, _try_graphql_api, _try_graphql_deep
+    and _try_html_scrape_deep used to run over the same page."""
+    result = {}
+
+    # _extract_from_html
+    for pattern in [
+        r'<meta property="og:image" content="([^"]+)"',
+        r'"profile_pic_url_hd":"([^"]+)"',
+        r'"profile_pic_url":"([^"]+)"',
+        r'profilePicUrl["\']?\s*[:=]\s*["\']([^"\']+)["\']',
+    ]:
+        match = re.search(pattern, html)
+        if match:
+            result["profile_pic_url"] = match.group(1).replace("\\u0026", "&").replace("\\/", "/")
+            break
+    found = set()
+    for pattern in [r'"display_url":"([^"]+)"', r'"src":"(https://[^"]*cdninstagram[^"]*\.jpg[^"]*)"']:
+        for match in re.finditer(pattern, html):
+            found.add(match.group(1).replace("\\u0026", "&").replace("\\/", "/"))
+    re.search(r'<meta property="og:title" content="([^"]+)"', html)
+    re.search(r'<meta property="og:description" content="([^"]+)"', html)
+
+    # _try_graphql_api
+    re.search(r'window\._sharedData\s*=\s*({.+?});</script>', html)
+    re.search(r'"user":\s*({[^}]+?"username":\s*"' + username + '"[^}]+})', html)
+
+    # _try_graphql_deep
+    for pattern in [
+        r'"user_id"\s*:\s*"(\d+)"',
+        r'"profilePage_(\d+)"',
+        r'"id"\s*:\s*"(\d+)".*?"username"\s*:\s*"' + username + '"',
+        r'logging_page_id["\']?\s*:\s*["\']?profilePage_(\d+)',
+    ]:
+        if re.search(pattern, html):
+            break
+    re.search(r'<script type="application/json" data-sjs>(\{.*?"require".*?\})</script>', html, re.DOTALL)
+    image_urls = []
+    for pattern in [
+        r'"display_url"\s*:\s*"([^"]+)"',
+        r'"thumbnail_src"\s*:\s*"([^"]+)"',
+        r'"src"\s*:\s*"(https://[^"]*(?:cdninstagram|fbcdn)[^"]*\.jpg[^"]*)"',
+        r'"url"\s*:\s*"(https://[^"]*(?:cdninstagram|fbcdn)[^"]*\.jpg[^"]*)"',
+        r'content="(https://[^"]*(?:cdninstagram|fbcdn)[^"]*\.jpg[^"]*)"',
+        r'"image"\s*:\s*"(https://[^"]+)"',
+        r'"contentUrl"\s*:\s*"(https://[^"]+)"',
+    ]:
+        for match in re.findall(pattern, html):
+            clean_url = match.replace('\\u0026', '&').replace('\\/', '/').replace('&amp;', '&')
+            if clean_url not in image_urls:
+                image_urls.append(clean_url)
+    result["captions"] = re.findall(r'"edge_media_to_caption":\{"edges":\[\{"node":\{"text":"([^"]+)"\}\}\]\}', html)
+
+    # _try_html_scrape_deep
+    for pattern in [
+        r'<script type="application/ld\+json"[^>]*>(\{.*?"@type"\s*:\s*"Person".*?\})</script>',
+        r'window\._sharedData\s*=\s*(\{.*?\});</script>',
+        r'"ProfilePage":\[(\{.*?\})\]',
+    ]:
+        re.search(pattern, html, re.DOTALL)
+    re.search(r'<meta name="description" content="([^"]*)"', html)
+    for pattern in [
+        r'"display_url"\s*:\s*"([^"]+)"',
+        r'"thumbnail_src"\s*:\s*"([^"]+)"',
+        r'"src"\s*:\s*"(https://[^"]*(?:cdninstagram|fbcdn|scontent)[^"]*)"',
+        r'"url"\s*:\s*"(https://[^"]*(?:cdninstagram|fbcdn|scontent)[^"]*)"',
+        r'content="(https://[^"]*(?:cdninstagram|fbcdn|scontent)[^"]*\.jpg[^"]*)"',
+        r'"image"\s*:\s*\{"url"\s*:\s*"([^"]+)"',
+        r'"contentUrl"\s*:\s*"([^"]+)"',
+        r'srcset="([^"]+(?:cdninstagram|fbcdn|scontent)[^"]*)"',
+    ]:
+        for match in re.findall(pattern, html):
+            clean_url = match.replace('\\u0026', '&').replace('\\/', '/').replace('&amp;', '&')
+            if clean_url not in image_urls:
+                image_urls.append(clean_url)
+
+    result["display_urls"] = image_urls
+    return result
+
+
+def synthetic_page(username: str, posts: int = 12, filler_kb: int = 2048) -> str:
+    """Instagram-shaped page: meta tags, a big script payload and timeline JSON."""
+    rng = random.Random(posts)
+    cdn = "https:\\/\\/scontent-ams2-1.cdninstagram.com\\/v\\/t51.2885-15\\/{n}_n.jpg?stp=dst-jpg\\u0026_nc_ht=scontent\\u0026oh=00_{h}"
+    edges = ",".join(
+        '{"node":{"id":"%d","display_url":"%s","thumbnail_src":"%s","edge_media_to_caption":{"edges":[{"node":{"text":"caption %d"}}]},"edge_liked_by":{"count":%d}}}'
+        % (i, cdn.format(n=i, h=rng.getrandbits(64)), cdn.format(n=i + 1000, h=i), i, rng.randint(0, 5000))
+        for i in range(posts)
+    )
+    filler = "".join(
+        '{"__bbox":{"require":[["ScheduledServerJS","handle",null,[{"__bbox":{"define":[["x%d",[],{"v":"%s"},%d]]}}]]]}},'
+        % (i, "a" * 60, i)
+        for i in range(filler_kb * 1024 // 120)
+    )
+    return (
+        "<!DOCTYPE html><html><head>"
+        f'<meta property="og:title" content="Some Person (@{username}) &#x2022; Instagram photos and videos" />'
+        '<meta property="og:image" content="https://scontent-ams2-1.cdninstagram.com/v/t51.2885-19/pic_n.jpg?stp=dst-jpg_s100x100&amp;oh=1" />'
+        '<meta property="og:description" content="12.5K Followers, 300 Following, 120 Posts - Just vibes" />'
+        f'<meta name="description" content="12.5K Followers - see photos from @{username}" />'
+        "</head><body>"
+        f'<script type="application/json" data-sjs>{{"require":[{filler}null]}}</script>'
+        f'<script>{{"logging_page_id":"profilePage_1234567","user":{{"id":"1234567","username":"{username}","is_private":false,'
+        f'"profile_pic_url_hd":"{cdn.format(n=9999, h=1)}","edge_owner_to_timeline_media":{{"edges":[{edges}]}}}}}}</script>'
+        "</body></html>"
+    )
+
+
+def load_pages():
+    paths = sorted(glob.glob(os.path.join(FIXTURES, "*.html")))
+    if paths:
+        for path in paths:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                html = f.read()
+            # The legacy passes match on the username, which the og:title carries
+            username = re.search(r'<meta property="og:title" content="[^"]*\(@([^)]+)\)', html)
+            name = os.path.basename(path)
+            yield name, username.group(1) if username else os.path.splitext(name)[0], html
+        return
+    print("No fixtures in benchmarks/fixtures, using synthetic pages")
+    for posts, filler_kb in [(0, 256), (12, 1024), (12, 4096)]:
+        username = "some.user"
+        yield f"synthetic-{filler_kb}kb-{posts}posts", username, synthetic_page(username, posts, filler_kb)
+
+
+def bench(fn, runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'page':32} {'size':>9} {'legacy ms':>10} {'new ms':>10} {'speedup':>8}")
+    for name, username, html in load_pages():
+        legacy = legacy_extract(html, username)
+        page = extract_page(html)
+        missing = [url for url in legacy["display_urls"] if url not in page.display_urls + page.media_urls + page.profile_pic_urls]
+        if missing:
+            print(f"  {name}: {len(missing)} URLs found by legacy passes only, e.g. {missing[0][:80]}")
+
+        legacy_s = bench(lambda: legacy_extract(html, username), args.runs)
+        single_s = bench(lambda: extract_page(html), args.runs)
+        print(
+            f"{name[:32]:32} {len(html) // 1024:>7}KB {legacy_s * 1000:>10.2f} {single_s * 1000:>10.2f} "
+            f"{legacy_s / single_s:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
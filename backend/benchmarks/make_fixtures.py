@@ -0,0 +1,262 @@
+"""
+Regenerate the anonymized profile pages in benchmarks/fixtures/.
+
+    python -m benchmarks.make_fixtures
+
+Run from backend/. The pages follow the structure of recorded Instagram
+responses (head preloads and inline CSS, dozens of `data-sjs` module
+payloads, the profile query result, ld+json, the legacy
+`window._sharedData` blob) with every identifier, name, caption and
+URL hash replaced by seeded random values, so the output is the same on
+every run and holds nobody's profile data.
+
+    polaris-public.html   logged-out public profile, timeline in the
+                          PolarisProfilePostsQuery payload
+    polaris-private.html  private account: header data and the private
+                          notice, no timeline
+    legacy-shared.html    older page with window._sharedData and
+                          edge_owner_to_timeline_media
+"""
+import os
+import json
+import random
+import string
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+CDN_HOST = "scontent-ams2-1.cdninstagram.com"
+WORDS = (
+    "sunset coffee weekend trip friends home city beach mood vibes summer light "
+    "new chapter grateful tbt dinner late night studio film walk park rain"
+).split()
+
+
+class Faker:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+
+    def token(self, n: int, alphabet: str = string.ascii_letters + string.digits) -> str:
+        return "".join(self.rng.choice(alphabet) for _ in range(n))
+
+    def digits(self, n: int) -> str:
+        return str(self.rng.randint(10 ** (n - 1), 10 ** n - 1))
+
+    def sentence(self, lo: int = 3, hi: int = 14) -> str:
+        words = [self.rng.choice(WORDS) for _ in range(self.rng.randint(lo, hi))]
+        if self.rng.random() < 0.5:
+            words.append("#" + self.rng.choice(WORDS))
+        return " ".join(words).capitalize()
+
+    def cdn_url(self, kind: str, size: str) -> str:
+        """Signed CDN URL in the shape Instagram serves (query escaped for JSON)."""
+        return (
+            f"https://{CDN_HOST}/v/{kind}/{self.digits(9)}_{self.digits(17)}_{self.digits(19)}_n.jpg"
+            f"?stp=dst-jpg_e35_{size}&_nc_ht={CDN_HOST}&_nc_cat={self.rng.randint(1, 111)}"
+            f"&_nc_ohc={self.token(11)}&edm={self.token(12)}&ccb=7-5&oh=00_{self.token(43)}"
+            f"&oe={self.token(8, '0123456789ABCDEF')}&_nc_sid={self.token(6, 'abcdef0123456789')}"
+        )
+
+
+def js(value) -> str:
+    """JSON the way the pages embed it: compact, `/` and `&` escaped."""
+    return json.dumps(value, separators=(",", ":")).replace("/", "\\/").replace("&", "\\u0026")
+
+
+def head(fake: Faker, username: str, full_name: str, meta_desc: str, og_image: str) -> str:
+    preloads = "".join(
+        f'<link rel="preload" href="https://static.cdninstagram.com/rsrc.php/v3{fake.token(4)}/y{fake.token(2)}/l/en_US/'
+        f'{fake.token(11)}.js?_nc_x={fake.token(11)}" as="script" crossorigin="anonymous" nonce="{fake.token(8)}" />'
+        for _ in range(48)
+    )
+    css = "".join(
+        f".x{fake.token(6, string.ascii_lowercase + string.digits)}{{{fake.rng.choice(['display', 'margin', 'padding', 'color', 'flex'])}:"
+        f"{fake.rng.choice(['flex', '0', 'var(--ig-primary-text)', 'inherit', '1 1 auto'])}}}"
+        for _ in range(1800)
+    )
+    og_image = og_image.replace("&", "&amp;")
+    return (
+        '<!DOCTYPE html><html class="_9dls" lang="en" dir="ltr"><head>'
+        '<meta charset="utf-8" /><meta name="viewport" content="width=device-width, initial-scale=1, viewport-fit=cover" />'
+        f'<title>{full_name} (@{username}) &#x2022; Instagram photos and videos</title>'
+        f'<meta property="og:type" content="profile" />'
+        f'<meta property="og:title" content="{full_name} (@{username}) &#x2022; Instagram photos and videos" />'
+        f'<meta property="og:image" content="{og_image}" />'
+        f'<meta property="og:description" content="{meta_desc}" />'
+        f'<meta property="og:url" content="https://www.instagram.com/{username}/" />'
+        f'<meta name="description" content="{meta_desc}" />'
+        f'<link rel="canonical" href="https://www.instagram.com/{username}/" />'
+        f"{preloads}<style>{css}</style></head>"
+    )
+
+
+def module_payloads(fake: Faker, count: int) -> str:
+    """The `data-sjs` ScheduledServerJS blobs that make up most of a page."""
+    blobs = []
+    for i in range(count):
+        defines = [
+            [
+                fake.rng.choice(["SiteData", "CurrentUserInitialData", "PolarisSiteData", "CometPersistQueryParams",
+                                 "WebConnectionClassServerGuess", "LSD", "ServerNonce", "IntlCurrentLocale"]) + str(i),
+                [],
+                {fake.token(fake.rng.randint(3, 10), string.ascii_lowercase): fake.rng.choice([
+                    fake.token(fake.rng.randint(8, 40)),
+                    fake.rng.randint(0, 10 ** 9),
+                    fake.rng.random() < 0.5,
+                    None,
+                ]) for _ in range(fake.rng.randint(4, 24))},
+                fake.rng.randint(100, 9999),
+            ]
+            for _ in range(fake.rng.randint(6, 30))
+        ]
+        requires = [
+            [fake.token(12), fake.rng.choice(["handle", "onReady", "init"]), None, [fake.token(20), fake.rng.randint(0, 999)]]
+            for _ in range(fake.rng.randint(2, 10))
+        ]
+        payload = {"require": [["ScheduledServerJS", "handle", None, [{"__bbox": {"define": defines, "require": requires}}]]]}
+        blobs.append(
+            f'<script type="application/json" data-content-len="{len(js(payload))}" data-sjs>{js(payload)}</script>'
+        )
+    return "".join(blobs)
+
+
+def relay_payload(fake: Faker, query: str, data: dict) -> str:
+    """A query result as Polaris ships it, wrapped in RelayPrefetchedStreamCache."""
+    payload = {"require": [["ScheduledServerJS", "handle", None, [{"__bbox": {"require": [[
+        "RelayPrefetchedStreamCache", "next", [], [
+            f"adp_{query}RelayPreloader_{fake.token(23)}",
+            {"__bbox": {"complete": True, "result": {"data": data, "extensions": {"is_final": True}}}},
+        ],
+    ]]}}]]]}
+    return f'<script type="application/json" data-content-len="{len(js(payload))}" data-sjs>{js(payload)}</script>'
+
+
+def timeline_node(fake: Faker, user_id: str, username: str) -> dict:
+    pk = fake.digits(19)
+    candidates = [
+        {"url": fake.cdn_url("t51.29350-15", size), "height": edge, "width": edge}
+        for size, edge in (("s1080x1080", 1080), ("s750x750", 750), ("s640x640", 640), ("s480x480", 480), ("s320x320", 320))
+    ]
+    return {"node": {
+        "code": fake.token(11), "pk": pk, "id": f"{pk}_{user_id}", "media_type": 1,
+        "taken_at": fake.rng.randint(1600000000, 1790000000),
+        "caption": {"text": fake.sentence(), "pk": fake.digits(17), "created_at": fake.rng.randint(1600000000, 1790000000)},
+        "image_versions2": {"candidates": candidates},
+        "original_width": 1080, "original_height": 1350,
+        "like_count": fake.rng.randint(0, 20000), "comment_count": fake.rng.randint(0, 400),
+        "user": {"pk": user_id, "username": username, "profile_pic_url": fake.cdn_url("t51.2885-19", "s150x150"),
+                 "is_private": False, "id": user_id},
+        "accessibility_caption": f"Photo by {username}. May be an image of {fake.sentence(2, 5).lower()}.",
+        "has_liked": False, "can_reshare": True, "product_type": "feed",
+        "__typename": "XDTMediaDict",
+    }, "cursor": fake.token(24)}
+
+
+def polaris_page(seed: int, username: str, is_private: bool, posts: int, modules: int) -> str:
+    fake = Faker(seed)
+    user_id = fake.digits(10)
+    full_name = " ".join(w.capitalize() for w in (fake.rng.choice(WORDS), fake.rng.choice(WORDS)))
+    followers = fake.rng.randint(200, 90000)
+    biography = fake.sentence(4, 10)
+    pic = fake.cdn_url("t51.2885-19", "s320x320")
+    meta_desc = f"{followers:,} Followers, {fake.rng.randint(50, 900)} Following, {fake.rng.randint(10, 600)} Posts - {biography}"
+
+    user = {
+        "pk": user_id, "id": user_id, "username": username, "full_name": full_name, "biography": biography,
+        "is_private": is_private, "is_verified": False, "follower_count": followers,
+        "following_count": fake.rng.randint(50, 900), "media_count": fake.rng.randint(10, 600),
+        "profile_pic_url": pic, "hd_profile_pic_url_info": {"url": fake.cdn_url("t51.2885-19", "s640x640")},
+        "external_url": None, "category": None, "__typename": "XDTUserDict",
+    }
+    body = [f'<body class="" style="background-color: #fff">'
+            f'<div id="splash-screen"></div><script nonce="{fake.token(8)}">requireLazy(["HasteSupportData"],function(m){{m.handle({{}})}});</script>']
+    body.append(module_payloads(fake, modules // 2))
+    body.append(relay_payload(fake, "PolarisProfilePageContentQuery", {"user": user}))
+    body.append(
+        f'<script type="application/json" data-sjs>{js({"require": [["PolarisLoggingConfig", "init", [], [{"logging_page_id": f"profilePage_{user_id}", "user_id": user_id}]]]})}</script>'
+    )
+    if not is_private:
+        edges = [timeline_node(fake, user_id, username) for _ in range(posts)]
+        body.append(relay_payload(fake, "PolarisProfilePostsQuery", {
+            "xdt_api__v1__feed__user_timeline_graphql_connection": {
+                "edges": edges, "page_info": {"end_cursor": fake.token(24), "has_next_page": True},
+            },
+        }))
+    else:
+        body.append(f'<div class="x{fake.token(6)}"><h2 dir="auto">This account is private</h2>'
+                    "<div>Follow to see their photos and videos.</div></div>")
+    body.append(module_payloads(fake, modules - modules // 2))
+    body.append("</body></html>")
+    return head(fake, username, full_name, meta_desc, pic) + "".join(body)
+
+
+def legacy_page(seed: int, username: str, posts: int, modules: int) -> str:
+    fake = Faker(seed)
+    user_id = fake.digits(10)
+    full_name = " ".join(w.capitalize() for w in (fake.rng.choice(WORDS), fake.rng.choice(WORDS)))
+    followers = fake.rng.randint(200, 90000)
+    biography = fake.sentence(4, 10)
+    pic = fake.cdn_url("t51.2885-19", "s150x150")
+    meta_desc = f"{followers:,} Followers, {fake.rng.randint(50, 900)} Following, {posts} Posts - {biography}"
+
+    edges = []
+    for _ in range(posts):
+        display = fake.cdn_url("t51.2885-15", "s1080x1080")
+        edges.append({"node": {
+            "__typename": "GraphImage", "id": fake.digits(19), "shortcode": fake.token(11),
+            "dimensions": {"height": 1080, "width": 1080}, "display_url": display,
+            "edge_media_to_caption": {"edges": [{"node": {"text": fake.sentence()}}]},
+            "edge_media_to_comment": {"count": fake.rng.randint(0, 400)},
+            "taken_at_timestamp": fake.rng.randint(1500000000, 1700000000),
+            "edge_liked_by": {"count": fake.rng.randint(0, 20000)},
+            "owner": {"id": user_id, "username": username},
+            "thumbnail_src": fake.cdn_url("t51.2885-15", "s640x640"),
+            "thumbnail_resources": [
+                {"src": fake.cdn_url("t51.2885-15", f"s{edge}x{edge}"), "config_width": edge, "config_height": edge}
+                for edge in (150, 240, 320, 480, 640)
+            ],
+            "is_video": False, "accessibility_caption": f"Photo by {full_name} on {fake.sentence(2, 4).lower()}.",
+        }})
+    shared = {
+        "config": {"csrf_token": fake.token(32), "viewer": None},
+        "country_code": "NL", "language_code": "en", "locale": "en_US",
+        "entry_data": {"ProfilePage": [{"logging_page_id": f"profilePage_{user_id}", "graphql": {"user": {
+            "biography": biography, "external_url": None, "edge_followed_by": {"count": followers},
+            "edge_follow": {"count": fake.rng.randint(50, 900)}, "full_name": full_name, "id": user_id,
+            "is_private": False, "is_verified": False, "profile_pic_url": pic,
+            "profile_pic_url_hd": fake.cdn_url("t51.2885-19", "s320x320"), "username": username,
+            "edge_owner_to_timeline_media": {"count": posts, "page_info": {"has_next_page": True, "end_cursor": fake.token(24)},
+                                             "edges": edges},
+        }}}]},
+        "rollout_hash": fake.token(12), "bundle_variant": "metro", "nonce": fake.token(24),
+    }
+    person = {"@context": "http://schema.org", "@type": "Person", "name": full_name,
+              "alternateName": f"@{username}", "description": biography,
+              "mainEntityofPage": {"@type": "ProfilePage", "@id": f"https://www.instagram.com/{username}/",
+                                   "interactionStatistic": {"@type": "InteractionCounter",
+                                                            "interactionType": "http://schema.org/FollowAction",
+                                                            "userInteractionCount": str(followers)}}}
+    return (
+        head(fake, username, full_name, meta_desc, pic)
+        + '<body class=""><span id="react-root"></span>'
+        + f'<script type="application/ld+json">{json.dumps(person)}</script>'
+        + f'<script type="text/javascript">window._sharedData = {js(shared)};</script>'
+        + module_payloads(fake, modules)
+        + "</body></html>"
+    )
+
+
+def main() -> None:
+    os.makedirs(FIXTURES, exist_ok=True)
+    pages = {
+        "polaris-public.html": polaris_page(1, "sample.public", is_private=False, posts=12, modules=70),
+        "polaris-private.html": polaris_page(2, "sample.private", is_private=True, posts=0, modules=70),
+        "legacy-shared.html": legacy_page(3, "sample.legacy", posts=12, modules=25),
+    }
+    for name, html in pages.items():
+        with open(os.path.join(FIXTURES, name), "w", encoding="utf-8") as f:
+            f.write(html)
+        print(f"{name}: {len(html) // 1024} KB")
+
+
+if __name__ == "__main__":
+    main()
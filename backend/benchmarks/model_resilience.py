@@ -0,0 +1,230 @@
+"""
+Exercise model call retries, the circuit breaker and deadlines against a
+local fake Messages API.
+
+    python -m benchmarks.model_resilience            # run the scenarios
+    python -m benchmarks.model_resilience --serve    # only run the fake server
+
+Run from backend/. The fake server answers from a queue of scripted
+outcomes (`POST /_script` with e.g. ["429:1", "529", "ok"]), falling back
+to a normal response when the queue is empty. To try the whole app
+against it, start it with --serve and run the backend with
+BRIDGE_ENABLED=false CLAUDE_API_URL=http://127.0.0.1:8765/v1/messages.
+
+Outcomes: "ok", "<status>" or "<status>:<retry-after seconds>", "hang"
+(never answers), "stream_error" (streams some text, then an
+overloaded_error event). Message batches always succeed, which is enough
+to try `bulk_analyze.py --batch` locally.
+"""
+import io
+import os
+import sys
+import json
+import time
+import tempfile
+import asyncio
+import argparse
+import threading
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.responses import JSONResponse, Response, StreamingResponse  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from app.services.ai_service import ClaudeAPIService  # noqa: E402
+from app.services.cpu_executor import CpuExecutor  # noqa: E402
+from app.services.http_pool import HttpPool  # noqa: E402
+from app.services.image_processing import ImagePreprocessor  # noqa: E402
+from app.services.image_store import ImageStore  # noqa: E402
+from app.services.json_stream import ModelOutputParser  # noqa: E402
+from app.services.model_resilience import CircuitBreaker, ModelCallError, ModelResilience  # noqa: E402
+from app.services.prompts import PromptRegistry  # noqa: E402
+
+
+RESULT_TEXT = json.dumps({
+    "vibe_type": "Fake Vibe",
+    "vibe_emoji": "✨",
+    "description": "Served by the fake model server",
+    "roast": "",
+    "traits": ["scripted"],
+    "conversation_starters": ["hi"],
+    "energy": "steady",
+})
+
+
+def fake_model_app() -> FastAPI:
+    """A Messages API stand-in that plays back scripted outcomes."""
+    app = FastAPI()
+    script: List[str] = []
+
+    @app.post("/_script")
+    async def set_script(outcomes: List[str]):
+        script[:] = outcomes
+        return {"queued": len(script)}
+
+    @app.post("/v1/messages")
+    async def messages(request: Request):
+        body = await request.json()
+        outcome = script.pop(0) if script else "ok"
+
+        if outcome == "hang":
+            await asyncio.sleep(3600)
+        if outcome not in ("ok", "stream_error"):
+            status, _, retry_after = outcome.partition(":")
+            headers = {"retry-after": retry_after} if retry_after else {}
+            error = {"type": "error", "error": {"type": "overloaded_error", "message": f"scripted {status}"}}
+            return JSONResponse(error, status_code=int(status), headers=headers)
+
+        usage = {"input_tokens": 100, "output_tokens": 20}
+        if not body.get("stream"):
+            return JSONResponse({"content": [{"type": "text", "text": RESULT_TEXT}], "usage": usage})
+
+        async def events():
+            yield f"event: message_start\ndata: {json.dumps({'type': 'message_start', 'message': {'usage': usage}})}\n\n"
+            for i in range(0, len(RESULT_TEXT), 16):
+                if outcome == "stream_error" and i >= 32:
+                    error = {"type": "error", "error": {"type": "overloaded_error", "message": "scripted mid-stream"}}
+                    yield f"event: error\ndata: {json.dumps(error)}\n\n"
+                    return
+                delta = {"type": "content_block_delta", "delta": {"type": "text_delta", "text": RESULT_TEXT[i:i + 16]}}
+                yield f"event: content_block_delta\ndata: {json.dumps(delta)}\n\n"
+                await asyncio.sleep(0.01)
+            yield f"event: message_stop\ndata: {json.dumps({'type': 'message_stop'})}\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    batches: Dict[str, List[str]] = {}
+
+    @app.post("/v1/messages/batches")
+    async def create_batch(request: Request):
+        body = await request.json()
+        batch_id = f"msgbatch_fake{len(batches)}"
+        batches[batch_id] = [entry["custom_id"] for entry in body["requests"]]
+        return {"id": batch_id, "processing_status": "in_progress", "results_url": None}
+
+    @app.get("/v1/messages/batches/{batch_id}")
+    async def get_batch(batch_id: str, request: Request):
+        # Every batch has ended by the time it is polled
+        return {
+            "id": batch_id,
+            "processing_status": "ended",
+            "request_counts": {"succeeded": len(batches[batch_id])},
+            "results_url": str(request.url_for("batch_results", batch_id=batch_id)),
+        }
+
+    @app.get("/v1/messages/batches/{batch_id}/results", name="batch_results")
+    async def batch_results(batch_id: str):
+        lines = [
+            json.dumps({
+                "custom_id": custom_id,
+                "result": {"type": "succeeded", "message": {"content": [{"type": "text", "text": RESULT_TEXT}]}},
+            })
+            for custom_id in batches[batch_id]
+        ]
+        return Response("\n".join(lines), media_type="application/x-jsonl")
+
+    @app.get("/_health")
+    async def health():
+        return Response("ok")
+
+    return app
+
+
+def start_server(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(fake_model_app(), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/_health")
+            return server
+        except httpx.TransportError:
+            time.sleep(0.05)
+    raise RuntimeError("Fake model server did not start")
+
+
+def test_image() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), "purple").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+async def run_scenarios(port: int) -> None:
+    base = f"http://127.0.0.1:{port}"
+    resilience = ModelResilience(
+        breaker=CircuitBreaker("fake", failure_threshold=3, reset_seconds=2.0),
+        deadlines={"profile": 5.0, "deep": 5.0},
+        max_attempts=3,
+        base_delay=0.1,
+        max_delay=0.5,
+        max_retry_after=2.0,
+    )
+    service = ClaudeAPIService(
+        api_key="fake",
+        image_store=ImageStore(tempfile.mkdtemp(prefix="fake_model_")),
+        http=HttpPool("fake-model", http2=False),
+        preprocessor=ImagePreprocessor(),
+        cpu=CpuExecutor(),
+        prompts=PromptRegistry(),
+        output=ModelOutputParser(),
+        resilience=resilience,
+        api_url=f"{base}/v1/messages",
+    )
+    image = test_image()
+
+    async def scenario(name: str, outcomes: List[str], stream: bool = False) -> None:
+        async with httpx.AsyncClient() as client:
+            await client.post(f"{base}/_script", json=outcomes)
+        started = time.monotonic()
+        try:
+            if stream:
+                result = None
+                async for event in service.stream_profile(image, "en"):
+                    if event["event"] == "done":
+                        result = event["result"]
+            else:
+                result = await service.analyze_profile(image, "en")
+            outcome = f"ok ({result['vibe_type']})"
+        except ModelCallError as e:
+            outcome = f"{type(e).__name__}: {str(e)[:60]}"
+        elapsed = time.monotonic() - started
+        print(f"{name:<34} {elapsed:6.2f}s  breaker={resilience.breaker.state:<9} {outcome}")
+
+    print(f"{'scenario':<34} {'time':>7}")
+    await scenario("429 with retry-after 1s, then ok", ["429:1", "ok"])
+    await scenario("529 twice, then ok", ["529", "529", "ok"])
+    await scenario("400 bad request (no retry)", ["400"])
+    await scenario("hang (deadline 5s)", ["hang"] * 3)
+    await scenario("503 until the breaker opens", ["503"] * 3)
+    await scenario("call while open (fails fast)", [])
+    await asyncio.sleep(2.1)
+    await scenario("probe after reset", ["ok"])
+    await scenario("stream: 529 before any text", ["529", "ok"], stream=True)
+    await scenario("stream: error after text (no retry)", ["stream_error"], stream=True)
+
+    print(json.dumps(resilience.stats(), indent=2))
+    await service.http.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--serve", action="store_true", help="only run the fake model server")
+    args = parser.parse_args()
+
+    if args.serve:
+        uvicorn.run(fake_model_app(), host="127.0.0.1", port=args.port)
+        return
+
+    server = start_server(args.port)
+    try:
+        asyncio.run(run_scenarios(args.port))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Bridge consumer commands for Profile Whisperer.
+
+Lets several Claude Code sessions (or scripts) drain the bridge request
+queue without working on the same request twice:
+
+    python bridge_worker.py list
+    python bridge_worker.py claim --consumer session-a
+    python bridge_worker.py heartbeat <request_id> <token>
+    python bridge_worker.py complete <request_id> <token> --result result.json
+    python bridge_worker.py fail <request_id> <token> --error "unreadable image"
+    python bridge_worker.py release <request_id> <token>
+
+`claim` prints the request directory and the lease token; the token is
+needed for every later command on that request. A claim that is not
+heartbeated within BRIDGE_LEASE_SECONDS goes back to the queue. Every
+command prints JSON.
+
+metadata.json in the request directory gives its kind. Profile requests
+hold image.jpg and prompt.txt; deep requests hold prompt.txt and
+manifest.json, whose posts reference images in BRIDGE_IMAGE_DIR by
+content hash.
+"""
+import os
+import sys
+import json
+import socket
+import argparse
+import contextlib
+from dataclasses import asdict
+from typing import Any, Dict, Tuple
+from app.services.bridge_queue import LeaseLostError, get_bridge_queue
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Claim and answer bridge requests.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="every request and its queue state")
+
+    claim = commands.add_parser("claim", help="lease the oldest waiting request")
+    claim.add_argument("--consumer", default=f"{socket.gethostname()}-{os.getpid()}")
+
+    for name, help_text in (
+        ("heartbeat", "extend a held lease"),
+        ("complete", "write the result and drop the lease"),
+        ("fail", "fail the request and drop the lease"),
+        ("release", "drop the lease, putting the request back in the queue"),
+    ):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("request_id")
+        command.add_argument("token")
+        if name == "complete":
+            command.add_argument("--result", required=True, help="JSON result file, or - for stdin")
+        elif name == "fail":
+            command.add_argument("--error", required=True)
+    return parser.parse_args()
+
+
+def read_result(path: str) -> dict:
+    if path == "-":
+        return json.load(sys.stdin)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run(args: argparse.Namespace) -> Tuple[int, Dict[str, Any]]:
+    queue = get_bridge_queue()
+
+    if args.command == "list":
+        return 0, queue.snapshot()
+    if args.command == "claim":
+        lease = queue.claim(args.consumer)
+        if lease is None:
+            return 0, {"claimed": False}
+        return 0, {
+            "claimed": True,
+            "request_path": os.path.abspath(os.path.join(queue.request_dir, lease.request_id)),
+            **asdict(lease),
+        }
+
+    try:
+        if args.command == "heartbeat":
+            return 0, {"ok": True, **asdict(queue.heartbeat(args.request_id, args.token))}
+        if args.command == "complete":
+            queue.complete(args.request_id, args.token, read_result(args.result))
+        elif args.command == "fail":
+            queue.fail(args.request_id, args.token, args.error)
+        else:
+            queue.release(args.request_id, args.token)
+    except LeaseLostError as e:
+        return 1, {"ok": False, "error": str(e)}
+    return 0, {"ok": True}
+
+
+def main(args: argparse.Namespace) -> int:
+    # Queue log lines go to stderr so stdout stays parseable JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        code, output = run(args)
+    print(json.dumps(output, indent=2, ensure_ascii=False))
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
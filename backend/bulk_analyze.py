@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Offline bulk analysis runner for Profile Whisperer.
+
+Re-runs analyses over stored screenshots (e.g. after a prompt change)
+without going through the HTTP API:
+
+    python bulk_analyze.py screenshots/ -o results.ndjson
+    python bulk_analyze.py manifest.ndjson -o results.ndjson --service api --batch
+    python bulk_analyze.py screenshots/ -o dry_run.ndjson --service stub
+
+Input is a directory (image files -> profile analyses, subdirectories of
+images -> deep analyses) or a JSON/NDJSON manifest. Each result is
+appended to the output as one JSON line; re-running the same command
+resumes, skipping items already done under the current prompt version.
+"""
+import asyncio
+import argparse
+import json
+from app.config import get_settings
+from app.services.ai_service import StubAIService, create_ai_service
+from app.services.bulk_jobs import BulkAnalysisJob, JobCheckpoint, load_items
+from app.services.cpu_executor import get_cpu_executor
+from app.services.http_pool import get_claude_http_pool
+from app.services.image_store import get_image_store
+
+
+def parse_args() -> argparse.Namespace:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Run analyses over stored images in bulk.")
+    parser.add_argument("source", help="directory of images or a JSON/NDJSON manifest")
+    parser.add_argument("-o", "--output", required=True, help="NDJSON results file (also the resume checkpoint)")
+    parser.add_argument(
+        "--service",
+        choices=["auto", "api", "bridge", "stub"],
+        default="auto",
+        help="auto follows BRIDGE_ENABLED, like the server",
+    )
+    parser.add_argument("--concurrency", type=int, default=settings.claude_max_concurrent)
+    parser.add_argument("--language", default="tr")
+    parser.add_argument("--friendly", action="store_true", help="friendly mode instead of roast")
+    parser.add_argument("--no-retry-failed", action="store_true", help="on resume, skip items that failed before")
+    parser.add_argument("--limit", type=int, default=0, help="only the first N items")
+    parser.add_argument("--batch", action="store_true", help="submit through the provider's message batches")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--poll-seconds", type=float, default=30.0)
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="stub service: seconds per call")
+    parser.add_argument("--stub-failure-rate", type=float, default=0.0, help="stub service: share of calls that fail")
+    return parser.parse_args()
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings = get_settings()
+    image_store = get_image_store()
+
+    items = load_items(args.source, language=args.language, roast_mode=not args.friendly)
+    if args.limit:
+        items = items[:args.limit]
+
+    kind = args.service
+    if kind == "auto":
+        kind = "bridge" if settings.bridge_enabled else "api"
+    if kind == "stub":
+        service = StubAIService(image_store, latency_seconds=args.stub_latency, failure_rate=args.stub_failure_rate)
+    else:
+        service = create_ai_service(kind)
+
+    print("\n" + "=" * 60)
+    print("Profile Whisperer - Bulk Analysis")
+    print("=" * 60)
+    print(f"Service: {kind}{' (message batches)' if args.batch else ''}")
+    print(f"Items: {len(items)} from {args.source}")
+    print(f"Output: {args.output}")
+    print("=" * 60 + "\n")
+
+    job = BulkAnalysisJob(
+        service,
+        image_store,
+        JobCheckpoint(args.output, retry_failed=not args.no_retry_failed),
+        concurrency=args.concurrency,
+    )
+    claude_http = get_claude_http_pool()
+    try:
+        if args.batch:
+            summary = await job.run_batches(items, batch_size=args.batch_size, poll_seconds=args.poll_seconds)
+        else:
+            summary = await job.run(items)
+    finally:
+        await claude_http.close()
+        get_cpu_executor().close()
+
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))